@@ -0,0 +1,63 @@
+from fastapi import APIRouter
+from starlette.responses import PlainTextResponse
+
+from app.service.jobs import translation_jobs
+from app.service.manager import debugger_threads_in_use
+from app.service.metrics import Labels, gauge, metrics_registry
+from app.service.registry import session_registry
+from app.service.workspace import workspace_manager
+
+router = APIRouter()
+
+# Формат текстовой выдачи Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _active_sessions() -> dict[Labels, float]:
+    return {(): session_registry.active_sessions}
+
+
+# Программу исполняет поток сервера (бэкенд thread) или рабочий процесс сессии (бэкенд process)
+def _debugger_threads() -> dict[Labels, float]:
+    return {
+        (("backend", "thread"),): len(debugger_threads_in_use),
+        (("backend", "process"),): session_registry.running_processes()
+    }
+
+
+# Глубина известна только для очередей в памяти сервера: сколько сообщений лежит в канале
+# между сервером и рабочим процессом, узнать нельзя, поэтому сессии process здесь не учитываются
+def _queue_depths() -> dict[Labels, float]:
+    commands, outputs = session_registry.queue_depths()
+    return {
+        (("backend", "thread"), ("queue", "command")): commands,
+        (("backend", "thread"), ("queue", "output")): outputs
+    }
+
+
+def _workspace_bytes() -> dict[Labels, float]:
+    return {(): workspace_manager.bytes_used}
+
+
+def _queued_jobs() -> dict[Labels, float]:
+    return {(): translation_jobs.queued}
+
+
+gauge("postdb_active_sessions", "Number of open debug sessions", _active_sessions)
+gauge(
+    "postdb_debugger_threads_in_use",
+    "Debugger executor threads (backend=thread) and session worker processes (backend=process) running a program",
+    _debugger_threads
+)
+gauge(
+    "postdb_communication_queue_depth",
+    "Messages waiting in in-memory debugger queues; process backend pipes are not observable",
+    _queue_depths
+)
+gauge("postdb_translation_jobs_queued", "Translation jobs waiting for a translator", _queued_jobs)
+gauge("postdb_workspace_bytes", "Disk space used by translation workspaces at the last scan", _workspace_bytes)
+
+
+@router.get("/metrics")
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics_registry.render(), media_type=CONTENT_TYPE)
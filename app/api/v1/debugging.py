@@ -1,14 +1,32 @@
-from asyncio import get_running_loop, create_task
+from asyncio import FIRST_COMPLETED, Task, create_task, get_running_loop, wait
+from json import dumps
+from time import perf_counter
+from dataclasses import asdict
+from typing import Any, AsyncIterator, Optional
 from uuid import UUID
 
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+from starlette.responses import PlainTextResponse, StreamingResponse
 from starlette.websockets import WebSocket
 
-from app.core.command import Command
-from app.service.initializing import debugging_initializer
+from app.settings import settings
+from app.core.command import Command, CommandName
+from app.core.debugger import DebuggerEngine
+from app.core.profiler import ProfileReport, ProgramProfile
+from app.core.util.output import SnapshotOptions
+from app.service.cache import CacheStats
+from app.service.handoff import ensure_local_workspace, read_artifacts
+from app.service.jobs import JobInfo, JobQueueFullError, TranslationJob, translation_jobs
 from app.service.manager import PostDebuggerManager
+from app.service.metrics import websocket_command_seconds
+from app.service.profiling import read_profile
+from app.service.registry import DebugSession, SessionInfo, SessionLimitError, session_registry
 from app.service.request_processing import TranslatorOutput, CodeInfo, debugging_request_processor
+from app.service.simulation import InputValue, ScenarioStep, SimulationParameters, SimulationResult, \
+    parse_scenario_csv, program_simulator
+from app.service.util.worker import WorkerError, WorkerTimeoutError
+from app.service.workspace import WorkspaceStats, workspace_manager
 
 debugging_prefix = "/debugging"
 
@@ -25,31 +43,285 @@ class DebuggingRequestResult(BaseModel):
     code_info: CodeInfo
 
 
+def _submit_job(post_code: str) -> TranslationJob:
+    try:
+        return translation_jobs.submit(post_code)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def _get_job(job_id: UUID) -> TranslationJob:
+    job = translation_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+# Синхронный вариант: трансляция проходит через ту же очередь, что и задачи /jobs
 @router.post("/request-debugging")
 async def request_debugging(payload: DebuggingRequestPayload) -> DebuggingRequestResult:
-    post_code = payload.post_code
-    uuid, translator_output, code_info = await debugging_request_processor.process(post_code)
-    return DebuggingRequestResult(uuid=str(uuid), translator_output=translator_output, code_info=code_info)
+    job = await translation_jobs.wait(_submit_job(payload.post_code))
+    if job.uuid is None or job.translator_output is None or job.code_info is None:
+        raise HTTPException(status_code=500, detail=job.error)
 
+    return DebuggingRequestResult(uuid=str(job.uuid), translator_output=job.translator_output, code_info=job.code_info)
 
-@router.websocket("/debug/{uuid}")
-async def debug(websocket: WebSocket, uuid: UUID) -> None:
-    await websocket.accept()
 
-    await debugging_initializer.initialize(uuid)
-    debugger_manager = PostDebuggerManager(uuid, get_running_loop())
-    task = create_task(debugger_manager.run_debugging())
+class BatchDebuggingRequestPayload(BaseModel):
+    post_codes: list[str] = Field(min_length=1, max_length=settings.TRANSLATION_BATCH_MAX_PROGRAMS)
 
-    while True:
-        try:
-            raw_command = await websocket.receive_text()
-            command = await Command.from_string(raw_command)
 
-            result = await debugger_manager.run_command(command)
-            await websocket.send_text(result)
+# NDJSON: строка на программу в порядке завершения трансляции, index — номер программы в запросе
+@router.post("/request-debugging/batch")
+async def request_debugging_batch(payload: BatchDebuggingRequestPayload) -> StreamingResponse:
+    async def results() -> AsyncIterator[str]:
+        async for index, job in translation_jobs.run_batch(payload.post_codes, settings.TRANSLATION_BATCH_WINDOW):
+            yield dumps({"index": index, **asdict(job.info())}) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(payload: DebuggingRequestPayload) -> JobInfo:
+    return _submit_job(payload.post_code).info()
+
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: UUID) -> JobInfo:
+    return _get_job(job_id).info()
+
+
+# Server-Sent Events: событие на каждую смену состояния задачи, поток закрывается после завершения
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: UUID) -> StreamingResponse:
+    job = _get_job(job_id)
+
+    async def events() -> AsyncIterator[str]:
+        async for info in translation_jobs.watch(job):
+            yield f"event: {info.status}\ndata: {dumps(asdict(info))}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+class ScenarioStepPayload(BaseModel):
+    cycle: int = Field(ge=0)
+    values: dict[str, InputValue]
+
+
+class SimulationPayload(BaseModel):
+    input_values: dict[str, InputValue] = {}
+    cycles: int = Field(default=1000, ge=1)
+    wall_time_budget: Optional[float] = Field(default=None, gt=0)
+    cpu_time_budget: Optional[float] = Field(default=None, gt=0)
+    trace_every: int = Field(default=0, ge=0)
+    profile: bool = False
+    # Сценарий входных значений: списком шагов или текстом CSV (см. parse_scenario_csv)
+    scenario: list[ScenarioStepPayload] = Field(default=[], max_length=settings.SIMULATION_MAX_SCENARIO_STEPS)
+    scenario_csv: Optional[str] = None
+
+
+@router.post("/simulate/{uuid}")
+async def simulate(uuid: UUID, payload: SimulationPayload) -> SimulationResult:
+    scenario = [ScenarioStep(step.cycle, step.values) for step in payload.scenario]
+    if payload.scenario_csv is not None:
+        try:
+            scenario.extend(
+                parse_scenario_csv(payload.scenario_csv, settings.SIMULATION_MAX_SCENARIO_STEPS - len(scenario))
+            )
         except ValueError as e:
-            print(f"An exception was thrown: {e}")
-            continue
-        except Exception as e:
-            print(f"An exception was thrown: {e}")
-            break
+            raise HTTPException(status_code=422, detail=str(e))
+
+    parameters = SimulationParameters(
+        input_values=payload.input_values,
+        max_cycles=payload.cycles,
+        wall_time_budget=payload.wall_time_budget,
+        cpu_time_budget=payload.cpu_time_budget,
+        trace_every=payload.trace_every,
+        profile=payload.profile,
+        scenario=scenario
+    )
+
+    if not await ensure_local_workspace(uuid):
+        raise HTTPException(status_code=404, detail=f"Translation not found: {uuid}")
+
+    try:
+        return await program_simulator.simulate(uuid, parameters)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except WorkerTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except WorkerError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _load_profile(uuid: UUID) -> ProgramProfile:
+    profile = read_profile(workspace_manager.path(uuid))
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {uuid}")
+    return profile
+
+
+# Профиль последнего профилированного запуска: сессии отладки с ?profile=true или прогона с profile: true
+@router.get("/profile/{uuid}")
+async def profile_report(uuid: UUID, top: int = Query(default=20, ge=1)) -> ProfileReport:
+    return _load_profile(uuid).report(top)
+
+
+# Стеки в collapsed-формате для flamegraph.pl и speedscope
+@router.get("/profile/{uuid}/collapsed")
+async def profile_collapsed(uuid: UUID) -> PlainTextResponse:
+    return PlainTextResponse(_load_profile(uuid).collapsed())
+
+
+# Файлы каталога трансляции для передачи на другой узел
+@router.get("/workspace/{uuid}/artifacts")
+async def workspace_artifacts(uuid: UUID) -> dict[str, str]:
+    artifacts = read_artifacts(uuid)
+    if artifacts is None:
+        raise HTTPException(status_code=404, detail=f"Translation not found: {uuid}")
+    return artifacts
+
+
+@router.get("/translation-cache")
+async def translation_cache_stats() -> CacheStats:
+    return debugging_request_processor.translation_cache.stats()
+
+
+@router.get("/workspaces")
+async def workspaces() -> WorkspaceStats:
+    return await workspace_manager.stats()
+
+
+@router.get("/sessions")
+async def sessions() -> list[SessionInfo]:
+    return session_registry.sessions()
+
+
+# Режим RUN_LIVE: снимки отправляются клиенту по мере поступления, пока он не пришлет PAUSE.
+# Следующий снимок отладчик готовит только после отправки предыдущего, поэтому медленный клиент
+# получает последнее состояние программы, а не очередь устаревших. Возвращает чтение команды,
+# начатое во время потока снимков: клиент мог прислать ее сразу после PAUSE
+async def _stream_live(
+        websocket: WebSocket,
+        debugger_manager: PostDebuggerManager,
+        session: DebugSession
+) -> Optional[Task[str]]:
+    receive = create_task(websocket.receive_text())
+    output = create_task(debugger_manager.receive_live_output())
+    paused = False
+    try:
+        while True:
+            # После PAUSE команды не читаются: следующая выполнится после ответа на PAUSE
+            waiting: set[Task[Any]] = {output} if paused else {receive, output}
+            done, _ = await wait(waiting, return_when=FIRST_COMPLETED)
+
+            if receive in done and not paused:
+                raw_command = receive.result()
+                if raw_command.strip() == CommandName.PAUSE.value:
+                    debugger_manager.pause_live()
+                    paused = True
+                else:
+                    print(f"Command ignored while running live: {raw_command}")
+                receive = create_task(websocket.receive_text())
+
+            if output in done:
+                live_output = output.result()
+                await websocket.send_text(live_output.message)
+                session_registry.touch(session)
+                if not live_output.live:
+                    # Ответ на PAUSE: дальше команды обрабатываются как обычно
+                    return receive
+
+                debugger_manager.acknowledge_live_output()
+                output = create_task(debugger_manager.receive_live_output())
+    except BaseException:
+        receive.cancel()
+        raise
+    finally:
+        output.cancel()
+
+
+@router.websocket("/debug/{uuid}")
+async def debug(
+        websocket: WebSocket,
+        uuid: UUID,
+        engine: Optional[DebuggerEngine] = None,
+        deltas: Optional[bool] = None,
+        watch: Optional[str] = None,
+        profile: bool = False
+) -> None:
+    snapshot_options = None
+    if deltas is not None or watch is not None:
+        snapshot_options = SnapshotOptions(
+            deltas=deltas if deltas is not None else settings.SNAPSHOT_DELTAS,
+            # Например, ?watch=start,level,pump
+            watch=frozenset(name for name in watch.split(",") if name) if watch is not None else None,
+            live_interval=settings.LIVE_SNAPSHOT_INTERVAL
+        )
+
+    # Соединение могло попасть на узел, который не выполнял трансляцию
+    if not await ensure_local_workspace(uuid):
+        reason = f"Translation not found: {uuid}"
+        if "websocket.http.response" in websocket.scope.get("extensions", {}):
+            await websocket.send_denial_response(PlainTextResponse(reason, status_code=404))
+        else:
+            # 1011 — Internal Error: сессию открыть не на чем
+            await websocket.close(code=1011, reason=reason)
+        return
+
+    debugger_manager = PostDebuggerManager(
+        uuid,
+        get_running_loop(),
+        engine=engine,
+        snapshot_options=snapshot_options,
+        profile=profile
+    )
+
+    try:
+        session = await session_registry.open(uuid, debugger_manager, lambda: websocket.close(code=1001))
+    except SessionLimitError as e:
+        if "websocket.http.response" in websocket.scope.get("extensions", {}):
+            await websocket.send_denial_response(PlainTextResponse(str(e), status_code=503))
+        else:
+            # 1013 — Try Again Later
+            await websocket.close(code=1013, reason=str(e))
+        return
+
+    try:
+        await websocket.accept()
+
+        session_registry.activate(session)
+
+        # Команда, прочитанная во время RUN_LIVE после PAUSE
+        pending_command: Optional[Task[str]] = None
+
+        while True:
+            try:
+                if pending_command is not None:
+                    raw_command, pending_command = await pending_command, None
+                else:
+                    raw_command = await websocket.receive_text()
+                received = perf_counter()
+                command = await Command.from_string(raw_command)
+                session_registry.begin_command(session)
+
+                result = await debugger_manager.run_command(command)
+                await websocket.send_text(result)
+                websocket_command_seconds.observe(perf_counter() - received)
+
+                if command.name == CommandName.RUN_LIVE:
+                    pending_command = await _stream_live(websocket, debugger_manager, session)
+
+                if debugger_manager.finished:
+                    await websocket.close(code=1001)
+                    break
+
+                session_registry.end_command(session)
+            except ValueError as e:
+                print(f"An exception was thrown: {e}")
+                continue
+            except Exception as e:
+                print(f"An exception was thrown: {e}")
+                break
+    finally:
+        await session_registry.release(session)
@@ -0,0 +1,79 @@
+from ast import Attribute, ClassDef, FunctionDef, Global, Name, parse
+from dataclasses import asdict, dataclass
+from json import dumps, loads
+from pathlib import Path
+from typing import Literal, Optional
+
+BreakpointKind = Literal["set_variable", "set_state", "process_run"]
+
+# Индекс точек останова лежит рядом с python_code.py и строится один раз при трансляции
+BREAKPOINT_INDEX_FILENAME = "breakpoints.json"
+
+
+@dataclass(frozen=True)
+class Breakpoint:
+    line: int
+    kind: BreakpointKind
+    # Класс процесса, которому принадлежит метод run; None для setVariable и set_state
+    process: Optional[str] = None
+
+
+def find_breakpoints(source: str) -> list[Breakpoint]:
+    tree = parse(source)
+
+    breakpoints = []
+
+    for node in tree.body:
+        if isinstance(node, FunctionDef) and node.name == "setVariable":
+            breakpoints.append(Breakpoint(_first_statement_line(node), "set_variable"))
+        elif isinstance(node, FunctionDef) and node.name == "set_state":
+            breakpoints.append(Breakpoint(_first_statement_line(node), "set_state"))
+
+    def visit_class(class_node: ClassDef, inside_program: bool) -> None:
+        inherits_program = any(
+            (isinstance(base, Name) and base.id == "Program") or
+            (isinstance(base, Attribute) and base.attr == "Program")
+            for base in class_node.bases
+        )
+
+        current_inside = inside_program or (class_node.name == "Program") or inherits_program
+
+        for child in class_node.body:
+            if isinstance(child, FunctionDef) and child.name == "run" and current_inside:
+                breakpoints.append(Breakpoint(_first_statement_line(child), "process_run", class_node.name))
+            elif isinstance(child, ClassDef):
+                visit_class(child, current_inside)
+
+    for node in tree.body:
+        if isinstance(node, ClassDef):
+            visit_class(node, False)
+
+    # Одна точка останова на строку: первая найденная определяет вид остановки
+    unique_breakpoints: dict[int, Breakpoint] = {}
+    for breakpoint in breakpoints:
+        unique_breakpoints.setdefault(breakpoint.line, breakpoint)
+
+    return sorted(unique_breakpoints.values(), key=lambda b: b.line)
+
+
+# Точка останова ставится на первую исполняемую инструкцию тела: объявления global байткода не порождают,
+# а строка сигнатуры исполняется только один раз, при создании функции
+def _first_statement_line(function_node: FunctionDef) -> int:
+    for statement in function_node.body:
+        if not isinstance(statement, Global):
+            return statement.lineno
+
+    return function_node.lineno
+
+
+def dump_breakpoint_index(breakpoints: list[Breakpoint]) -> str:
+    return dumps([asdict(breakpoint) for breakpoint in breakpoints])
+
+
+def load_breakpoint_index(translation_path: Path) -> Optional[list[Breakpoint]]:
+    index_path = translation_path / BREAKPOINT_INDEX_FILENAME
+    if not index_path.exists():
+        return None
+
+    with open(index_path, "r", encoding="utf-8") as f:
+        return [Breakpoint(**item) for item in loads(f.read())]
@@ -1,5 +1,8 @@
 from dataclasses import dataclass
 from enum import Enum
+from typing import Optional
+
+from app.core.filters import compile_stop_filter
 
 
 class CommandName(Enum):
@@ -7,14 +10,56 @@ class CommandName(Enum):
 
     STEP = "STEP"
     CONTINUE = "CONTINUE"
+    RUN_UNTIL = "RUN_UNTIL"
+    RUN_LIVE = "RUN_LIVE"
+    PAUSE = "PAUSE"
     QUIT = "QUIT"
 
+    RESYNC = "RESYNC"
+    STEP_BACK = "STEP_BACK"
+    GOTO = "GOTO"
+
+    SET_FILTER = "SET_FILTER"
+    CLEAR_FILTER = "CLEAR_FILTER"
+
+
+# Команды, которые возобновляют исполнение программы
+RUN_COMMANDS = (CommandName.STEP, CommandName.CONTINUE, CommandName.RUN_UNTIL)
+
+# Команды, на которые отладчик отвечает, оставаясь на текущей остановке
+STAY_COMMANDS = (
+    CommandName.RESYNC, CommandName.STEP_BACK, CommandName.GOTO, CommandName.SET_FILTER, CommandName.CLEAR_FILTER,
+    CommandName.PAUSE
+)
+
+# Флаг в конце команд STEP, CONTINUE и RUN_UNTIL: вернуть все промежуточные снимки, а не только последний
+BATCH_FLAG = "BATCH"
+
 
 @dataclass(frozen=True)
 class Command:
     name: CommandName
     args: list[str]
 
+    @property
+    def batch(self) -> bool:
+        return self.name in RUN_COMMANDS and bool(self.args) and self.args[-1] == BATCH_FLAG
+
+    # Число остановок для STEP n, CONTINUE n и STEP_BACK n
+    @property
+    def count(self) -> int:
+        args = self.args[:-1] if self.batch else self.args
+        if self.name in (CommandName.STEP, CommandName.CONTINUE, CommandName.STEP_BACK) and args:
+            return int(args[0])
+        return 1
+
+    # Промежуток между снимками RUN_LIVE n (миллисекунды); None — промежуток сессии
+    @property
+    def live_interval(self) -> Optional[float]:
+        if self.name == CommandName.RUN_LIVE and self.args:
+            return int(self.args[0]) / 1000
+        return None
+
     @classmethod
     async def from_string(cls, raw_command: str) -> "Command":
         parts = raw_command.strip().split()
@@ -29,4 +74,25 @@ class Command:
         except ValueError:
             raise ValueError(f"Invalid command: {name_str}")
 
-        return Command(name, args)
+        command = Command(name, args)
+        command._validate()
+        return command
+
+    def _validate(self) -> None:
+        args = self.args[:-1] if self.batch else self.args
+
+        if self.name == CommandName.SET_VARIABLE and len(args) < 2:
+            raise ValueError(f"{self.name.value} expects a variable name and a value")
+        elif self.name in (CommandName.STEP, CommandName.CONTINUE, CommandName.STEP_BACK):
+            if len(args) > 1 or (args and not args[0].isdigit()) or self.count < 1:
+                raise ValueError(f"{self.name.value} expects an optional positive number of stops")
+        elif self.name == CommandName.RUN_UNTIL and len(args) != 2:
+            raise ValueError(f"{self.name.value} expects a process name and a state name")
+        elif self.name == CommandName.GOTO and (len(args) != 1 or not args[0].isdigit()):
+            raise ValueError(f"{self.name.value} expects a stop number")
+        elif self.name == CommandName.RUN_LIVE:
+            if len(args) > 1 or (args and not args[0].isdigit()) or (args and int(args[0]) < 1):
+                raise ValueError(f"{self.name.value} expects an optional positive interval in milliseconds")
+        elif self.name == CommandName.SET_FILTER:
+            compile_stop_filter(args)
+
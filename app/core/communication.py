@@ -1,15 +1,133 @@
-from asyncio import Queue
-from typing import TypeVar, Generic
+from asyncio import (
+    AbstractEventLoop, Future, Lock, Queue, ensure_future, get_running_loop, run_coroutine_threadsafe, shield, to_thread
+)
+from dataclasses import dataclass
+from multiprocessing import Pipe
+from typing import Any, TypeVar, Generic, Optional, Protocol
 
 T = TypeVar("T")
 
 
+class MessageQueue(Protocol[T]):
+    async def send_message(self, message: T) -> None: ...
+
+    async def receive_message(self) -> T: ...
+
+    def send_message_blocking(self, message: T) -> None: ...
+
+    def receive_message_blocking(self) -> T: ...
+
+
+# threading.Event или multiprocessing.Event, в зависимости от того, где работает отладчик
+class Signal(Protocol):
+    def set(self) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def is_set(self) -> bool: ...
+
+    def wait(self, timeout: Optional[float] = None) -> bool: ...
+
+
+# Управление режимом RUN_LIVE. Это флаги, а не сообщения: отладчик проверяет их на каждой остановке,
+# не обращаясь к циклу событий и не ожидая команд
+@dataclass(frozen=True)
+class LiveSignals:
+    # Сервер отправил клиенту предыдущий снимок: отладчик может отправить следующий
+    ready: Signal
+    # Клиент прислал PAUSE: отладчик останавливается на ближайшей строке программы
+    pause: Signal
+
+
+# Очередь между циклом событий и потоком отладчика внутри одного процесса
 class CommunicationQueue(Generic[T]):
-    def __init__(self) -> None:
+    def __init__(self, loop: AbstractEventLoop) -> None:
+        self._loop = loop
         self._queue = Queue[T]()
 
+    # Число сообщений, ожидающих получателя
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
     async def send_message(self, message: T) -> None:
         return await self._queue.put(message)
 
     async def receive_message(self) -> T:
         return await self._queue.get()
+
+    def send_message_blocking(self, message: T) -> None:
+        run_coroutine_threadsafe(self.send_message(message), self._loop).result()
+
+    def receive_message_blocking(self) -> T:
+        return run_coroutine_threadsafe(self.receive_message(), self._loop).result()
+
+
+def _observe_exception(future: Future[Any]) -> None:
+    if not future.cancelled():
+        future.exception()
+
+
+# Очередь между циклом событий сервера и рабочим процессом отладчика.
+# Асинхронные методы вызываются на стороне сервера, блокирующие — в рабочем процессе
+class ProcessCommunicationQueue(Generic[T]):
+    def __init__(self) -> None:
+        self._receiver, self._sender = Pipe(duplex=False)
+        self._send_lock: Optional[Lock] = None
+        # Чтение сообщения, начатое в потоке; переживает отмену ожидающей задачи
+        self._pending_receive: Optional[Future[T]] = None
+
+    # send блокируется, пока рабочий процесс не освободит место в канале (например, занят долгим CONTINUE):
+    # запись идет в потоке, а блокировка сохраняет порядок сообщений
+    async def send_message(self, message: T) -> None:
+        if self._send_lock is None:
+            self._send_lock = Lock()
+
+        async with self._send_lock:
+            await to_thread(self._sender.send, message)
+
+    # Цикл событий ждет готовности канала, а само сообщение, которое может приходить частями, читается в потоке.
+    # Если ожидающую задачу отменили, начатое чтение не теряется: сообщение получит следующий вызов
+    async def receive_message(self) -> T:
+        if self._pending_receive is None:
+            loop = get_running_loop()
+            readable = loop.create_future()
+
+            def on_readable() -> None:
+                if not readable.done():
+                    readable.set_result(None)
+
+            loop.add_reader(self._receiver.fileno(), on_readable)
+            try:
+                await readable
+            finally:
+                loop.remove_reader(self._receiver.fileno())
+
+            # Если процесс на другой стороне завершился, recv выбросит EOFError
+            self._pending_receive = ensure_future(to_thread(self._receiver.recv))
+            # Ошибка чтения, которое после отмены уже никто не ждет (сессия закрыта), не попадает в журнал
+            # как неполученное исключение; следующий вызов receive_message все равно ее получит
+            self._pending_receive.add_done_callback(_observe_exception)
+
+        message: T = await shield(self._pending_receive)
+        self._pending_receive = None
+        return message
+
+    def send_message_blocking(self, message: T) -> None:
+        self._sender.send(message)
+
+    def receive_message_blocking(self) -> T:
+        message: T = self._receiver.recv()
+        return message
+
+    # После запуска рабочего процесса каждая сторона закрывает ненужный ей конец канала,
+    # иначе завершение процесса на другой стороне нельзя будет обнаружить
+    def close_sender(self) -> None:
+        self._sender.close()
+
+    def close_receiver(self) -> None:
+        self._receiver.close()
+
+    def close(self) -> None:
+        self.close_sender()
+        self.close_receiver()
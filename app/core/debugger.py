@@ -1,168 +1,400 @@
-from ast import FunctionDef, ClassDef, Name, Attribute, parse
-from asyncio import AbstractEventLoop, run_coroutine_threadsafe
+import sys
+from abc import ABC, abstractmethod
 from bdb import Bdb
-from pathlib import Path
-from types import FrameType
-from typing import Optional, Any
+from dataclasses import dataclass, field
+from threading import Lock, Thread, get_ident
+from time import perf_counter
+from types import FrameType, CodeType
+from typing import Optional, Any, Literal
+
+from app.core.breakpoints import Breakpoint
+from app.core.command import Command, CommandName, RUN_COMMANDS, STAY_COMMANDS
+from app.core.filters import ProcessStateFilter, StopFilter, compile_stop_filter
+from app.core.communication import LiveSignals, MessageQueue
+from app.core.history import SnapshotHistory
+from app.core.profiler import SamplingProfiler
+from app.core.util.output import (
+    SnapshotEncoder, SnapshotOptions, build_output, build_batch_output_message, build_error_message
+)
+from app.core.util.variables import set_variable_value
+
+
+DebuggerEngine = Literal["bdb", "monitoring"]
+
+
+# Ответ отладчика и время его подготовки на остановке: от прихода на остановку (или получения команды)
+# до готовности сообщения. Время передается вместе с ответом, так как отладчик может работать в другом процессе
+@dataclass(frozen=True)
+class DebuggerOutput:
+    message: str
+    snapshot_seconds: float
+    # Снимок режима RUN_LIVE, отправленный без команды клиента
+    live: bool = False
+
+
+# Команда, которая исполняется на нескольких остановках подряд без обращения к клиенту
+@dataclass
+class _PendingRun:
+    command: Command
+    stops: int = 0
+    output_messages: list[str] = field(default_factory=list)
+    # Условие RUN_UNTIL разбирается один раз, а не на каждой остановке
+    until: Optional[StopFilter] = None
+
+    def __post_init__(self) -> None:
+        if self.command.name == CommandName.RUN_UNTIL:
+            self.until = ProcessStateFilter(self.command.args[0], self.command.args[1], on_change=False)
+
+    def is_complete(self, global_output: dict[str, Any]) -> bool:
+        if self.until is not None:
+            return self.until.matches(global_output)
+
+        return self.stops >= self.command.count
+
+
+# Режим RUN_LIVE: программа исполняется без ожидания команд, снимки отправляются не чаще раза в interval
+@dataclass
+class _LiveRun:
+    interval: float
+    next_push: float = 0.0
+
+
+# Общая часть движков отладки: обработка остановок, команд и установка точек останова.
+# Движок определяет, как программа исполняется и как он узнает об остановках
+class BasePostDebugger(ABC):
+    # Как часто поток наблюдения за PAUSE проверяет, что режим RUN_LIVE еще не завершен
+    _PAUSE_POLL_INTERVAL = 0.1
 
-from app.core.command import Command, CommandName
-from app.core.communication import CommunicationQueue
-from app.core.util.output import build_output_message
-
-
-class PostDebugger(Bdb):
     def __init__(
             self,
-            loop: AbstractEventLoop,
-            command_queue: CommunicationQueue[Command],
-            output_queue: CommunicationQueue[str]
+            command_queue: MessageQueue[Command],
+            output_queue: MessageQueue[DebuggerOutput],
+            snapshot_options: SnapshotOptions,
+            history: SnapshotHistory,
+            max_batch_stops: int,
+            max_filtered_stops: int,
+            live_signals: LiveSignals
     ) -> None:
-        super().__init__()
-
-        self._loop = loop
-
         self._command_queue = command_queue
         self._output_queue = output_queue
 
+        self._snapshot_options = snapshot_options
+        self._snapshot_encoder = SnapshotEncoder(snapshot_options)
+        self._max_batch_stops = max_batch_stops
+
+        # Фильтры остановок сессии: остановка, не прошедшая ни один фильтр, пропускается прямо в потоке
+        # отладчика, без снимка и обмена сообщениями. Подряд пропускается не больше max_filtered_stops
+        # остановок, чтобы клиент, фильтр которого никогда не срабатывает, получил управление обратно
+        self._stop_filters: list[StopFilter] = []
+        self._max_filtered_stops = max_filtered_stops
+        self._filtered_stops = 0
+
+        self._live_signals = live_signals
+        self._live_run: Optional[_LiveRun] = None
+        # Завершение RUN_LIVE в потоке отладчика и прерывание программы по PAUSE из потока наблюдения
+        # не пересекаются: прерывание не достанется команде, пришедшей после ответа на PAUSE
+        self._live_lock = Lock()
+        # Поток, в котором исполняется программа; известен после запуска run_program
+        self._thread_id: Optional[int] = None
+
+        self._history = history
+        self._stop_number = 0
+        # Последняя остановка, снимок которой получил клиент. Ответ на команду — снимок остановки, на которой
+        # она получена, после чего программа уходит на следующую: отладчик ждет на _shown_stop + 1
+        self._shown_stop = 0
+        # Номер остановки из истории, которую сейчас просматривает клиент; None — текущая остановка
+        self._history_stop: Optional[int] = None
+        self._pending_run: Optional[_PendingRun] = None
+
         self._current_frame: Optional[FrameType] = None
-        self._current_locals: dict[str, Any] = {}
-        self._current_globals: dict[str, Any] = {}
+        self._profiler: Optional[SamplingProfiler] = None
 
-    def user_line(self, frame: FrameType) -> None:
-        self._current_frame = frame
-        self._current_locals = dict(self._current_frame.f_locals)
-        self._current_globals = dict(self._current_frame.f_globals)
+    @abstractmethod
+    def run_program(self, code: CodeType, program_globals: dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def _add_breakpoint(self, filename: str, line_number: int) -> None: ...
+
+    @abstractmethod
+    def _resume_stepping(self) -> None: ...
 
-        future = run_coroutine_threadsafe(self.handle_stop(), self._loop)
-        future.result()
+    @abstractmethod
+    def _resume_continuing(self) -> None: ...
 
-    def set_breakpoints(self, path: Path) -> None:
-        line_numbers = self._find_line_numbers(path)
-        if not line_numbers:
-            print(f"Line numbers not found: {path}")
+    @abstractmethod
+    def _request_quit(self) -> None: ...
+
+    # Вызывается из потока наблюдения за PAUSE: программа должна остановиться на ближайшей строке
+    @abstractmethod
+    def _interrupt(self) -> None: ...
+
+    # Профилировщик приостанавливается на время обработки остановок
+    def attach_profiler(self, profiler: SamplingProfiler) -> None:
+        self._profiler = profiler
+
+    # Состояние программы читается из кадра только при построении снимка, без копирования пространств имен
+    def _stop(self, frame: FrameType) -> None:
+        self._current_frame = frame
+        if self._profiler is not None:
+            self._profiler.pause()
+        try:
+            self.handle_stop(frame)
+        finally:
+            if self._profiler is not None:
+                self._profiler.resume()
+            self._current_frame = None
+
+    def set_breakpoints(self, filename: str, breakpoints: list[Breakpoint]) -> None:
+        if not breakpoints:
+            print(f"Breakpoints not found: {filename}")
             return
 
-        filename = str(path)
         print(f"File name: {filename}")
 
-        for line_number in line_numbers:
+        for breakpoint in breakpoints:
             try:
-                self.set_break(filename, line_number)
-                print(f"Breakpoint set at {filename}:{line_number}")
+                self._add_breakpoint(filename, breakpoint.line)
+                print(f"Breakpoint set at {filename}:{breakpoint.line} ({breakpoint.kind})")
             except Exception as e:
-                print(f"Failed to set breakpoint at {filename}:{line_number}: {e}")
+                print(f"Failed to set breakpoint at {filename}:{breakpoint.line}: {e}")
+
+    # Вызывается в потоке (или процессе) отладчика; ожидание команды блокирует только его
+    def handle_stop(self, frame: FrameType) -> None:
+        if self._stop_filters and not self._passes_filters(frame.f_globals):
+            return
+
+        arrived = perf_counter()
+        self._stop_number += 1
+        self._history_stop = None
+
+        live_run = self._live_run
+        if live_run is not None and self._continue_live(live_run, frame, arrived):
+            return
 
-    async def handle_stop(self) -> None:
-        command = await self._command_queue.receive_message()
-        await self._execute_command(command)
+        # Снимок на момент прихода на остановку; команды запуска состояние программы не меняют
+        output = None
+        if self._history.enabled:
+            output = build_output(frame, self._snapshot_options.watch)
+            self._history.record(self._stop_number, output)
 
-        output_message = await build_output_message(self._current_locals, self._current_globals)
-        await self._output_queue.send_message(output_message)
+        pending_run = self._pending_run
+        while pending_run is None:
+            command = self._command_queue.receive_message_blocking()
+            received = perf_counter()
+            try:
+                self._execute_command(command)
+            except ValueError as e:
+                # Отвергнутая команда ничего не меняет: отладчик отвечает ошибкой и остается на остановке
+                self._send_output(build_error_message(str(e)), received)
+                continue
+
+            if command.name not in STAY_COMMANDS:
+                # Остальные команды действуют на текущую остановку и отвечают ее снимком
+                self._history_stop = None
+
+            if command.name in RUN_COMMANDS:
+                pending_run = _PendingRun(command)
+                break
+
+            self._send_output(self._encode_current(frame), received)
+
+            # Команды просмотра отвечают на текущей остановке, следующая команда выполняется на ней же
+            if command.name not in STAY_COMMANDS:
+                return
+
+        if output is None:
+            output = build_output(frame, self._snapshot_options.watch)
+
+        pending_run.stops += 1
+        if pending_run.command.batch:
+            output_message = self._snapshot_encoder.encode(output, self._stop_number)
+            pending_run.output_messages.append(output_message)
+
+        completed = pending_run.is_complete(frame.f_globals)
+        if not completed and pending_run.stops < self._max_batch_stops:
+            # Режим исполнения (шаг или продолжение) уже установлен командой: клиента не ждем
+            self._pending_run = pending_run
+            return
+
+        self._pending_run = None
+
+        if pending_run.command.batch:
+            output_message = build_batch_output_message(pending_run.output_messages, pending_run.stops, completed)
+        else:
+            output_message = self._snapshot_encoder.encode(output, self._stop_number, completed=completed)
+
+        self._shown_stop = self._stop_number
+        self._send_output(output_message, arrived)
+
+    # Остановка в режиме RUN_LIVE. Снимок строится, только если прошел промежуток и сервер отправил клиенту
+    # предыдущий: промежуточные состояния отбрасываются, а в очереди ответов не больше одного снимка.
+    # Возвращает False, если клиент прислал PAUSE: остановка обрабатывается как обычная
+    def _continue_live(self, live_run: _LiveRun, frame: FrameType, arrived: float) -> bool:
+        if self._live_signals.pause.is_set():
+            self._end_live()
+            self._live_signals.pause.clear()
+            # Ответ на PAUSE — снимок остановки, на которой программа остановилась
+            self._send_output(self._encode_current(frame), arrived)
+            return False
+
+        if arrived < live_run.next_push or not self._live_signals.ready.is_set():
+            return True
+
+        self._live_signals.ready.clear()
+        live_run.next_push = arrived + live_run.interval
+
+        output = build_output(frame, self._snapshot_options.watch)
+        if self._history.enabled:
+            self._history.record(self._stop_number, output)
+
+        message = self._snapshot_encoder.encode(output, self._stop_number, live=True)
+        self._shown_stop = self._stop_number
+        self._output_queue.send_message_blocking(DebuggerOutput(message, perf_counter() - arrived, live=True))
+        return True
+
+    # Программа в режиме RUN_LIVE может долго не доходить до точки останова. PAUSE ждет отдельный поток
+    # и прерывает программу: ответ на PAUSE приходит с ближайшей строки, а не со следующей точки останова
+    def _watch_pause(self, live_run: _LiveRun) -> None:
+        while self._live_run is live_run:
+            if not self._live_signals.pause.wait(self._PAUSE_POLL_INTERVAL):
+                continue
+
+            with self._live_lock:
+                if self._live_run is live_run:
+                    self._interrupt()
+            return
 
-    async def _execute_command(self, command: Command) -> None:
+    # Также вызывается при завершении программы: поток наблюдения за PAUSE больше не нужен
+    def _end_live(self) -> None:
+        with self._live_lock:
+            self._live_run = None
+
+    # Проверяются все фильтры: отслеживающие изменения должны увидеть каждую остановку
+    def _passes_filters(self, program_globals: dict[str, Any]) -> bool:
+        passed = False
+        for stop_filter in self._stop_filters:
+            passed = stop_filter.matches(program_globals) or passed
+
+        if passed or self._filtered_stops >= self._max_filtered_stops:
+            self._filtered_stops = 0
+            return True
+
+        self._filtered_stops += 1
+        return False
+
+    def _send_output(self, message: str, started: float) -> None:
+        self._output_queue.send_message_blocking(DebuggerOutput(message, perf_counter() - started))
+
+    def _encode_current(self, frame: FrameType) -> str:
+        if self._history_stop is not None:
+            output = self._history.get(self._history_stop)
+            if output is not None:
+                return self._snapshot_encoder.encode(output, self._history_stop, history=True)
+
+        output = build_output(frame, self._snapshot_options.watch)
+        self._shown_stop = self._stop_number
+        return self._snapshot_encoder.encode(output, self._stop_number)
+
+    # Выход за пределы сохраненной истории ограничивается самой старой и текущей остановками,
+    # а остановка, не попавшая в историю, заменяется ближайшей записанной перед ней
+    def _view_history(self, stop: int) -> None:
+        stop = max(self._history.first_stop, min(stop, self._stop_number))
+        nearest_stop = self._history.nearest_stop(stop)
+        if nearest_stop is not None:
+            stop = nearest_stop
+        self._history_stop = stop if stop != self._stop_number and self._history.enabled else None
+
+    def _execute_command(self, command: Command) -> None:
         if command.name == CommandName.SET_VARIABLE:
             if self._current_frame is not None:
-                variable_name = command.args[0]
-                variable = self._current_frame.f_globals[variable_name]
-
-                current_variable_value = variable.value[0]
-                current_variable_value_type = type(current_variable_value)
-
-                new_variable_value = command.args[1]
-                if current_variable_value_type == bool:
-                    new_variable_value_bool = new_variable_value.lower() in ("true", "yes", "on", "1")
-                    variable.__set__(new_variable_value_bool)
-                elif current_variable_value_type == int:
-                    new_variable_value_int = int(new_variable_value)
-                    variable.__set__(new_variable_value_int)
-                elif current_variable_value_type == float:
-                    new_variable_value_float = float(new_variable_value)
-                    variable.__set__(new_variable_value_float)
-                else:
-                    new_variable_value_str = new_variable_value
-                    variable.__set__(new_variable_value_str)
+                set_variable_value(self._current_frame.f_globals, command.args[0], command.args[1])
 
-            self.set_continue()
+            self._resume_continuing()
         elif command.name == CommandName.STEP:
-            self.set_step()
-        elif command.name == CommandName.CONTINUE:
-            self.set_continue()
+            self._resume_stepping()
+        elif command.name == CommandName.RUN_LIVE:
+            live_interval = command.live_interval
+            if live_interval is None:
+                live_interval = self._snapshot_options.live_interval
+            live_run = _LiveRun(live_interval)
+            self._live_run = live_run
+            self._resume_continuing()
+            Thread(target=self._watch_pause, args=(live_run,), name="post-live-pause", daemon=True).start()
+        elif command.name in (CommandName.CONTINUE, CommandName.RUN_UNTIL):
+            self._resume_continuing()
         elif command.name == CommandName.QUIT:
-            self.set_quit()
-
-    # Метод для нахождения номеров строк, на которых будут поставлены точки останова
-    def _find_line_numbers(self, path: Path) -> list[int]:
-        if not path.exists():
-            return []
-
-        src = path.read_text(encoding="utf-8")
-        tree = parse(src)
-
-        line_numbers = []
-
-        for node in tree.body:
-            if isinstance(node, FunctionDef) and node.name == "setVariable":
-                # Добавляем в список номеров строк номер строки начала функции setVariable
-                if node.body:
-                    # Ставим точку останова в теле функции setVariable
-
-                    # Если поставить точку останова на строке, на которой определена сигнатура функции setVariable,
-                    # то отладчик остановится только один раз (при создании функции setVariable)
-                    first_body_line = node.body[0].lineno
-                    line_numbers.append(first_body_line)
-                else:
-                    # На случай пустой функции
-                    line_numbers.append(node.lineno)
-            elif isinstance(node, FunctionDef) and node.name == "set_state":
-                # Добавляем в список номеров строк номер строки начала функции set_state
-                if node.body:
-                    # Ставим точку останова в теле функции set_state
-
-                    # Если поставить точку останова на строке, на которой определена сигнатура функции set_state,
-                    # то отладчик остановится только один раз (при создании функции set_state)
-
-                    # "+ 1" нужен для того, чтобы избежать создания точки останова на объявлении глобальной переменной
-                    # (например: global Vars)
-                    first_body_line = node.body[0].lineno + 1
-                    line_numbers.append(first_body_line)
-                else:
-                    # На случай пустой функции
-                    line_numbers.append(node.lineno)
-
-        def visit_class(class_node: ClassDef, inside_program: bool) -> None:
-            inherits_program = any(
-                (isinstance(base, Name) and base.id == "Program") or
-                (isinstance(base, Attribute) and getattr(base, "attr", None) == "Program")
-                for base in class_node.bases
-            )
-
-            current_inside = inside_program or (class_node.name == "Program") or inherits_program
-
-            for child in class_node.body:
-                if isinstance(child, FunctionDef) and child.name == "run" and current_inside:
-                    # Добавляем в список номеров строк номер строки начала метода run
-                    if child.body:
-                        # Ставим точку останова в теле метода run
-
-                        # Если поставить точку останова на строке, на которой определена сигнатура метода run,
-                        # то отладчик остановится только один раз (при создании метода run)
-
-                        # "+ 9" нужен для того, чтобы избежать создания точки останова на объявлении глобальной переменной
-                        # (например: global inVars)
-                        first_body_line = child.body[0].lineno + 9
-                        line_numbers.append(first_body_line)
-                    else:
-                        # На случай пустого метода
-                        line_numbers.append(child.lineno)
-
-            for child in class_node.body:
-                if isinstance(child, ClassDef):
-                    visit_class(child, current_inside)
-
-        for node in tree.body:
-            if isinstance(node, ClassDef):
-                visit_class(node, False)
-
-        line_numbers = sorted(set(line_numbers))
-
-        return line_numbers
+            self._request_quit()
+        elif command.name == CommandName.RESYNC:
+            self._snapshot_encoder.reset()
+        elif command.name == CommandName.STEP_BACK:
+            # Назад от снимка, который клиент видит, а не от остановки, на которой ждет отладчик
+            current_stop = self._history_stop if self._history_stop is not None else self._shown_stop
+            self._view_history(current_stop - command.count)
+        elif command.name == CommandName.GOTO:
+            self._view_history(int(command.args[0]))
+        elif command.name == CommandName.SET_FILTER:
+            stop_filter = compile_stop_filter(command.args)
+            if self._current_frame is not None:
+                stop_filter.reset(self._current_frame.f_globals)
+            self._stop_filters.append(stop_filter)
+        elif command.name == CommandName.CLEAR_FILTER:
+            self._stop_filters.clear()
+            self._filtered_stops = 0
+
+
+class PostDebugger(Bdb, BasePostDebugger):
+    def __init__(
+            self,
+            command_queue: MessageQueue[Command],
+            output_queue: MessageQueue[DebuggerOutput],
+            snapshot_options: SnapshotOptions,
+            history: SnapshotHistory,
+            max_batch_stops: int,
+            max_filtered_stops: int,
+            live_signals: LiveSignals
+    ) -> None:
+        Bdb.__init__(self)
+        BasePostDebugger.__init__(
+            self, command_queue, output_queue, snapshot_options, history, max_batch_stops, max_filtered_stops,
+            live_signals
+        )
+
+    def user_line(self, frame: FrameType) -> None:
+        self._stop(frame)
+
+    def run_program(self, code: CodeType, program_globals: dict[str, Any]) -> None:
+        self._thread_id = get_ident()
+        try:
+            self.run(code, program_globals)
+        finally:
+            self._end_live()
+
+    def _add_breakpoint(self, filename: str, line_number: int) -> None:
+        error = self.set_break(filename, line_number)
+        if error is not None:
+            raise ValueError(error)
+
+    def _resume_stepping(self) -> None:
+        self.set_step()
+
+    def _resume_continuing(self) -> None:
+        if self._live_run is not None:
+            # Без точек останова set_continue снимает трассировку, и PAUSE в RUN_LIVE некому было бы обработать
+            # То же, что Bdb._set_stopinfo(self.botframe, None, -1)
+            self.stopframe = self.botframe
+            self.returnframe = None
+            self.stoplineno = -1
+        else:
+            self.set_continue()
+
+    def _request_quit(self) -> None:
+        self.set_quit()
+
+    def _interrupt(self) -> None:
+        # Кадры, в которые программа вошла в режиме продолжения, не трассируются (trace_dispatch вернул None).
+        # Как Bdb.set_trace, включаем трассировку всему стеку, чтобы остановиться и внутри цикла без вызовов
+        frame = sys._current_frames().get(self._thread_id) if self._thread_id is not None else None
+        while frame is not None:
+            frame.f_trace = self.trace_dispatch
+            frame = frame.f_back
+        self.set_step()
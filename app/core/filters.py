@@ -0,0 +1,191 @@
+from abc import ABC, abstractmethod
+from ast import (
+    AST, Add, And, Attribute, BinOp, BoolOp, Call, Compare, Constant, Div, Eq, Expression, FloorDiv, Gt, GtE, In, Is,
+    IsNot, Load, Lt, LtE, Mod, Mult, Name, NodeTransformer, Not, NotEq, NotIn, Or, Sub, Subscript, UAdd, UnaryOp,
+    USub, fix_missing_locations, parse, walk
+)
+from types import CodeType
+from typing import Any, Optional
+
+from app.core.util.output import encode_value
+
+# Виды фильтров команды SET_FILTER:
+#   SET_FILTER state <процесс> [<состояние>] — процесс сменил состояние (на указанное)
+#   SET_FILTER change <переменная> — значение входной или выходной переменной изменилось
+#   SET_FILTER expr <выражение> — выражение над inVars, outVars и pStates истинно
+FILTER_KINDS = ("state", "change", "expr")
+
+_MISSING = object()
+
+
+# Условие остановки проверяется в потоке отладчика на каждой точке останова, поэтому все разбирается
+# и компилируется при создании фильтра, а проверка только читает глобальные переменные программы
+class StopFilter(ABC):
+    # Запоминает текущие значения, с которыми сравниваются следующие остановки
+    def reset(self, program_globals: dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def matches(self, program_globals: dict[str, Any]) -> bool: ...
+
+
+class ProcessStateFilter(StopFilter):
+    def __init__(self, process_name: str, state_name: Optional[str], on_change: bool) -> None:
+        self._key = f"{process_name}_state"
+        self._state_name = state_name
+        # False — процесс находится в состоянии (RUN_UNTIL), True — процесс только что в него перешел
+        self._on_change = on_change
+        self._previous: Any = _MISSING
+
+    def reset(self, program_globals: dict[str, Any]) -> None:
+        self._previous = self._state(program_globals)
+
+    def matches(self, program_globals: dict[str, Any]) -> bool:
+        state = self._state(program_globals)
+        if self._on_change:
+            changed, self._previous = state != self._previous, state
+            if not changed:
+                return False
+
+        return self._state_name is None or _state_name(state) == self._state_name
+
+    def _state(self, program_globals: dict[str, Any]) -> Any:
+        return encode_value(program_globals.get("pStates", {}).get(self._key))
+
+
+class VariableChangeFilter(StopFilter):
+    def __init__(self, variable_name: str) -> None:
+        self._variable_name = variable_name
+        self._previous: Any = _MISSING
+
+    def reset(self, program_globals: dict[str, Any]) -> None:
+        self._previous = self._value(program_globals)
+
+    def matches(self, program_globals: dict[str, Any]) -> bool:
+        value = self._value(program_globals)
+        changed, self._previous = bool(value != self._previous), value
+        return changed
+
+    def _value(self, program_globals: dict[str, Any]) -> Any:
+        for container_name in ("outVars", "inVars"):
+            variables = program_globals.get(container_name, {})
+            if self._variable_name in variables:
+                return encode_value(variables[self._variable_name])
+        return _MISSING
+
+
+# Выражение может читать только inVars, outVars и pStates: константы, обращение по ключу, атрибуты
+# value и name, сравнения, логические и арифметические операции. Остальное отвергается при разборе,
+# а вычисление идет без встроенных функций. Умножение и остаток принимают только числа: строка или список,
+# умноженные на большое число ("x" * 4000000000), как и форматирование через %, займут всю память
+class ExpressionFilter(StopFilter):
+    def __init__(self, source: str) -> None:
+        self._source = source
+        tree = parse(source, mode="eval")
+        for node in walk(tree):
+            _check_expression_node(node)
+        tree = fix_missing_locations(_NumericOperations().visit(tree))
+        self._code: CodeType = compile(tree, "<stop filter>", "eval")
+        self._failed = False
+
+    def matches(self, program_globals: dict[str, Any]) -> bool:
+        namespace = {name: program_globals.get(name, {}) for name in _EXPRESSION_NAMES}
+        try:
+            matched = bool(eval(self._code, _EXPRESSION_GLOBALS, namespace))
+        except Exception as e:
+            # Ошибочное выражение останавливает программу, чтобы клиент не ждал остановки, которой не будет
+            if not self._failed:
+                print(f"Failed to evaluate stop filter {self._source!r}: {e}")
+                self._failed = True
+            return True
+
+        return matched
+
+
+_EXPRESSION_NAMES = ("inVars", "outVars", "pStates")
+_EXPRESSION_ATTRIBUTES = frozenset(("value", "name"))
+_EXPRESSION_NODES = (
+    Expression, BoolOp, BinOp, UnaryOp, Compare, Constant, Name, Subscript, Attribute, Load,
+    And, Or, Not, UAdd, USub, Add, Sub, Mult, Div, FloorDiv, Mod,
+    Eq, NotEq, Lt, LtE, Gt, GtE, In, NotIn, Is, IsNot
+)
+
+
+def _check_expression_node(node: AST) -> None:
+    if not isinstance(node, _EXPRESSION_NODES):
+        raise ValueError(f"Stop filter expressions do not support {type(node).__name__}")
+    if isinstance(node, BinOp) and isinstance(node.op, _NUMERIC_OPERATIONS):
+        for operand in (node.left, node.right):
+            if isinstance(operand, Constant) and isinstance(operand.value, str):
+                raise ValueError("Stop filter expressions can only multiply and take remainders of numbers")
+    if isinstance(node, Name) and node.id not in _EXPRESSION_NAMES:
+        raise ValueError(f"Stop filter expressions can only use {', '.join(_EXPRESSION_NAMES)}, not {node.id}")
+    if isinstance(node, Attribute) and node.attr not in _EXPRESSION_ATTRIBUTES:
+        raise ValueError(f"Stop filter expressions can only read .value and .name, not .{node.attr}")
+    if isinstance(node, Constant) and not isinstance(node.value, (bool, int, float, str, type(None))):
+        raise ValueError(f"Unsupported constant in stop filter expression: {node.value!r}")
+
+
+_NUMERIC_OPERATIONS = (Mult, Mod)
+
+
+def _numeric_operand(value: Any) -> Any:
+    # Значения MuteTypes проверяются по содержимому
+    if not isinstance(encode_value(value), (int, float)):
+        raise TypeError(f"Stop filter expressions can only multiply and take remainders of numbers, not {value!r}")
+    return value
+
+
+def _multiply(left: Any, right: Any) -> Any:
+    return _numeric_operand(left) * _numeric_operand(right)
+
+
+def _remainder(left: Any, right: Any) -> Any:
+    return _numeric_operand(left) % _numeric_operand(right)
+
+
+_EXPRESSION_GLOBALS: dict[str, Any] = {"__builtins__": {}, "_multiply": _multiply, "_remainder": _remainder}
+
+
+# Заменяет a * b и a % b вызовами проверяющих функций; имена функций недоступны самому выражению,
+# потому что дерево проверяется до замены
+class _NumericOperations(NodeTransformer):
+    def visit_BinOp(self, node: BinOp) -> AST:
+        self.generic_visit(node)
+        if isinstance(node.op, Mult):
+            return Call(Name("_multiply", Load()), [node.left, node.right], [])
+        if isinstance(node.op, Mod):
+            return Call(Name("_remainder", Load()), [node.left, node.right], [])
+        return node
+
+
+def compile_stop_filter(args: list[str]) -> StopFilter:
+    if not args or args[0] not in FILTER_KINDS:
+        raise ValueError(f"Stop filter kind must be one of: {', '.join(FILTER_KINDS)}")
+
+    kind, args = args[0], args[1:]
+    if kind == "state":
+        if len(args) not in (1, 2):
+            raise ValueError("state filter expects a process name and an optional state name")
+        return ProcessStateFilter(args[0], args[1] if len(args) == 2 else None, on_change=True)
+
+    if kind == "change":
+        if len(args) != 1:
+            raise ValueError("change filter expects a variable name")
+        return VariableChangeFilter(args[0])
+
+    if not args:
+        raise ValueError("expr filter expects an expression")
+    try:
+        return ExpressionFilter(" ".join(args))
+    except SyntaxError as e:
+        raise ValueError(f"Invalid stop filter expression: {e}")
+
+
+def _state_name(state: Any) -> str:
+    name = getattr(state, "name", None)
+    if isinstance(name, str):
+        return name
+
+    # Например, "States.Idle"
+    return str(state).rsplit(".", 1)[-1]
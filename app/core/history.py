@@ -0,0 +1,108 @@
+from collections import deque
+from sys import getsizeof
+from typing import Any, Optional
+
+from app.core.util.output import apply_delta, diff_output
+
+
+# Кольцевой буфер снимков по номерам остановок. Хранится полный снимок самой старой остановки
+# и разности для остальных; при вытеснении старейшей остановки следующая становится полной.
+# Размер ограничен числом остановок и приблизительным объемом разностей в байтах.
+# Номера остановок могут идти с пропусками (в RUN_LIVE записываются только отправленные снимки):
+# запрос пропущенной остановки возвращает ближайшую записанную перед ней
+class SnapshotHistory:
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+
+        self._first_stop = 0
+        self._last_stop = 0
+        self._base: Optional[dict[str, Any]] = None
+        self._last: Optional[dict[str, Any]] = None
+        # Разность относительно предыдущей остановки или полный снимок, если разностью его не выразить
+        self._entries: deque[tuple[int, bool, dict[str, Any], int]] = deque()
+        self._size_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0
+
+    @property
+    def first_stop(self) -> int:
+        return self._first_stop
+
+    @property
+    def last_stop(self) -> int:
+        return self._last_stop
+
+    def record(self, stop: int, output: dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+
+        # Меньший номер означает новый запуск программы
+        if self._last is None or stop <= self._last_stop:
+            self._clear(stop, output)
+            return
+
+        delta = diff_output(self._last, output)
+        full = delta is None
+        data = output if delta is None else delta
+
+        size_bytes = _estimate_size(data)
+        self._entries.append((stop, full, data, size_bytes))
+        self._size_bytes += size_bytes
+        self._last = output
+        self._last_stop = stop
+
+        while self._entries and (len(self._entries) + 1 > self._max_entries or self._size_bytes > self._max_bytes):
+            self._evict()
+
+    # Ближайшая записанная остановка не позже указанной
+    def nearest_stop(self, stop: int) -> Optional[int]:
+        if self._base is None or stop < self._first_stop:
+            return None
+
+        nearest = self._first_stop
+        for entry_stop, _, _, _ in self._entries:
+            if entry_stop > stop:
+                break
+            nearest = entry_stop
+
+        return nearest
+
+    def get(self, stop: int) -> Optional[dict[str, Any]]:
+        if self._base is None or not self._first_stop <= stop <= self._last_stop:
+            return None
+
+        output = self._base
+        for entry_stop, full, data, _ in self._entries:
+            if entry_stop > stop:
+                break
+            output = data if full else apply_delta(output, data)
+
+        return output
+
+    def _clear(self, stop: int, output: dict[str, Any]) -> None:
+        self._first_stop = self._last_stop = stop
+        self._base = self._last = output
+        self._entries.clear()
+        self._size_bytes = 0
+
+    def _evict(self) -> None:
+        if self._base is None:
+            return
+
+        stop, full, data, size_bytes = self._entries.popleft()
+        self._base = data if full else apply_delta(self._base, data)
+        self._first_stop = stop
+        self._size_bytes -= size_bytes
+
+
+def _estimate_size(data: dict[str, Any]) -> int:
+    size_bytes = getsizeof(data)
+    for value in data.values():
+        size_bytes += getsizeof(value)
+        if isinstance(value, dict):
+            size_bytes += sum(getsizeof(k) + getsizeof(v) for k, v in value.items())
+
+    return size_bytes
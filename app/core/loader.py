@@ -0,0 +1,81 @@
+import builtins
+from collections import OrderedDict
+from hashlib import sha256
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+from threading import Lock
+from types import CodeType, ModuleType
+from typing import Any, Optional
+
+MUTE_TYPES_MODULE_NAME = "MuteTypes"
+
+
+# Новый объект кода (вместе со вложенными функциями и классами) с другим именем файла. Копия не делит
+# с исходным объектом ни имя файла точек останова, ни события sys.monitoring, которые задаются на объект кода
+def replace_code_filename(code: CodeType, filename: str) -> CodeType:
+    consts = tuple(
+        replace_code_filename(const, filename) if isinstance(const, CodeType) else const for const in code.co_consts
+    )
+    return code.replace(co_filename=filename, co_consts=consts)
+
+
+# Транслированные программы загружаются из памяти, без sys.path и sys.modules:
+# MuteTypes загружается один раз на процесс и подставляется через __import__ пространства имен программы
+class ProgramLoader:
+    def __init__(self, max_cached_code: int) -> None:
+        self._max_cached_code = max_cached_code
+
+        self._lock = Lock()
+        self._mute_types: Optional[ModuleType] = None
+        self._mute_types_path: Optional[Path] = None
+        self._code_cache: OrderedDict[str, CodeType] = OrderedDict()
+
+    def mute_types(self, mute_types_path: Path) -> ModuleType:
+        with self._lock:
+            if self._mute_types is None or self._mute_types_path != mute_types_path:
+                spec = spec_from_file_location(MUTE_TYPES_MODULE_NAME, mute_types_path)
+                if spec is None or spec.loader is None:
+                    raise ImportError(f"Unable to load {MUTE_TYPES_MODULE_NAME} from {mute_types_path}")
+
+                module = module_from_spec(spec)
+                spec.loader.exec_module(module)
+
+                self._mute_types, self._mute_types_path = module, mute_types_path
+
+            return self._mute_types
+
+    # Объекты кода кэшируются по хэшу исходного кода. Одинаковый код в разных каталогах трансляций
+    # не компилируется заново: у копии меняется только имя файла, которое используют точки останова
+    def compile(self, source: str, filename: str) -> CodeType:
+        key = sha256(source.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            code = self._code_cache.get(key)
+            if code is not None:
+                self._code_cache.move_to_end(key)
+
+        if code is not None:
+            return code if code.co_filename == filename else replace_code_filename(code, filename)
+
+        code = compile(source, filename, "exec")
+
+        with self._lock:
+            self._code_cache[key] = code
+            while len(self._code_cache) > self._max_cached_code:
+                self._code_cache.popitem(last=False)
+
+        return code
+
+    def namespace(self, name: str, mute_types_path: Path) -> dict[str, Any]:
+        mute_types = self.mute_types(mute_types_path)
+        original_import = builtins.__import__
+
+        def import_module(module_name: str, *args: Any, **kwargs: Any) -> Any:
+            if module_name == MUTE_TYPES_MODULE_NAME:
+                return mute_types
+            return original_import(module_name, *args, **kwargs)
+
+        program_builtins = dict(builtins.__dict__)
+        program_builtins["__import__"] = import_module
+
+        return {"__name__": name, "__builtins__": program_builtins}
@@ -0,0 +1,198 @@
+import sys
+from bdb import BdbQuit
+from threading import Lock, get_ident
+from types import CodeType
+from typing import Any, Optional
+
+from app.core.command import Command
+from app.core.communication import LiveSignals, MessageQueue
+from app.core.debugger import BasePostDebugger, DebuggerOutput
+from app.core.history import SnapshotHistory
+from app.core.loader import replace_code_filename
+from app.core.util.output import SnapshotOptions
+
+# sys.monitoring появился в Python 3.12
+monitoring_available = sys.version_info >= (3, 12)
+
+
+# Идентификатор инструмента sys.monitoring занимается один раз на процесс,
+# поэтому события всех сессий в процессе проходят через общий диспетчер
+class _MonitoringDispatcher:
+    _TOOL_ID = 0  # sys.monitoring.DEBUGGER_ID
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._debuggers: dict[int, "MonitoringPostDebugger"] = {}
+        self._stepping_threads: set[int] = set()
+        # Сколько сессий следят за объектом кода: события снимаются, только когда уходит последняя
+        self._watchers: dict[CodeType, int] = {}
+
+    def register(self, debugger: "MonitoringPostDebugger") -> None:
+        monitoring = sys.monitoring
+
+        with self._lock:
+            if not self._debuggers:
+                monitoring.use_tool_id(self._TOOL_ID, "postdb")
+                monitoring.register_callback(self._TOOL_ID, monitoring.events.LINE, self._on_line)
+
+            self._debuggers[get_ident()] = debugger
+
+    def unregister(self) -> None:
+        monitoring = sys.monitoring
+
+        with self._lock:
+            thread_id = get_ident()
+            self._debuggers.pop(thread_id, None)
+            self._stepping_threads.discard(thread_id)
+            self._update_global_events()
+
+            if not self._debuggers:
+                monitoring.register_callback(self._TOOL_ID, monitoring.events.LINE, None)
+                monitoring.free_tool_id(self._TOOL_ID)
+
+    def watch(self, code: CodeType) -> None:
+        with self._lock:
+            self._watchers[code] = self._watchers.get(code, 0) + 1
+            sys.monitoring.set_local_events(self._TOOL_ID, code, sys.monitoring.events.LINE)
+
+    def unwatch(self, code: CodeType) -> None:
+        with self._lock:
+            watchers = self._watchers.get(code, 0) - 1
+            if watchers > 0:
+                self._watchers[code] = watchers
+                return
+
+            self._watchers.pop(code, None)
+            sys.monitoring.set_local_events(self._TOOL_ID, code, 0)
+
+    # thread_id — поток программы; по умолчанию вызывающий
+    def set_stepping(self, stepping: bool, thread_id: Optional[int] = None) -> None:
+        with self._lock:
+            if thread_id is None:
+                thread_id = get_ident()
+            if stepping:
+                self._stepping_threads.add(thread_id)
+                # Строки, отключенные в режиме продолжения, снова должны порождать события
+                sys.monitoring.restart_events()
+            else:
+                self._stepping_threads.discard(thread_id)
+
+            self._update_global_events()
+
+    def _update_global_events(self) -> None:
+        events = sys.monitoring.events.LINE if self._stepping_threads else 0
+        sys.monitoring.set_events(self._TOOL_ID, events)
+
+    def _on_line(self, code: CodeType, line_number: int) -> Any:
+        debugger = self._debuggers.get(get_ident())
+        if debugger is None:
+            return sys.monitoring.DISABLE
+
+        return debugger.on_line(code, line_number)
+
+
+_dispatcher = _MonitoringDispatcher()
+
+
+# Движок на sys.monitoring (PEP 669): в режиме продолжения события LINE включены только
+# для объектов кода с точками останова, а остальные строки отключаются после первого события,
+# поэтому между остановками программа исполняется почти без накладных расходов
+class MonitoringPostDebugger(BasePostDebugger):
+    def __init__(
+            self,
+            command_queue: MessageQueue[Command],
+            output_queue: MessageQueue[DebuggerOutput],
+            snapshot_options: SnapshotOptions,
+            history: SnapshotHistory,
+            max_batch_stops: int,
+            max_filtered_stops: int,
+            live_signals: LiveSignals
+    ) -> None:
+        super().__init__(
+            command_queue, output_queue, snapshot_options, history, max_batch_stops, max_filtered_stops, live_signals
+        )
+
+        self._breakpoints: dict[str, set[int]] = {}
+        self._watched_code: list[CodeType] = []
+
+        self._filename: Optional[str] = None
+        self._stepping = True
+        self._quitting = False
+
+    def run_program(self, code: CodeType, program_globals: dict[str, Any]) -> None:
+        if not monitoring_available:
+            raise RuntimeError("sys.monitoring requires Python 3.12 or newer")
+
+        # Объекты кода программ кэшируются и общие для сессий одной трансляции, а события sys.monitoring
+        # и DISABLE действуют на объект кода во всем процессе: у каждой сессии своя копия
+        code = replace_code_filename(code, code.co_filename)
+        self._filename = code.co_filename
+
+        self._thread_id = get_ident()
+        _dispatcher.register(self)
+        try:
+            self._watch_breakpoints(code)
+            # Как и Bdb, останавливаемся на первой строке программы
+            _dispatcher.set_stepping(True)
+
+            exec(code, program_globals)
+        except BdbQuit:
+            pass
+        finally:
+            self._end_live()
+            for watched_code in self._watched_code:
+                _dispatcher.unwatch(watched_code)
+            self._watched_code.clear()
+
+            _dispatcher.unregister()
+
+    def on_line(self, code: CodeType, line_number: int) -> Any:
+        if code.co_filename != self._filename:
+            # В коде вне программы (например, MuteTypes) отладчик не останавливается
+            return sys.monitoring.DISABLE
+
+        if self._quitting:
+            raise BdbQuit
+
+        if not self._stepping and line_number not in self._breakpoints.get(code.co_filename, ()):
+            return sys.monitoring.DISABLE
+
+        self._stop(sys._getframe(2))
+
+        if self._quitting:
+            raise BdbQuit
+
+        return None
+
+    def _add_breakpoint(self, filename: str, line_number: int) -> None:
+        self._breakpoints.setdefault(filename, set()).add(line_number)
+
+    def _watch_breakpoints(self, code: CodeType) -> None:
+        line_numbers = self._breakpoints.get(code.co_filename, set())
+
+        if any(line in line_numbers for _, _, line in code.co_lines()):
+            _dispatcher.watch(code)
+            self._watched_code.append(code)
+
+        for const in code.co_consts:
+            if isinstance(const, CodeType):
+                self._watch_breakpoints(const)
+
+    def _resume_stepping(self) -> None:
+        self._stepping = True
+        _dispatcher.set_stepping(True)
+
+    def _resume_continuing(self) -> None:
+        self._stepping = False
+        _dispatcher.set_stepping(False)
+
+    def _request_quit(self) -> None:
+        self._quitting = True
+        # Включаем события везде, чтобы выйти на ближайшей строке программы
+        self._stepping = True
+        _dispatcher.set_stepping(True)
+
+    def _interrupt(self) -> None:
+        if self._thread_id is not None:
+            self._stepping = True
+            _dispatcher.set_stepping(True, self._thread_id)
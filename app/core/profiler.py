@@ -0,0 +1,168 @@
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from json import dumps, loads
+from threading import Event, Thread, get_ident
+from time import perf_counter
+from types import FrameType
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class HotSpot:
+    function: str
+    self_samples: int
+    total_samples: int
+    self_percent: float
+    total_percent: float
+
+
+@dataclass(frozen=True)
+class ClassTime:
+    name: str
+    total_samples: int
+    total_percent: float
+
+
+@dataclass(frozen=True)
+class ProfileReport:
+    mode: str
+    samples: int
+    interval: float
+    wall_seconds: float
+    hot_spots: list[HotSpot]
+    classes: list[ClassTime]
+
+
+# Результат профилирования: число выборок на каждый стек программы. Стек — имена функций
+# (co_qualname, например "Pump.run") от внешней к внутренней через ";", как в collapsed-формате flamegraph
+@dataclass
+class ProgramProfile:
+    mode: str
+    interval: float
+    samples: int = 0
+    # Время исполнения программы без пауз на остановках
+    wall_seconds: float = 0.0
+    stacks: dict[str, int] = field(default_factory=dict)
+
+    def dump(self) -> str:
+        return dumps({
+            "mode": self.mode,
+            "interval": self.interval,
+            "samples": self.samples,
+            "wall_seconds": self.wall_seconds,
+            "stacks": self.stacks
+        })
+
+    @classmethod
+    def load(cls, data: str) -> "ProgramProfile":
+        raw = loads(data)
+        return cls(raw["mode"], raw["interval"], raw["samples"], raw["wall_seconds"], raw["stacks"])
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def report(self, top: int) -> ProfileReport:
+        self_samples: Counter[str] = Counter()
+        total_samples: Counter[str] = Counter()
+        class_samples: Counter[str] = Counter()
+
+        for stack, count in self.stacks.items():
+            functions = stack.split(";")
+            self_samples[functions[-1]] += count
+
+            # Рекурсивная функция учитывается в стеке один раз
+            for function in set(functions):
+                total_samples[function] += count
+
+            for class_name in {_class_name(function) for function in functions} - {None}:
+                class_samples[str(class_name)] += count
+
+        samples = max(self.samples, 1)
+        hot_spots = [
+            HotSpot(function, self_samples[function], total, 100 * self_samples[function] / samples, 100 * total / samples)
+            for function, total in sorted(total_samples.items(), key=lambda item: (-self_samples[item[0]], -item[1]))[:top]
+        ]
+        classes = [ClassTime(name, total, 100 * total / samples) for name, total in class_samples.most_common(top)]
+
+        return ProfileReport(self.mode, self.samples, self.interval, self.wall_seconds, hot_spots, classes)
+
+
+def _class_name(function: str) -> Optional[str]:
+    # "Pump.run" -> "Pump"; функции модуля класса не имеют
+    if "." not in function or function.startswith("<"):
+        return None
+    return function.split(".", 1)[0]
+
+
+# Статистический профилировщик: отдельный поток раз в interval секунд читает стек потока программы
+# через sys._current_frames. Трассировка не устанавливается, поэтому без профилирования накладных расходов нет,
+# а с ним они не зависят от числа вызовов в программе. В стек попадают только кадры файла программы:
+# время в MuteTypes и в отладчике относится к вызвавшей их функции программы
+class SamplingProfiler:
+    def __init__(self, mode: str, filename: str, interval: float) -> None:
+        self._filename = filename
+        self._profile = ProgramProfile(mode, interval)
+
+        self._thread_id = 0
+        self._stopped = Event()
+        self._sampler: Optional[Thread] = None
+        self._paused = False
+        self._started = 0.0
+        self._paused_at = 0.0
+        self._paused_seconds = 0.0
+
+    @property
+    def profile(self) -> ProgramProfile:
+        return self._profile
+
+    # Профилируется поток, вызвавший start
+    def start(self) -> None:
+        self._thread_id = get_ident()
+        self._started = perf_counter()
+        self._sampler = Thread(target=self._sample, name="post-profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> ProgramProfile:
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+        self._profile.wall_seconds = perf_counter() - self._started - self._paused_seconds
+        return self._profile
+
+    # Ожидание команды клиента на остановке не должно считаться временем программы
+    def pause(self) -> None:
+        self._paused = True
+        self._paused_at = perf_counter()
+
+    def resume(self) -> None:
+        self._paused_seconds += perf_counter() - self._paused_at
+        self._paused = False
+
+    def _sample(self) -> None:
+        stacks: Counter[str] = Counter()
+        interval = self._profile.interval
+
+        while not self._stopped.wait(interval):
+            if self._paused:
+                continue
+
+            frame = sys._current_frames().get(self._thread_id)
+            stack = self._stack(frame)
+            if stack:
+                stacks[stack] += 1
+                self._profile.samples += 1
+
+        self._profile.stacks = dict(stacks)
+
+    def _stack(self, frame: Optional[FrameType]) -> str:
+        functions = []
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename == self._filename:
+                functions.append(code.co_qualname)
+            frame = frame.f_back
+
+        return ";".join(reversed(functions))
@@ -1,35 +1,162 @@
-from asyncio import to_thread
+from dataclasses import dataclass
+from enum import Enum
 from json import dumps
-from typing import Any
+from types import FrameType
+from typing import Any, Optional
 
+_SECTIONS = ("process_states", "input_variables", "output_variables")
 
-async def build_output_message(local_output: dict[str, Any], global_output: dict[str, Any]) -> str:
+_PLAIN_TYPES = frozenset((bool, int, float, str, type(None)))
+
+_MUTE_TYPE_NAMES = frozenset(("MuteNum", "MuteBool", "MuteStr", "MuteBytes"))
+
+
+@dataclass(frozen=True)
+class SnapshotOptions:
+    # Отправлять после первого снимка только изменившиеся ключи
+    deltas: bool = True
+    # Имена входных и выходных переменных, попадающих в снимок; None — все переменные
+    watch: Optional[frozenset[str]] = None
+    # Минимальный промежуток между снимками режима RUN_LIVE, секунды
+    live_interval: float = 0.05
+
+
+# Значения MuteTypes хранят значение в value[0]. MuteTypes загружается из каталога трансляции,
+# поэтому классы сравниваются по имени; типы проверяются без str() и исключений на каждое значение
+def encode_value(value: Any) -> Any:
+    value_type = type(value)
+    if value_type in _PLAIN_TYPES:
+        return value
+
+    if isinstance(value, Enum):
+        # Совпадает с str() для состояний процессов, например "States.Idle"
+        return f"{value_type.__name__}.{value.name}"
+
+    if value_type.__name__ in _MUTE_TYPE_NAMES:
+        return encode_value(value.value[0])
+
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+
+    return str(value)
+
+
+# Из кадра читаются только self и контейнеры pStates, inVars и outVars: стоимость снимка
+# не зависит от размера пространства имен программы
+def build_output(frame: FrameType, watch: Optional[frozenset[str]] = None) -> dict[str, Any]:
     process_name = ""
-    if "self" in local_output:
-        self_object = local_output["self"]
-        cls = self_object.__class__
-        class_name = cls.__name__
-        process_name = class_name
+    self_object = frame.f_locals.get("self")
+    if self_object is not None:
+        process_name = self_object.__class__.__name__
+
+    return {"process_name": process_name, **build_program_output(frame.f_globals, watch)}
+
 
+def build_program_output(global_output: dict[str, Any], watch: Optional[frozenset[str]] = None) -> dict[str, Any]:
     process_states = {}
     if "pStates" in global_output:
-        process_states = {k.removesuffix("_state"): v for k, v in global_output["pStates"].items()}
+        process_states = {k.removesuffix("_state"): encode_value(v) for k, v in global_output["pStates"].items()}
 
     input_variables = {}
     if "inVars" in global_output:
-        input_variables = global_output["inVars"]
+        input_variables = _encode_variables(global_output["inVars"], watch)
 
     output_variables = {}
     if "outVars" in global_output:
-        output_variables = global_output["outVars"]
-
-    return await to_thread(
-        dumps,
-        {
-            "process_name": process_name,
-            "process_states": process_states,
-            "input_variables": input_variables,
-            "output_variables": output_variables,
-        },
-        default=str
-    )
+        output_variables = _encode_variables(global_output["outVars"], watch)
+
+    return {
+        "process_states": process_states,
+        "input_variables": input_variables,
+        "output_variables": output_variables,
+    }
+
+
+def _encode_variables(variables: dict[str, Any], watch: Optional[frozenset[str]]) -> dict[str, Any]:
+    if watch is None:
+        return {k: encode_value(v) for k, v in variables.items()}
+
+    return {k: encode_value(variables[k]) for k in watch if k in variables}
+
+
+# Разность двух снимков: process_name и изменившиеся ключи каждого раздела.
+# None, если разностью снимок не выразить (из раздела пропал ключ)
+def diff_output(previous: dict[str, Any], current: dict[str, Any]) -> Optional[dict[str, Any]]:
+    delta: dict[str, Any] = {"process_name": current["process_name"]}
+    for section in _SECTIONS:
+        previous_values, current_values = previous[section], current[section]
+        if previous_values.keys() - current_values.keys():
+            return None
+
+        delta[section] = {
+            k: v for k, v in current_values.items()
+            if k not in previous_values or type(previous_values[k]) is not type(v) or previous_values[k] != v
+        }
+
+    return delta
+
+
+def apply_delta(output: dict[str, Any], delta: dict[str, Any]) -> dict[str, Any]:
+    result: dict[str, Any] = {"process_name": delta["process_name"]}
+    for section in _SECTIONS:
+        result[section] = {**output[section], **delta[section]} if delta[section] else output[section]
+
+    return result
+
+
+# Кодирует снимки одной сессии. Каждое сообщение получает номер seq; разностное сообщение
+# содержит только изменившиеся с предыдущего сообщения (base_seq) ключи. По пропуску номера
+# клиент обнаруживает потерю сообщения и запрашивает полный снимок командой RESYNC
+class SnapshotEncoder:
+    def __init__(self, options: SnapshotOptions) -> None:
+        self._options = options
+
+        self._seq = 0
+        self._previous: Optional[dict[str, Any]] = None
+
+    def reset(self) -> None:
+        self._previous = None
+
+    # stop — номер остановки, к которой относится снимок; history — снимок взят из истории;
+    # live — снимок отправлен в режиме RUN_LIVE без команды клиента
+    # completed — для ответа на команду запуска: False, если она прервана на MAX_BATCH_STOPS остановке
+    def encode(
+            self,
+            output: dict[str, Any],
+            stop: int,
+            history: bool = False,
+            live: bool = False,
+            completed: Optional[bool] = None
+    ) -> str:
+        self._seq += 1
+
+        delta = None
+        if self._options.deltas and self._previous is not None:
+            delta = diff_output(self._previous, output)
+
+        message: dict[str, Any]
+        if delta is None:
+            message = {"seq": self._seq, "full": True, "stop": stop}
+            message.update(output)
+        else:
+            message = {"seq": self._seq, "base_seq": self._seq - 1, "stop": stop}
+            message.update(delta)
+
+        if history:
+            message["history"] = True
+        if live:
+            message["live"] = True
+        if completed is not None:
+            message["completed"] = completed
+
+        self._previous = output
+        return dumps(message)
+
+
+# Снимки сериализуются в момент остановки: словари программы изменяются при дальнейшем исполнении
+def build_error_message(error: str) -> str:
+    return dumps({"error": error})
+
+
+def build_batch_output_message(output_messages: list[str], stops: int, completed: bool) -> str:
+    return f'{{"batch": [{", ".join(output_messages)}], "stops": {stops}, "completed": {dumps(completed)}}}'
@@ -0,0 +1,58 @@
+from typing import Any
+
+_TRUE_STRINGS = ("true", "yes", "on", "1")
+_FALSE_STRINGS = ("false", "no", "off", "0")
+
+
+# Команда SET_VARIABLE: переменная ищется среди входных и выходных переменных программы, значение из текстовой
+# команды приводится к ее типу. Неизвестное имя и неподходящее значение отвергаются до изменения переменной
+def set_variable_value(program_globals: dict[str, Any], variable_name: str, raw_value: str) -> None:
+    variable = None
+    for variables_name in ("inVars", "outVars"):
+        variables = program_globals.get(variables_name)
+        if variables is not None and variable_name in variables:
+            variable = variables[variable_name]
+            break
+
+    if variable is None:
+        raise ValueError(f"Unknown variable: {variable_name}")
+
+    try:
+        value = coerce_variable_value(variable, raw_value)
+    except ValueError as e:
+        raise ValueError(f"Invalid value for variable {variable_name}: {e}")
+
+    variable.__set__(value)
+
+
+def parse_variable_value(variable: Any, raw_value: str) -> Any:
+    current_variable_value_type = type(variable.value[0])
+
+    if current_variable_value_type == bool:
+        return raw_value.lower() in _TRUE_STRINGS
+    elif current_variable_value_type == int:
+        return int(raw_value)
+    elif current_variable_value_type == float:
+        return float(raw_value)
+    else:
+        return raw_value
+
+
+# Значение из JSON (прогон, сценарий) приводится к типу переменной; значение другого типа отвергается
+def coerce_variable_value(variable: Any, value: Any) -> Any:
+    current_variable_value_type = type(variable.value[0])
+
+    if isinstance(value, str):
+        if current_variable_value_type == bool and value.lower() not in _TRUE_STRINGS + _FALSE_STRINGS:
+            raise ValueError(f"Expected a boolean, got {value!r}")
+        return parse_variable_value(variable, value)
+
+    # bool — подкласс int, поэтому проверяется отдельно
+    if current_variable_value_type == bool and isinstance(value, bool):
+        return value
+    if current_variable_value_type == int and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if current_variable_value_type == float and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+
+    raise ValueError(f"Expected {current_variable_value_type.__name__}, got {type(value).__name__}: {value!r}")
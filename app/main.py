@@ -1,13 +1,41 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
+from app.api.metrics import router as metrics_router
 from app.api.v1.debugging import router
+from app.service.directory import workspace_directory
+from app.service.jobs import translation_jobs
+from app.service.registry import session_registry
+from app.service.request_processing import debugging_request_processor
+from app.service.workspace import workspace_manager
 from app.settings import settings
 
 api_prefix = "/api/v1"
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    await workspace_directory.start()
+    await workspace_manager.start()
+    await debugging_request_processor.start()
+    await translation_jobs.start()
+    await session_registry.start()
+    try:
+        yield
+    finally:
+        await session_registry.stop()
+        await translation_jobs.stop()
+        await debugging_request_processor.stop()
+        await workspace_manager.stop()
+        await workspace_directory.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(router, prefix=api_prefix)
+app.include_router(metrics_router)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
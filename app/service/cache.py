@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from hashlib import sha256
+from time import monotonic
+from typing import TypeVar, Generic, Optional
+
+V = TypeVar("V")
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+
+
+@dataclass
+class _CacheEntry(Generic[V]):
+    value: V
+    size_bytes: int
+    created_at: float
+
+
+def translation_key(post_code: str, translator_version: str) -> str:
+    digest = sha256()
+    digest.update(translator_version.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(post_code.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TranslationCache(Generic[V]):
+    def __init__(self, max_entries: int, max_size_bytes: int, ttl_seconds: float) -> None:
+        self._max_entries = max_entries
+        self._max_size_bytes = max_size_bytes
+        self._ttl_seconds = ttl_seconds
+
+        self._entries: OrderedDict[str, _CacheEntry[V]] = OrderedDict()
+        self._size_bytes = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        if monotonic() - entry.created_at > self._ttl_seconds:
+            self._remove(key)
+            self._evictions += 1
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry.value
+
+    def put(self, key: str, value: V, size_bytes: int) -> None:
+        if self._max_entries <= 0 or size_bytes > self._max_size_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = _CacheEntry(value, size_bytes, monotonic())
+        self._size_bytes += size_bytes
+
+        # Вытесняем давно не использовавшиеся записи, пока не уложимся в ограничения
+        while len(self._entries) > self._max_entries or self._size_bytes > self._max_size_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size_bytes = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self._hits, self._misses, self._evictions, len(self._entries), self._size_bytes)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._size_bytes -= entry.size_bytes
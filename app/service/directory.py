@@ -0,0 +1,223 @@
+import sqlite3
+from asyncio import Task, create_task, get_running_loop, sleep
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from os import getpid, makedirs
+from pathlib import Path
+from socket import gethostname
+from time import time
+from typing import Any, AsyncIterator, Callable, Optional, TypeVar
+from uuid import UUID
+
+from app.settings import settings
+
+T = TypeVar("T")
+
+_SCHEMA = (
+    # Рабочие процессы uvicorn всех узлов; address — адрес API отладки узла для передачи каталогов
+    "CREATE TABLE IF NOT EXISTS workers "
+    "(worker_id TEXT PRIMARY KEY, node_id TEXT NOT NULL, address TEXT, heartbeat REAL NOT NULL)",
+    # Узлы, на диске которых есть каталог трансляции
+    "CREATE TABLE IF NOT EXISTS workspaces "
+    "(uuid TEXT NOT NULL, node_id TEXT NOT NULL, created_at REAL NOT NULL, PRIMARY KEY (uuid, node_id))",
+    # Каталоги, закрепленные открытыми сессиями и запросами каждого рабочего процесса
+    "CREATE TABLE IF NOT EXISTS pins "
+    "(uuid TEXT NOT NULL, worker_id TEXT NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (uuid, worker_id))",
+)
+
+
+# Общий для рабочих процессов и узлов каталог: где лежат каталоги трансляций и какие из них закреплены.
+# Хранится в SQLite с журналом отката (DELETE) и блокировками файла: WAL требует общей памяти и на сетевых
+# томах небезопасен. Ожидание блокировки может занять секунды, поэтому запросы выполняются в отдельном
+# потоке: записи — без ожидания, в порядке вызова, чтения — с ожиданием результата.
+# Записи процессов, переставших обновлять heartbeat, не учитываются и удаляются
+class WorkspaceDirectory:
+    def __init__(
+            self,
+            path: Path,
+            node_id: str,
+            node_address: Optional[str],
+            heartbeat_interval: float,
+            worker_ttl: float
+    ) -> None:
+        self._path = path
+        self._node_id = node_id
+        self._node_address = node_address
+        self._worker_id = f"{node_id}:{getpid()}"
+        self._heartbeat_interval = heartbeat_interval
+        self._worker_ttl = worker_ttl
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="workspace-directory")
+        self._connection: Optional[sqlite3.Connection] = None
+        self._heartbeat_task: Optional[Task[None]] = None
+
+    @property
+    def node_id(self) -> str:
+        return self._node_id
+
+    async def start(self) -> None:
+        makedirs(self._path.parent, exist_ok=True)
+
+        await self._call(self._connect)
+        await self._call(self._heartbeat)
+        self._heartbeat_task = create_task(self._heartbeat_periodically())
+
+    async def stop(self) -> None:
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+        await self._call(self._execute, "DELETE FROM pins WHERE worker_id = ?", self._worker_id)
+        await self._call(self._execute, "DELETE FROM workers WHERE worker_id = ?", self._worker_id)
+        await self._call(self._close)
+
+    def register(self, uuid: UUID) -> None:
+        self._submit(
+            "INSERT OR IGNORE INTO workspaces (uuid, node_id, created_at) VALUES (?, ?, ?)",
+            str(uuid), self._node_id, time()
+        )
+
+    def forget(self, names: list[str]) -> None:
+        for name in names:
+            self._submit("DELETE FROM workspaces WHERE uuid = ? AND node_id = ?", name, self._node_id)
+
+    # Закрепление записывается с ожиданием: каталог используется только после того, как его увидит
+    # сборка в других процессах
+    async def pin(self, uuid: UUID) -> None:
+        await self._call(
+            self._execute,
+            "INSERT INTO pins (uuid, worker_id, count) VALUES (?, ?, 1) "
+            "ON CONFLICT (uuid, worker_id) DO UPDATE SET count = count + 1",
+            str(uuid), self._worker_id
+        )
+
+    def unpin(self, uuid: UUID) -> None:
+        self._submit("UPDATE pins SET count = count - 1 WHERE uuid = ? AND worker_id = ?", str(uuid), self._worker_id)
+        self._submit("DELETE FROM pins WHERE uuid = ? AND worker_id = ? AND count <= 0", str(uuid), self._worker_id)
+
+    # Каталоги, закрепленные другими живыми рабочими процессами этого узла
+    async def pinned_elsewhere(self) -> set[str]:
+        return await self._call(self._pinned_elsewhere)
+
+    # Сборка каталогов: закрепления других процессов читаются в транзакции, которая держит блокировку записи,
+    # пока выбранные каталоги не переименованы, — закрепление из другого процесса ждет ее завершения.
+    # None, если блокировку получить не удалось: каталоги в этот раз не собираются
+    @asynccontextmanager
+    async def collecting(self) -> AsyncIterator[Optional[set[str]]]:
+        pinned = await self._call(self._begin_collecting)
+        try:
+            yield pinned
+        finally:
+            await self._call(self._end_collecting)
+
+    # Адрес живого узла, на котором есть каталог трансляции; None, если каталога нет на других узлах
+    async def locate(self, uuid: UUID) -> Optional[str]:
+        rows = await self._call(
+            self._query,
+            "SELECT workers.address FROM workspaces JOIN workers ON workspaces.node_id = workers.node_id "
+            "WHERE workspaces.uuid = ? AND workspaces.node_id != ? AND workers.address IS NOT NULL "
+            "AND workers.heartbeat > ? ORDER BY workers.heartbeat DESC LIMIT 1",
+            str(uuid), self._node_id, time() - self._worker_ttl
+        )
+        return str(rows[0][0]) if rows else None
+
+    def _heartbeat(self) -> None:
+        now = time()
+        self._execute(
+            "INSERT INTO workers (worker_id, node_id, address, heartbeat) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (worker_id) DO UPDATE SET heartbeat = excluded.heartbeat, address = excluded.address",
+            self._worker_id, self._node_id, self._node_address, now
+        )
+
+        # Процессы, завершившиеся без stop, освобождают закрепленные ими каталоги
+        stale = now - self._worker_ttl
+        self._execute(
+            "DELETE FROM pins WHERE worker_id IN (SELECT worker_id FROM workers WHERE heartbeat <= ?)", stale
+        )
+        self._execute("DELETE FROM workers WHERE heartbeat <= ?", stale)
+
+    async def _heartbeat_periodically(self) -> None:
+        while True:
+            try:
+                await sleep(self._heartbeat_interval)
+                await self._call(self._heartbeat)
+            except Exception as e:
+                print(f"An exception was thrown: {e}")
+
+    # Запрос без ожидания результата; очередь одного потока сохраняет порядок записей
+    def _submit(self, statement: str, *parameters: Any) -> None:
+        self._executor.submit(self._execute, statement, *parameters)
+
+    async def _call(self, function: Callable[..., T], *args: Any) -> T:
+        return await get_running_loop().run_in_executor(self._executor, function, *args)
+
+    # Методы ниже выполняются только в потоке каталога
+    def _connect(self) -> None:
+        try:
+            connection = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=DELETE")
+            for statement in _SCHEMA:
+                connection.execute(statement)
+        except sqlite3.Error as e:
+            print(f"Workspace directory error: {e}")
+            return
+
+        self._connection = connection
+
+    def _pinned_elsewhere(self) -> set[str]:
+        rows = self._query(
+            "SELECT DISTINCT pins.uuid FROM pins JOIN workers ON pins.worker_id = workers.worker_id "
+            "WHERE workers.worker_id != ? AND workers.node_id = ? AND workers.heartbeat > ?",
+            self._worker_id, self._node_id, time() - self._worker_ttl
+        )
+        return {str(row[0]) for row in rows}
+
+    def _begin_collecting(self) -> Optional[set[str]]:
+        if self._connection is None:
+            return set()
+
+        try:
+            self._connection.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            print(f"Workspace directory error: {e}")
+            return None
+
+        return self._pinned_elsewhere()
+
+    def _end_collecting(self) -> None:
+        if self._connection is not None and self._connection.in_transaction:
+            self._execute("COMMIT")
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    # Сбой каталога не должен ломать отладку на этом узле: ошибки только выводятся
+    def _execute(self, statement: str, *parameters: Any) -> None:
+        if self._connection is None:
+            return
+
+        try:
+            self._connection.execute(statement, parameters)
+        except sqlite3.Error as e:
+            print(f"Workspace directory error: {e}")
+
+    def _query(self, statement: str, *parameters: Any) -> list[Any]:
+        if self._connection is None:
+            return []
+
+        try:
+            return self._connection.execute(statement, parameters).fetchall()
+        except sqlite3.Error as e:
+            print(f"Workspace directory error: {e}")
+            return []
+
+
+workspace_directory = WorkspaceDirectory(
+    settings.DIRECTORY_PATH if settings.DIRECTORY_PATH is not None else settings.TRANSLATION_PATH / ".directory.sqlite3",
+    settings.NODE_ID if settings.NODE_ID is not None else gethostname(),
+    settings.NODE_ADDRESS,
+    settings.DIRECTORY_HEARTBEAT_INTERVAL,
+    settings.DIRECTORY_WORKER_TTL
+)
@@ -0,0 +1,68 @@
+from asyncio import to_thread
+from json import loads
+from typing import Optional
+from urllib.error import URLError
+from urllib.request import urlopen
+from uuid import UUID
+
+from app.settings import settings
+from app.core.breakpoints import BREAKPOINT_INDEX_FILENAME
+from app.service.directory import workspace_directory
+from app.service.program import SESSION_PROGRAM_FILENAME, session_programs
+from app.service.util.files import write_text_atomic
+from app.service.workspace import workspace_manager
+
+# Файлы каталога трансляции, достаточные для отладки и прогона на другом узле
+# Скомпилированный код не передается: он зависит от версии Python и компилируется на месте
+WORKSPACE_ARTIFACTS = ("post_code.post", "python_code.py", BREAKPOINT_INDEX_FILENAME, SESSION_PROGRAM_FILENAME)
+
+
+def read_artifacts(uuid: UUID) -> Optional[dict[str, str]]:
+    path = workspace_manager.path(uuid)
+    if not (path / "python_code.py").exists():
+        return None
+
+    artifacts = {}
+    for name in WORKSPACE_ARTIFACTS:
+        try:
+            artifacts[name] = (path / name).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            continue
+
+    return artifacts
+
+
+def _fetch_artifacts(address: str, uuid: UUID) -> dict[str, str]:
+    with urlopen(f"{address.rstrip('/')}/workspace/{uuid}/artifacts", timeout=settings.WORKSPACE_HANDOFF_TIMEOUT) as f:
+        artifacts: dict[str, str] = loads(f.read())
+        return artifacts
+
+
+# Сессию можно открыть на любом рабочем процессе любого узла: если каталога трансляции нет на этом узле,
+# он копируется с узла, где была трансляция. Возвращает False, если каталог не найден ни на одном узле
+async def ensure_local_workspace(uuid: UUID) -> bool:
+    if (workspace_manager.path(uuid) / "python_code.py").exists():
+        return True
+
+    address = await workspace_directory.locate(uuid)
+    if address is None:
+        return False
+
+    try:
+        artifacts = await to_thread(_fetch_artifacts, address, uuid)
+    except (URLError, OSError, ValueError) as e:
+        print(f"Failed to fetch workspace {uuid} from {address}: {e}")
+        return False
+
+    path = workspace_manager.create(uuid, exist_ok=True)
+    for name, content in artifacts.items():
+        if name in WORKSPACE_ARTIFACTS:
+            write_text_atomic(path / name, content)
+
+    try:
+        await to_thread(session_programs.load, path)
+    except (OSError, SyntaxError) as e:
+        print(f"Failed to prepare the debugging program of workspace {uuid}: {e}")
+
+    print(f"Workspace {uuid} was handed off from {address}")
+    return True
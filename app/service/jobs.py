@@ -0,0 +1,231 @@
+from asyncio import (
+    CancelledError, Event, Queue, QueueFull, Task, create_task, gather, wait as wait_tasks, FIRST_COMPLETED
+)
+from dataclasses import dataclass, field
+from hashlib import sha256
+from time import time
+from typing import AsyncIterator, Literal, Optional
+from uuid import UUID, uuid4
+
+from app.settings import settings
+from app.service.request_processing import CodeInfo, TranslatorOutput, debugging_request_processor
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class JobInfo:
+    job_id: str
+    status: JobStatus
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    uuid: Optional[str]
+    translator_output: Optional[TranslatorOutput]
+    code_info: Optional[CodeInfo]
+    error: Optional[str]
+
+
+@dataclass
+class TranslationJob:
+    post_code: str
+    source_hash: str
+
+    job_id: UUID = field(default_factory=uuid4)
+    status: JobStatus = "queued"
+    created_at: float = field(default_factory=time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    uuid: Optional[UUID] = None
+    translator_output: Optional[TranslatorOutput] = None
+    code_info: Optional[CodeInfo] = None
+    error: Optional[str] = None
+
+    # Заменяется при каждой смене состояния; ожидающие получают новое состояние
+    changed: Event = field(default_factory=Event)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def info(self) -> JobInfo:
+        return JobInfo(
+            job_id=str(self.job_id),
+            status=self.status,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            uuid=str(self.uuid) if self.uuid is not None else None,
+            translator_output=self.translator_output,
+            code_info=self.code_info,
+            error=self.error
+        )
+
+    def set_status(self, status: JobStatus) -> None:
+        self.status = status
+        changed, self.changed = self.changed, Event()
+        changed.set()
+
+
+# Очередь трансляций: не больше max_workers трансляций (процессов java) одновременно и не больше
+# max_queued ожидающих. Одинаковые программы, уже стоящие в очереди или транслирующиеся, не дублируются.
+# Завершенные задачи хранятся retention секунд
+class TranslationJobQueue:
+    def __init__(self, max_workers: int, max_queued: int, retention: float) -> None:
+        self._max_workers = max_workers
+        self._retention = retention
+
+        self._queue = Queue[TranslationJob](maxsize=max_queued)
+        self._jobs: dict[UUID, TranslationJob] = {}
+        self._in_flight: dict[str, TranslationJob] = {}
+        self._workers: list[Task[None]] = []
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        self._workers = [create_task(self._work()) for _ in range(self._max_workers)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        # Ожидающие задачи уже не начнутся: их ожидающие должны получить завершение, а не ждать вечно
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            self._queue.task_done()
+            self._in_flight.pop(job.source_hash, None)
+            job.error = "Translation job queue stopped"
+            self._finish(job, "failed")
+
+    def submit(self, post_code: str) -> TranslationJob:
+        self._prune()
+
+        source_hash = sha256(post_code.encode("utf-8")).hexdigest()
+        job = self._in_flight.get(source_hash)
+        if job is not None:
+            return job
+
+        job = TranslationJob(post_code, source_hash)
+        try:
+            self._queue.put_nowait(job)
+        except QueueFull:
+            raise JobQueueFullError("Too many translation jobs")
+
+        self._jobs[job.job_id] = job
+        self._in_flight[source_hash] = job
+        return job
+
+    # Как submit, но при заполненной очереди ждет места, а не отказывает
+    async def enqueue(self, post_code: str) -> TranslationJob:
+        self._prune()
+
+        source_hash = sha256(post_code.encode("utf-8")).hexdigest()
+        job = self._in_flight.get(source_hash)
+        if job is not None:
+            return job
+
+        job = TranslationJob(post_code, source_hash)
+        self._jobs[job.job_id] = job
+        self._in_flight[source_hash] = job
+        try:
+            await self._queue.put(job)
+        except BaseException:
+            self._jobs.pop(job.job_id, None)
+            self._in_flight.pop(source_hash, None)
+            raise
+
+        return job
+
+    # Трансляция набора программ: в очереди одновременно не больше window программ набора,
+    # чтобы набор не вытеснял одиночные запросы. Результаты выдаются по мере завершения: (номер, задача)
+    async def run_batch(self, sources: list[str], window: int) -> AsyncIterator[tuple[int, TranslationJob]]:
+        async def wait_job(index: int, job: TranslationJob) -> tuple[int, TranslationJob]:
+            return index, await self.wait(job)
+
+        pending: set[Task[tuple[int, TranslationJob]]] = set()
+        try:
+            for index, post_code in enumerate(sources):
+                while len(pending) >= window:
+                    done, pending = await wait_tasks(pending, return_when=FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+
+                job = await self.enqueue(post_code)
+                pending.add(create_task(wait_job(index, job)))
+
+            while pending:
+                done, pending = await wait_tasks(pending, return_when=FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            # Клиент отключился: задачи в очереди доводятся до конца, перестаем только ждать их
+            for task in pending:
+                task.cancel()
+
+    def get(self, job_id: UUID) -> Optional[TranslationJob]:
+        return self._jobs.get(job_id)
+
+    async def wait(self, job: TranslationJob) -> TranslationJob:
+        while not job.finished:
+            await job.changed.wait()
+        return job
+
+    # Состояния задачи от текущего до завершения
+    async def watch(self, job: TranslationJob) -> AsyncIterator[JobInfo]:
+        while True:
+            changed = job.changed
+            yield job.info()
+            if job.finished:
+                return
+            await changed.wait()
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            status: JobStatus = "failed"
+            try:
+                job.started_at = time()
+                job.set_status("running")
+
+                job.uuid, job.translator_output, job.code_info = \
+                    await debugging_request_processor.process(job.post_code)
+                status = "done"
+            except Exception as e:
+                print(f"Translation job {job.job_id} failed: {e}")
+                job.error = f"{type(e).__name__}: {e}"
+            except CancelledError:
+                # Очередь остановлена во время трансляции: задача не должна навсегда остаться в состоянии running
+                job.error = "Translation job cancelled"
+                raise
+            finally:
+                self._in_flight.pop(job.source_hash, None)
+                self._queue.task_done()
+                self._finish(job, status)
+
+    @staticmethod
+    def _finish(job: TranslationJob, status: JobStatus) -> None:
+        job.finished_at = time()
+        job.post_code = ""
+        job.set_status(status)
+
+    def _prune(self) -> None:
+        deadline = time() - self._retention
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < deadline:
+                del self._jobs[job_id]
+
+
+translation_jobs = TranslationJobQueue(
+    settings.TRANSLATION_JOB_WORKERS,
+    settings.TRANSLATION_JOB_QUEUE_SIZE,
+    settings.TRANSLATION_JOB_RETENTION
+)
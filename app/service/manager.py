@@ -1,42 +1,319 @@
-from asyncio import AbstractEventLoop
+from asyncio import AbstractEventLoop, Task, to_thread, wait, wait_for, FIRST_COMPLETED, TimeoutError as AsyncTimeoutError
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from threading import Event, get_ident
+from time import pthread_getcpuclockid, clock_gettime
+from typing import Optional, Literal
 from uuid import UUID
 
 from app.settings import settings
-from app.core.command import Command
-from app.core.communication import CommunicationQueue
-from app.core.debugger import PostDebugger
+from app.core.command import Command, CommandName
+from app.core.communication import CommunicationQueue, LiveSignals, ProcessCommunicationQueue, MessageQueue
+from app.core.debugger import BasePostDebugger, DebuggerEngine, DebuggerOutput, PostDebugger
+from app.core.history import SnapshotHistory
+from app.core.monitoring import MonitoringPostDebugger, monitoring_available
+from app.core.profiler import SamplingProfiler
+from app.core.util.output import SnapshotOptions
+from app.service.metrics import stop_snapshot_seconds
+from app.service.profiling import write_profile
+from app.service.program import SessionProgram, session_programs
+from app.service.util.context import python_code_namespace
+from app.service.util.worker import worker_context
+from app.service.workspace import workspace_manager
+
+DebuggerBackend = Literal["thread", "process"]
+
+# Отдельный пул потоков для сессий: зависшие сессии не занимают пул цикла событий по умолчанию
+debugger_executor = ThreadPoolExecutor(max_workers=settings.MAX_DEBUG_SESSIONS, thread_name_prefix="post-debugger")
+
+# Потоки пула, в которых сейчас исполняются программы
+debugger_threads_in_use: set[int] = set()
+
+
+class DebuggingFinishedError(Exception):
+    pass
+
+
+def create_debugger(
+        engine: DebuggerEngine,
+        snapshot_options: SnapshotOptions,
+        command_queue: MessageQueue[Command],
+        output_queue: MessageQueue[DebuggerOutput],
+        live_signals: LiveSignals
+) -> BasePostDebugger:
+    history = SnapshotHistory(settings.SNAPSHOT_HISTORY_MAX_ENTRIES, settings.SNAPSHOT_HISTORY_MAX_BYTES)
+
+    if engine == "monitoring":
+        return MonitoringPostDebugger(
+            command_queue, output_queue, snapshot_options, history, settings.MAX_BATCH_STOPS,
+            settings.MAX_FILTERED_STOPS, live_signals
+        )
+
+    return PostDebugger(
+        command_queue, output_queue, snapshot_options, history, settings.MAX_BATCH_STOPS,
+        settings.MAX_FILTERED_STOPS, live_signals
+    )
+
+
+def run_debugger(
+        debugger: BasePostDebugger,
+        program: SessionProgram,
+        translation_path: Path,
+        profile: bool = False
+) -> None:
+    program.cache_source_lines()
+    try:
+        debugger.set_breakpoints(program.filename, program.breakpoints)
+    except Exception as e:
+        print(f"Failed to set breakpoints: {e}")
+
+    program_globals = python_code_namespace("__main__")
+    if not profile:
+        # Программа исполняется в собственном пространстве имен, а не в __main__ сервера
+        debugger.run_program(program.code, program_globals)
+        return
+
+    profiler = SamplingProfiler("debug", program.filename, settings.PROFILE_SAMPLE_INTERVAL)
+    debugger.attach_profiler(profiler)
+
+    profiler.start()
+    try:
+        debugger.run_program(program.code, program_globals)
+    finally:
+        write_profile(translation_path, profiler.stop())
+
+
+# Программа приходит в аргументах процесса уже скомпилированной: рабочий процесс не читает каталог трансляции
+def run_debugger_process(
+        engine: DebuggerEngine,
+        snapshot_options: SnapshotOptions,
+        program: SessionProgram,
+        translation_path: Path,
+        profile: bool,
+        command_queue: ProcessCommunicationQueue[Command],
+        output_queue: ProcessCommunicationQueue[DebuggerOutput],
+        live_signals: LiveSignals
+) -> None:
+    command_queue.close_sender()
+    output_queue.close_receiver()
+
+    debugger = create_debugger(engine, snapshot_options, command_queue, output_queue, live_signals)
+    run_debugger(debugger, program, translation_path, profile)
 
 
 class PostDebuggerManager:
-    def __init__(self, uuid: UUID, loop: AbstractEventLoop) -> None:
+    _FINAL_OUTPUT_GRACE = 0.1
+
+    def __init__(
+            self,
+            uuid: UUID,
+            loop: AbstractEventLoop,
+            backend: Optional[DebuggerBackend] = None,
+            engine: Optional[DebuggerEngine] = None,
+            snapshot_options: Optional[SnapshotOptions] = None,
+            profile: bool = False
+    ) -> None:
         self._uuid = uuid
         self._loop = loop
+        self._backend = backend if backend is not None else settings.DEBUGGER_BACKEND
+        self._engine = engine if engine is not None else settings.DEBUGGER_ENGINE
+        self._snapshot_options = snapshot_options if snapshot_options is not None else \
+            SnapshotOptions(deltas=settings.SNAPSHOT_DELTAS, live_interval=settings.LIVE_SNAPSHOT_INTERVAL)
+
+        self._profile = profile
+
+        if self._engine == "monitoring" and not monitoring_available:
+            print("sys.monitoring is not available, falling back to the bdb engine")
+            self._engine = "bdb"
+
+        self._command_queue: MessageQueue[Command]
+        self._output_queue: MessageQueue[DebuggerOutput]
+        if self._backend == "process":
+            self._command_queue = ProcessCommunicationQueue[Command]()
+            self._output_queue = ProcessCommunicationQueue[DebuggerOutput]()
+            self._live_signals = LiveSignals(worker_context.Event(), worker_context.Event())
+        else:
+            self._command_queue = CommunicationQueue[Command](loop)
+            self._output_queue = CommunicationQueue[DebuggerOutput](loop)
+            self._live_signals = LiveSignals(Event(), Event())
+
+        self._process: Optional[BaseProcess] = None
+        self._thread_id: Optional[int] = None
+        self._task: Optional[Task[None]] = None
+
+    @property
+    def backend(self) -> DebuggerBackend:
+        return self._backend
+
+    @property
+    def engine(self) -> DebuggerEngine:
+        return self._engine
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process is not None else None
+
+    @property
+    def thread_id(self) -> Optional[int]:
+        return self._thread_id
 
-        self._command_queue = CommunicationQueue[Command]()
-        self._output_queue = CommunicationQueue[str]()
+    @property
+    def finished(self) -> bool:
+        return self._task is not None and self._task.done()
 
-        self._debugger = PostDebugger(loop, self._command_queue, self._output_queue)
+    def start(self) -> Task[None]:
+        self._task = self._loop.create_task(self.run_debugging())
+        return self._task
 
     async def run_debugging(self) -> None:
-        python_code_path = settings.TRANSLATION_PATH / str(self._uuid) / "python_code.py"
+        translation_path = workspace_manager.path(self._uuid)
+        program = await to_thread(session_programs.load, translation_path)
 
-        python_code_source = None
-        with open(python_code_path, "r", encoding="utf-8") as f:
-            python_code_source = f.read()
+        if isinstance(self._command_queue, ProcessCommunicationQueue) and \
+                isinstance(self._output_queue, ProcessCommunicationQueue):
+            await self._run_in_process(program, translation_path, self._command_queue, self._output_queue)
+        else:
+            debugger = create_debugger(
+                self._engine, self._snapshot_options, self._command_queue, self._output_queue, self._live_signals
+            )
 
-        python_code = compile(python_code_source, python_code_path, "exec")
+            def run_debugger_thread() -> None:
+                self._thread_id = get_ident()
+                debugger_threads_in_use.add(self._thread_id)
+                try:
+                    run_debugger(debugger, program, translation_path, self._profile)
+                finally:
+                    debugger_threads_in_use.discard(self._thread_id)
+                    self._thread_id = None
 
-        def run_debugger() -> None:
-            try:
-                self._debugger.set_breakpoints(python_code_path)
-            except Exception as e:
-                print(f"Failed to set breakpoints: {e}")
+            await self._loop.run_in_executor(debugger_executor, run_debugger_thread)
+
+    async def _run_in_process(
+            self,
+            program: SessionProgram,
+            translation_path: Path,
+            command_queue: ProcessCommunicationQueue[Command],
+            output_queue: ProcessCommunicationQueue[DebuggerOutput]
+    ) -> None:
+        process = worker_context.Process(
+            target=run_debugger_process,
+            args=(
+                self._engine, self._snapshot_options, program, translation_path, self._profile,
+                command_queue, output_queue, self._live_signals
+            ),
+            daemon=True
+        )
+        await to_thread(process.start)
+        self._process = process
+
+        command_queue.close_receiver()
+        output_queue.close_sender()
 
-            self._debugger.run(python_code)
+        exited = self._loop.create_future()
 
-        await self._loop.run_in_executor(None, run_debugger)
+        def on_exit() -> None:
+            if not exited.done():
+                exited.set_result(None)
+
+        self._loop.add_reader(process.sentinel, on_exit)
+        try:
+            await exited
+        finally:
+            self._loop.remove_reader(process.sentinel)
+            self.terminate()
+
+    # Число сообщений в очередях команд и ответов; для канала между процессами неизвестно
+    def queue_depths(self) -> Optional[tuple[int, int]]:
+        if isinstance(self._command_queue, CommunicationQueue) and isinstance(self._output_queue, CommunicationQueue):
+            return self._command_queue.depth, self._output_queue.depth
+        return None
 
     async def run_command(self, command: Command) -> str:
+        if command.name == CommandName.RUN_LIVE:
+            self._live_signals.pause.clear()
+            self._live_signals.ready.set()
+
         await self._command_queue.send_message(command)
-        result = await self._output_queue.receive_message()
-        return result
+        return self._receive_output(await self._next_output())
+
+    # Следующий снимок режима RUN_LIVE или, после pause_live, ответ на PAUSE (DebuggerOutput.live == False)
+    async def receive_live_output(self) -> DebuggerOutput:
+        output = await self._next_output()
+        stop_snapshot_seconds.observe(output.snapshot_seconds)
+        return output
+
+    # Клиенту отправлен снимок RUN_LIVE: отладчик может отправить следующий
+    def acknowledge_live_output(self) -> None:
+        self._live_signals.ready.set()
+
+    def pause_live(self) -> None:
+        self._live_signals.pause.set()
+
+    async def _next_output(self) -> DebuggerOutput:
+        if self._task is None:
+            return await self._output_queue.receive_message()
+
+        # Если программа завершилась, ответа не будет: не ждем его бесконечно
+        output = self._loop.create_task(self._output_queue.receive_message())
+        try:
+            done, _ = await wait({output, self._task}, return_when=FIRST_COMPLETED)
+            if output not in done:
+                # Последний ответ мог быть отправлен непосредственно перед завершением программы
+                done, _ = await wait({output}, timeout=self._FINAL_OUTPUT_GRACE)
+        finally:
+            # Ожидание ответа отменено (клиент отключился во время RUN_LIVE): чтение не остается без владельца
+            output.cancel()
+
+        if output not in done:
+            raise DebuggingFinishedError(f"Debugging session has finished: {self._uuid}")
+
+        return output.result()
+
+    @staticmethod
+    def _receive_output(output: DebuggerOutput) -> str:
+        stop_snapshot_seconds.observe(output.snapshot_seconds)
+        return output.message
+
+    def cpu_seconds(self) -> Optional[float]:
+        if self._thread_id is None:
+            return None
+
+        try:
+            return clock_gettime(pthread_getcpuclockid(self._thread_id))
+        except OSError:
+            return None
+
+    async def stop(self, timeout: float) -> None:
+        if self._task is None:
+            self.terminate()
+            return
+
+        if not self._task.done():
+            # Поток нельзя убить принудительно: просим отладчик завершиться на ближайшей остановке.
+            # Профилируемый процесс тоже завершается командой, чтобы успеть сохранить профиль
+            if self._backend == "thread" or self._profile:
+                # В режиме RUN_LIVE отладчик не читает команды, пока не остановится
+                self._live_signals.pause.set()
+                await self._command_queue.send_message(Command(CommandName.QUIT, []))
+            else:
+                self.terminate()
+
+            try:
+                await wait_for(self._task, timeout)
+            except AsyncTimeoutError:
+                print(f"Debugging session did not stop in {timeout} seconds: {self._uuid}")
+            except Exception as e:
+                print(f"An exception was thrown: {e}")
+
+        self.terminate()
+
+    # Завершает рабочий процесс отладчика, не затрагивая сервер
+    def terminate(self) -> None:
+        if self._process is None:
+            return
+
+        process, self._process = self._process, None
+        if process.is_alive():
+            process.kill()
+        process.join()
@@ -0,0 +1,137 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Iterator, Optional
+
+Labels = tuple[tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labels: Labels, extra: Optional[tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra is not None else [])
+    if not pairs:
+        return ""
+
+    escaped = (value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+# Гистограмма в формате Prometheus: накопительные корзины, сумма и число наблюдений.
+# observe вызывается из потоков отладчиков, поэтому состояние защищено блокировкой
+class Histogram:
+    def __init__(self, name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.description = description
+
+        self._buckets = buckets
+        self._lock = Lock()
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - started)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+
+        cumulative = 0
+        for bound, count in zip(self._buckets + (float("inf"),), counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels((), ('le', _format_value(bound)))} {cumulative}")
+
+        lines.append(f"{self.name}_sum {_format_value(total)}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return lines
+
+
+# Значение датчика вычисляется в момент запроса метрик
+class Gauge:
+    def __init__(self, name: str, description: str, collect: Callable[[], dict[Labels, float]]) -> None:
+        self.name = name
+        self.description = description
+
+        self._collect = collect
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} gauge"]
+        for labels, value in self._collect().items():
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Histogram | Gauge] = {}
+
+    def register(self, metric: Histogram | Gauge) -> None:
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"Failed to collect metric {metric.name}: {e}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+def histogram(name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    metric = Histogram(name, description, buckets)
+    metrics_registry.register(metric)
+    return metric
+
+
+def gauge(name: str, description: str, collect: Callable[[], dict[Labels, float]]) -> Gauge:
+    metric = Gauge(name, description, collect)
+    metrics_registry.register(metric)
+    return metric
+
+
+translation_seconds = histogram(
+    "postdb_translation_seconds",
+    "Time spent translating POST code to Python"
+)
+code_info_extraction_seconds = histogram(
+    "postdb_code_info_extraction_seconds",
+    "Time spent extracting code info from a translated program"
+)
+workspace_preparation_seconds = histogram(
+    "postdb_workspace_preparation_seconds",
+    "Time spent creating or restoring a translation workspace"
+)
+stop_snapshot_seconds = histogram(
+    "postdb_stop_snapshot_seconds",
+    "Time from handling a stop to its snapshot message being ready",
+    (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+websocket_command_seconds = histogram(
+    "postdb_websocket_command_seconds",
+    "Round-trip time of a debugger command received over the websocket"
+)
@@ -0,0 +1,23 @@
+from pathlib import Path
+from typing import Optional
+
+from app.core.profiler import ProgramProfile
+from app.service.util.files import write_text_atomic
+
+# Профиль последнего профилированного запуска хранится в каталоге трансляции
+# и удаляется вместе с ним
+PROFILE_FILENAME = "profile.json"
+
+
+def write_profile(translation_path: Path, profile: ProgramProfile) -> None:
+    try:
+        write_text_atomic(translation_path / PROFILE_FILENAME, profile.dump())
+    except OSError as e:
+        print(f"Failed to write profile: {e}")
+
+
+def read_profile(translation_path: Path) -> Optional[ProgramProfile]:
+    try:
+        return ProgramProfile.load((translation_path / PROFILE_FILENAME).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
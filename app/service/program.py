@@ -0,0 +1,174 @@
+import linecache
+import marshal
+from collections import OrderedDict
+from dataclasses import dataclass
+from hashlib import sha256
+from importlib.util import MAGIC_NUMBER
+from pathlib import Path
+from threading import Lock
+from types import CodeType
+from typing import Any, Optional
+
+from app.settings import settings
+from app.core.breakpoints import Breakpoint, find_breakpoints, load_breakpoint_index
+from app.service.util.context import compile_python_code
+from app.service.util.files import write_bytes_atomic, write_text_atomic
+
+# Код сессии отладки: python_code.py с дописанным циклом запуска. Сам python_code.py не меняется:
+# его исполняет извлечение информации о коде, которому бесконечный цикл не нужен
+SESSION_PROGRAM_FILENAME = "debug_code.py"
+# Объект кода сессии, сериализованный marshal: версия байткода, хэш исходного кода и сам код
+SESSION_CODE_FILENAME = "debug_code.marshal"
+
+_SOURCE_HASH_SIZE = 64
+
+
+@dataclass(frozen=True)
+class SessionProgram:
+    source_hash: str
+    filename: str
+    source: str
+    code: CodeType
+    breakpoints: list[Breakpoint]
+
+    # pickle не сериализует объекты кода: в рабочий процесс сессии код передается через marshal
+    def __reduce__(self) -> tuple[Any, ...]:
+        return _unmarshal_program, (self.source_hash, self.filename, self.source, marshal.dumps(self.code),
+                                    self.breakpoints)
+
+    # bdb проверяет строки точек останова через linecache: исходный код берется из памяти, а не с диска
+    def cache_source_lines(self) -> None:
+        linecache.cache[self.filename] = (len(self.source), None, self.source.splitlines(True), self.filename)
+
+
+def _unmarshal_program(
+        source_hash: str,
+        filename: str,
+        source: str,
+        code: bytes,
+        breakpoints: list[Breakpoint]
+) -> SessionProgram:
+    return SessionProgram(source_hash, filename, source, marshal.loads(code), breakpoints)
+
+
+# Код сессий собирается и компилируется один раз, при трансляции, и больше не меняется.
+# Открытие сессии берет готовую программу из памяти; другие рабочие процессы узла, не выполнявшие
+# трансляцию, загружают объект кода из marshal-файла без повторной компиляции
+class SessionProgramStore:
+    def __init__(self, max_entries: int, marshal_code: bool) -> None:
+        self._max_entries = max_entries
+        self._marshal_code = marshal_code
+
+        self._lock = Lock()
+        self._programs: OrderedDict[str, SessionProgram] = OrderedDict()
+        self._addition: Optional[str] = None
+
+    def finalize(self, translation_path: Path, python_code: str, breakpoints: list[Breakpoint]) -> SessionProgram:
+        source = python_code + self._python_code_addition()
+        program_path = translation_path / SESSION_PROGRAM_FILENAME
+        write_text_atomic(program_path, source)
+
+        program = SessionProgram(
+            sha256(source.encode("utf-8")).hexdigest(),
+            str(program_path),
+            source,
+            compile_python_code(source, program_path),
+            breakpoints
+        )
+
+        if self._marshal_code:
+            self._write_code(translation_path, program)
+
+        self._remember(translation_path, program)
+        return program
+
+    def load(self, translation_path: Path) -> SessionProgram:
+        with self._lock:
+            program = self._programs.get(str(translation_path))
+            if program is not None:
+                self._programs.move_to_end(str(translation_path))
+                return program
+
+        program_path = translation_path / SESSION_PROGRAM_FILENAME
+        if not program_path.exists():
+            # Каталог трансляции, созданный до появления debug_code.py
+            return self._finalize_legacy(translation_path)
+
+        source = program_path.read_text(encoding="utf-8")
+        breakpoints = load_breakpoint_index(translation_path)
+        if breakpoints is None:
+            breakpoints = find_breakpoints(source)
+
+        source_hash = sha256(source.encode("utf-8")).hexdigest()
+        code = self._read_code(translation_path, source_hash)
+        if code is None:
+            code = compile_python_code(source, program_path)
+            program = SessionProgram(source_hash, str(program_path), source, code, breakpoints)
+            if self._marshal_code:
+                self._write_code(translation_path, program)
+        else:
+            program = SessionProgram(source_hash, str(program_path), source, code, breakpoints)
+
+        self._remember(translation_path, program)
+        return program
+
+    def _finalize_legacy(self, translation_path: Path) -> SessionProgram:
+        python_code = (translation_path / "python_code.py").read_text(encoding="utf-8")
+
+        # В старых каталогах цикл запуска дописывался к python_code.py при каждом подключении
+        python_code = self.strip_addition(python_code)
+
+        breakpoints = load_breakpoint_index(translation_path)
+        if breakpoints is None:
+            breakpoints = find_breakpoints(python_code)
+
+        write_text_atomic(translation_path / "python_code.py", python_code)
+        return self.finalize(translation_path, python_code, breakpoints)
+
+    # python_code.py без цикла запуска, дописанного в каталогах, открывавшихся в отладчике до debug_code.py
+    def strip_addition(self, python_code: str) -> str:
+        addition = self._python_code_addition()
+        while addition and python_code.endswith(addition):
+            python_code = python_code.removesuffix(addition)
+        return python_code
+
+    def _remember(self, translation_path: Path, program: SessionProgram) -> None:
+        with self._lock:
+            self._programs[str(translation_path)] = program
+            self._programs.move_to_end(str(translation_path))
+            while len(self._programs) > self._max_entries:
+                self._programs.popitem(last=False)
+
+    @staticmethod
+    def _write_code(translation_path: Path, program: SessionProgram) -> None:
+        content = MAGIC_NUMBER + program.source_hash.encode("ascii") + marshal.dumps(program.code)
+        write_bytes_atomic(translation_path / SESSION_CODE_FILENAME, content)
+
+    # Файл, записанный другой версией Python или для другого исходного кода, не используется
+    @staticmethod
+    def _read_code(translation_path: Path, source_hash: str) -> Optional[CodeType]:
+        try:
+            content = (translation_path / SESSION_CODE_FILENAME).read_bytes()
+        except FileNotFoundError:
+            return None
+
+        header_size = len(MAGIC_NUMBER) + _SOURCE_HASH_SIZE
+        if content[:len(MAGIC_NUMBER)] != MAGIC_NUMBER or \
+                content[len(MAGIC_NUMBER):header_size] != source_hash.encode("ascii"):
+            return None
+
+        try:
+            code = marshal.loads(content[header_size:])
+        except (EOFError, ValueError, TypeError) as e:
+            print(f"Failed to load compiled code from {translation_path}: {e}")
+            return None
+
+        return code if isinstance(code, CodeType) else None
+
+    def _python_code_addition(self) -> str:
+        if self._addition is None:
+            self._addition = (settings.RESOURCES_PATH / "python_code_addition.py").read_text(encoding="utf-8")
+        return self._addition
+
+
+session_programs = SessionProgramStore(settings.PROGRAM_CODE_CACHE_MAX_ENTRIES, settings.PROGRAM_CODE_MARSHAL)
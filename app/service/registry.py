@@ -0,0 +1,230 @@
+from asyncio import Semaphore, Task, create_task, sleep, wait_for, TimeoutError as AsyncTimeoutError
+from dataclasses import dataclass, field
+from os import sysconf
+from time import monotonic, time
+from typing import Awaitable, Callable, Optional
+from uuid import UUID, uuid4
+
+from app.service.manager import PostDebuggerManager
+from app.settings import settings
+from app.service.workspace import workspace_manager
+
+
+class SessionLimitError(Exception):
+    pass
+
+
+@dataclass
+class DebugSession:
+    uuid: UUID
+    manager: PostDebuggerManager
+    close_connection: Callable[[], Awaitable[None]]
+
+    session_id: UUID = field(default_factory=uuid4)
+    created_at: float = field(default_factory=time)
+    last_activity: float = field(default_factory=monotonic)
+    commands: int = 0
+    busy: bool = False
+    released: bool = False
+
+
+@dataclass(frozen=True)
+class SessionInfo:
+    session_id: str
+    uuid: str
+    backend: str
+    engine: str
+    created_at: float
+    idle_seconds: float
+    commands: int
+    pid: Optional[int]
+    cpu_seconds: Optional[float]
+    rss_bytes: Optional[int]
+
+
+def _read_process_usage(pid: int) -> tuple[Optional[float], Optional[int]]:
+    try:
+        with open(f"/proc/{pid}/stat", "r", encoding="utf-8") as f:
+            # Имя процесса может содержать пробелы, поэтому поля считаются после закрывающей скобки
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm", "r", encoding="utf-8") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None, None
+
+    clock_ticks = sysconf("SC_CLK_TCK")
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / clock_ticks
+    return cpu_seconds, resident_pages * sysconf("SC_PAGE_SIZE")
+
+
+class SessionRegistry:
+    def __init__(
+            self,
+            max_sessions: int,
+            admission_timeout: float,
+            idle_timeout: float,
+            teardown_timeout: float
+    ) -> None:
+        self._slots = Semaphore(max_sessions)
+        self._admission_timeout = admission_timeout
+        self._idle_timeout = idle_timeout
+        self._teardown_timeout = teardown_timeout
+
+        self._sessions: dict[UUID, DebugSession] = {}
+        self._reaper_task: Optional[Task[None]] = None
+        self._exit_tasks: set[Task[None]] = set()
+
+    @property
+    def active_sessions(self) -> int:
+        return len(self._sessions)
+
+    async def start(self) -> None:
+        self._reaper_task = create_task(self._reap_idle_sessions())
+
+    async def stop(self) -> None:
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+
+        for session in list(self._sessions.values()):
+            await self.release(session)
+
+    async def open(self, uuid: UUID, manager: PostDebuggerManager,
+                   close_connection: Callable[[], Awaitable[None]]) -> DebugSession:
+        try:
+            if self._admission_timeout > 0:
+                await wait_for(self._slots.acquire(), self._admission_timeout)
+            elif self._slots.locked():
+                raise SessionLimitError("Too many debug sessions")
+            else:
+                await self._slots.acquire()
+        except AsyncTimeoutError:
+            raise SessionLimitError("Too many debug sessions")
+
+        try:
+            await workspace_manager.pin(uuid)
+        except BaseException:
+            workspace_manager.unpin(uuid)
+            self._slots.release()
+            raise
+
+        session = DebugSession(uuid, manager, close_connection)
+        self._sessions[session.session_id] = session
+        return session
+
+    def activate(self, session: DebugSession) -> None:
+        task = session.manager.start()
+
+        def on_done(_: Task[None]) -> None:
+            exit_task = create_task(self._on_program_exit(session))
+            self._exit_tasks.add(exit_task)
+            exit_task.add_done_callback(self._exit_tasks.discard)
+
+        task.add_done_callback(on_done)
+
+    def begin_command(self, session: DebugSession) -> None:
+        session.last_activity = monotonic()
+        session.commands += 1
+        session.busy = True
+
+    def end_command(self, session: DebugSession) -> None:
+        session.last_activity = monotonic()
+        session.busy = False
+
+    # Сессия отправила клиенту снимок, не дожидаясь команды (RUN_LIVE)
+    def touch(self, session: DebugSession) -> None:
+        session.last_activity = monotonic()
+
+    # Гарантированное освобождение ресурсов сессии; повторный вызов ничего не делает
+    async def release(self, session: DebugSession) -> None:
+        if session.released:
+            return
+
+        session.released = True
+        self._sessions.pop(session.session_id, None)
+        workspace_manager.unpin(session.uuid)
+
+        try:
+            await session.manager.stop(self._teardown_timeout)
+        finally:
+            self._slots.release()
+
+    def sessions(self) -> list[SessionInfo]:
+        now = monotonic()
+
+        infos = []
+        for session in self._sessions.values():
+            manager = session.manager
+
+            pid = manager.pid
+            cpu_seconds, rss_bytes = _read_process_usage(pid) if pid is not None else (manager.cpu_seconds(), None)
+
+            infos.append(SessionInfo(
+                session_id=str(session.session_id),
+                uuid=str(session.uuid),
+                backend=manager.backend,
+                engine=manager.engine,
+                created_at=session.created_at,
+                idle_seconds=now - session.last_activity,
+                commands=session.commands,
+                pid=pid,
+                cpu_seconds=cpu_seconds,
+                rss_bytes=rss_bytes
+            ))
+
+        return infos
+
+    # Сессии с бэкендом process, рабочий процесс которых запущен
+    def running_processes(self) -> int:
+        return sum(1 for session in self._sessions.values() if session.manager.pid is not None)
+
+    # Суммарное число сообщений в очередях команд и ответов сессий с отладчиком в потоке
+    def queue_depths(self) -> tuple[int, int]:
+        commands, outputs = 0, 0
+        for session in self._sessions.values():
+            depths = session.manager.queue_depths()
+            if depths is not None:
+                commands += depths[0]
+                outputs += depths[1]
+
+        return commands, outputs
+
+    async def _on_program_exit(self, session: DebugSession) -> None:
+        # Во время выполнения команды соединение закроет обработчик, отправив последний ответ
+        if session.released or session.busy:
+            return
+
+        await self._close(session)
+
+    async def _close(self, session: DebugSession) -> None:
+        try:
+            await session.close_connection()
+        except Exception as e:
+            print(f"An exception was thrown: {e}")
+
+        await self.release(session)
+
+    async def _reap_idle_sessions(self) -> None:
+        while True:
+            try:
+                await sleep(min(self._idle_timeout, 30))
+
+                now = monotonic()
+                for session in list(self._sessions.values()):
+                    # Команда еще выполняется (длинный CONTINUE или RUN_LIVE): сессия не простаивает
+                    if session.busy:
+                        continue
+
+                    if now - session.last_activity > self._idle_timeout:
+                        print(f"Closing idle debug session: {session.session_id}")
+                        await self._close(session)
+            except Exception as e:
+                print(f"An exception was thrown: {e}")
+
+
+session_registry = SessionRegistry(
+    settings.MAX_DEBUG_SESSIONS,
+    settings.SESSION_ADMISSION_TIMEOUT,
+    settings.SESSION_IDLE_TIMEOUT,
+    settings.SESSION_TEARDOWN_TIMEOUT
+)
@@ -1,13 +1,22 @@
-from asyncio import create_subprocess_exec
+from asyncio import create_subprocess_exec, to_thread, wait_for, TimeoutError as AsyncTimeoutError
 from dataclasses import dataclass
-from os import makedirs
+from hashlib import sha256
 from pathlib import Path
-from shutil import copy
 from subprocess import PIPE
+from types import ModuleType
+from typing import Optional
 from uuid import UUID, uuid4
 
 from app.settings import settings
+from app.core.breakpoints import BREAKPOINT_INDEX_FILENAME, Breakpoint, dump_breakpoint_index, find_breakpoints
+from app.service.metrics import code_info_extraction_seconds, translation_seconds, workspace_preparation_seconds
+from app.service.cache import TranslationCache, translation_key
+from app.service.program import session_programs
+from app.service.translator_pool import TranslatorWorkerPool, TranslatorPoolError
 from app.service.util.context import python_code_context
+from app.service.util.files import write_text_atomic
+from app.service.util.worker import ResidentWorkerPool
+from app.service.workspace import workspace_manager
 
 
 @dataclass(frozen=True)
@@ -24,50 +33,203 @@ class CodeInfo:
     value_by_output_variable: dict[str, str]
 
 
+@dataclass(frozen=True)
+class TranslationResult:
+    python_code: str
+    translator_output: TranslatorOutput
+    code_info: CodeInfo
+    breakpoints: list[Breakpoint]
+
+
 class DebuggingRequestProcessor:
     def __init__(self) -> None:
         self._post_code_translator = PostCodeTranslator()
         self._code_info_extractor = CodeInfoExtractor()
 
+        self._translation_cache = TranslationCache[TranslationResult](
+            settings.TRANSLATION_CACHE_MAX_ENTRIES,
+            settings.TRANSLATION_CACHE_MAX_BYTES,
+            settings.TRANSLATION_CACHE_TTL
+        )
+
+    async def start(self) -> None:
+        await self._post_code_translator.start()
+
+    async def stop(self) -> None:
+        await self._post_code_translator.stop()
+        await self._code_info_extractor.stop()
+
+    @property
+    def translation_cache(self) -> TranslationCache[TranslationResult]:
+        return self._translation_cache
+
     async def process(self, post_code: str) -> tuple[UUID, TranslatorOutput, CodeInfo]:
         uuid = uuid4()
-        translation_path = await self._prepare_translation_path(uuid)
-        translator_output = await self._post_code_translator.translate(post_code, translation_path)
-        code_info = await self._code_info_extractor.extract(translation_path)
-        return uuid, translator_output, code_info
+        with workspace_preparation_seconds.time():
+            translation_path = workspace_manager.create(uuid)
+
+        try:
+            # Пока идет трансляция, каталог не должен попасть под сборку
+            await workspace_manager.pin(uuid)
+            return uuid, *await self._process(post_code, translation_path)
+        finally:
+            workspace_manager.unpin(uuid)
+
+    async def _process(self, post_code: str, translation_path: Path) -> tuple[TranslatorOutput, CodeInfo]:
+        translator_version = await self._post_code_translator.version()
+        key = translation_key(post_code, translator_version)
+
+        cached_result = self._translation_cache.get(key)
+        if cached_result is not None:
+            with workspace_preparation_seconds.time():
+                await self._restore_translation(cached_result, post_code, translation_path)
+            return cached_result.translator_output, cached_result.code_info
+
+        with translation_seconds.time():
+            translator_output = await self._post_code_translator.translate(post_code, translation_path)
+
+        # После неудачной трансляции python_code.py нет: извлекать нечего
+        if translator_output.return_code != 0:
+            return translator_output, CodeInfo({}, {}, {})
+
+        with code_info_extraction_seconds.time():
+            code_info = await self._code_info_extractor.extract(translation_path)
+
+        python_code = await to_thread((translation_path / "python_code.py").read_text, encoding="utf-8")
+        breakpoints = await self._index_breakpoints(python_code, translation_path)
+        await self._finalize_program(translation_path, python_code, breakpoints)
+
+        # Кэшируются только успешные трансляции, чтобы не закреплять случайные сбои транслятора
+        result = TranslationResult(python_code, translator_output, code_info, breakpoints)
+        self._translation_cache.put(key, result, len(python_code.encode("utf-8")))
+
+        return translator_output, code_info
+
+    async def _restore_translation(self, result: TranslationResult, post_code: str, translation_path: Path) -> None:
+        await to_thread(self._write_translation, result, post_code, translation_path)
+        await self._finalize_program(translation_path, result.python_code, result.breakpoints)
+
+    @staticmethod
+    def _write_translation(result: TranslationResult, post_code: str, translation_path: Path) -> None:
+        write_text_atomic(translation_path / "post_code.post", post_code)
+        write_text_atomic(translation_path / "python_code.py", result.python_code)
+        DebuggingRequestProcessor._write_breakpoint_index(translation_path, result.breakpoints)
+
+    # Код сессий отладки собирается и компилируется сразу: открытие сессии его уже не читает и не компилирует
+    @staticmethod
+    async def _finalize_program(translation_path: Path, python_code: str, breakpoints: list[Breakpoint]) -> None:
+        try:
+            await to_thread(session_programs.finalize, translation_path, python_code, breakpoints)
+        except SyntaxError as e:
+            print(f"Failed to compile the debugging program: {e}")
+
+    @staticmethod
+    async def _index_breakpoints(python_code: str, translation_path: Path) -> list[Breakpoint]:
+        try:
+            breakpoints = await to_thread(find_breakpoints, python_code)
+        except SyntaxError as e:
+            print(f"Failed to index breakpoints: {e}")
+            breakpoints = []
+
+        await to_thread(DebuggingRequestProcessor._write_breakpoint_index, translation_path, breakpoints)
+        return breakpoints
+
+    @staticmethod
+    def _write_breakpoint_index(translation_path: Path, breakpoints: list[Breakpoint]) -> None:
+        write_text_atomic(translation_path / BREAKPOINT_INDEX_FILENAME, dump_breakpoint_index(breakpoints))
 
-    async def _prepare_translation_path(self, uuid: UUID) -> Path:
-        makedirs(settings.TRANSLATION_PATH, exist_ok=True)
 
-        post2py_path = settings.RESOURCES_PATH / "post2py.jar"
-        copy(post2py_path, settings.TRANSLATION_PATH)
+class PostCodeTranslator:
+    def __init__(self) -> None:
+        self._version: Optional[str] = None
+        self._pool: Optional[TranslatorWorkerPool] = None
+
+    async def start(self) -> None:
+        if settings.TRANSLATOR_POOL_COMMAND is None or settings.TRANSLATOR_POOL_SIZE <= 0:
+            return
+
+        translator_path = settings.RESOURCES_PATH / "post2py.jar"
+        command = [part.format(translator_path=translator_path) for part in settings.TRANSLATOR_POOL_COMMAND]
+
+        pool = TranslatorWorkerPool(
+            command,
+            settings.RESOURCES_PATH,
+            settings.TRANSLATOR_POOL_SIZE,
+            settings.TRANSLATOR_JOB_TIMEOUT,
+            settings.TRANSLATOR_HEALTH_CHECK_INTERVAL
+        )
 
-        translation_path = settings.TRANSLATION_PATH / str(uuid)
-        makedirs(translation_path)
+        try:
+            await pool.start()
+        except TranslatorPoolError as e:
+            print(f"Failed to start translator pool, falling back to one-shot translation: {e}")
+            await pool.stop()
+            return
 
-        mute_types_path = settings.RESOURCES_PATH / "MuteTypes.py"
-        copy(mute_types_path, translation_path)
+        self._pool = pool
 
-        return translation_path
+    async def stop(self) -> None:
+        if self._pool is not None:
+            await self._pool.stop()
+            self._pool = None
 
+    async def version(self) -> str:
+        if self._version is None:
+            if settings.TRANSLATOR_VERSION is not None:
+                self._version = settings.TRANSLATOR_VERSION
+            else:
+                post2py_path = settings.RESOURCES_PATH / "post2py.jar"
+                self._version = await to_thread(self._hash_file, post2py_path)
+
+        return self._version
+
+    @staticmethod
+    def _hash_file(path: Path) -> str:
+        digest = sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+
+        return digest.hexdigest()
 
-class PostCodeTranslator:
     async def translate(self, post_code: str, destination_path: Path) -> TranslatorOutput:
         post_code_path = destination_path / "post_code.post"
-        with open(post_code_path, "w", encoding="utf-8") as f:
-            f.write(post_code)
+        await to_thread(write_text_atomic, post_code_path, post_code)
 
-        translator_path = settings.TRANSLATION_PATH / "post2py.jar"
         python_code_path = destination_path / "python_code.py"
 
+        if self._pool is not None:
+            try:
+                return_code, stdout, stderr = await self._pool.translate(post_code_path, python_code_path.name)
+                return TranslatorOutput(return_code, stdout, stderr)
+            except TranslatorPoolError as e:
+                print(f"Translator pool failed, falling back to one-shot translation: {e}")
+
+        return await self._translate_once(post_code_path, python_code_path)
+
+    async def _translate_once(self, post_code_path: Path, python_code_path: Path) -> TranslatorOutput:
+        translator_path = settings.RESOURCES_PATH / "post2py.jar"
+        destination_path = post_code_path.parent
+
+        command = [
+            part.format(translator_path=translator_path, source=post_code_path, output=python_code_path.name)
+            for part in settings.TRANSLATOR_COMMAND
+        ]
+
         process = await create_subprocess_exec(
-            "java", "-jar", str(translator_path), str(post_code_path), f"-o={python_code_path.name}",
+            *command,
             cwd=destination_path,
             stdout=PIPE,
             stderr=PIPE
         )
 
-        stdout_bytes, stderr_bytes = await process.communicate()
+        try:
+            stdout_bytes, stderr_bytes = await wait_for(process.communicate(), settings.TRANSLATION_TIMEOUT)
+        except AsyncTimeoutError:
+            # Зависший транслятор не должен держать задачу трансляции и каталог сессии
+            process.kill()
+            await process.wait()
+            return TranslatorOutput(-1, "", f"Translator did not finish in {settings.TRANSLATION_TIMEOUT} seconds")
 
         stdout = stdout_bytes.decode("utf-8") if stdout_bytes else ""
         stderr = stderr_bytes.decode("utf-8") if stderr_bytes else ""
@@ -77,53 +239,71 @@ class PostCodeTranslator:
 
 
 class CodeInfoExtractor:
+    def __init__(self) -> None:
+        self._workers = ResidentWorkerPool(settings.CODE_INFO_WORKERS, settings.CODE_INFO_WORKER_MAX_JOBS)
+
+    async def stop(self) -> None:
+        await self._workers.stop()
+
     async def extract(self, translation_path: Path) -> CodeInfo:
-        states_by_process = await self._extract_states_by_process(translation_path)
-        value_by_input_variable = await self._extract_value_by_input_variable(translation_path)
-        value_by_output_variable = await self._extract_value_by_output_variable(translation_path)
+        # Транслированный модуль исполняется в рабочем процессе пула: зависший код не блокирует сервер,
+        # а процесс не запускается заново на каждую трансляцию
+        return await self._workers.run(
+            self._extract_code_info,
+            translation_path,
+            timeout=settings.CODE_INFO_EXTRACTION_TIMEOUT
+        )
+
+    @staticmethod
+    def _extract_code_info(translation_path: Path) -> CodeInfo:
+        with python_code_context(translation_path) as module:
+            states_by_process = CodeInfoExtractor._extract_states_by_process(module)
+            value_by_input_variable = CodeInfoExtractor._extract_value_by_input_variable(module)
+            value_by_output_variable = CodeInfoExtractor._extract_value_by_output_variable(module)
+
         return CodeInfo(states_by_process, value_by_input_variable, value_by_output_variable)
 
-    async def _extract_states_by_process(self, translation_path: Path) -> dict[str, list[str]]:
+    @staticmethod
+    def _extract_states_by_process(module: ModuleType) -> dict[str, list[str]]:
         states_by_process: dict[str, list[str]] = {}
 
-        with python_code_context(translation_path) as module:
-            processes = getattr(module, "processesDict", {})
+        processes = getattr(module, "processesDict", {})
 
-            for process_name, process_instance in processes.items():
-                states = getattr(process_instance, "States", None)
+        for process_name, process_instance in processes.items():
+            states = getattr(process_instance, "States", None)
+            if states is None:
+                states = getattr(process_instance.__class__, "States", None)
                 if states is None:
-                    states = getattr(process_instance.__class__, "States", None)
-                    if states is None:
-                        states_by_process[process_name] = []
-                        continue
+                    states_by_process[process_name] = []
+                    continue
 
-                try:
-                    members = list(states)
-                    states_by_process[process_name] = [m.name for m in members]
-                except Exception:
-                    states_by_process[process_name] = list(getattr(states, "__members__", {}).keys())
+            try:
+                members = list(states)
+                states_by_process[process_name] = [m.name for m in members]
+            except Exception:
+                states_by_process[process_name] = list(getattr(states, "__members__", {}).keys())
 
         return states_by_process
 
-    async def _extract_value_by_input_variable(self, translation_path: Path) -> dict[str, str]:
+    @staticmethod
+    def _extract_value_by_input_variable(module: ModuleType) -> dict[str, str]:
         value_by_input_variable: dict[str, str] = {}
 
-        with python_code_context(translation_path) as module:
-            input_variables = getattr(module, "inVars", {})
+        input_variables = getattr(module, "inVars", {})
 
-            for variable_name, variable_value in input_variables.items():
-                value_by_input_variable[variable_name] = str(variable_value).lower()
+        for variable_name, variable_value in input_variables.items():
+            value_by_input_variable[variable_name] = str(variable_value).lower()
 
         return value_by_input_variable
 
-    async def _extract_value_by_output_variable(self, translation_path: Path) -> dict[str, str]:
+    @staticmethod
+    def _extract_value_by_output_variable(module: ModuleType) -> dict[str, str]:
         value_by_output_variable: dict[str, str] = {}
 
-        with python_code_context(translation_path) as module:
-            output_variables = getattr(module, "outVars", {})
+        output_variables = getattr(module, "outVars", {})
 
-            for variable_name, variable_value in output_variables.items():
-                value_by_output_variable[variable_name] = str(variable_value).lower()
+        for variable_name, variable_value in output_variables.items():
+            value_by_output_variable[variable_name] = str(variable_value).lower()
 
         return value_by_output_variable
 
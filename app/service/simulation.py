@@ -0,0 +1,239 @@
+from csv import reader as csv_reader
+from dataclasses import dataclass, field
+from io import StringIO
+from pathlib import Path
+from time import perf_counter, process_time
+from typing import Any, Literal, Optional, Union
+from uuid import UUID
+
+from app.settings import settings
+from app.core.profiler import SamplingProfiler
+from app.core.util.output import build_program_output
+from app.core.util.variables import coerce_variable_value
+from app.service.profiling import write_profile
+from app.service.program import session_programs
+from app.service.util.context import compile_python_code, python_code_namespace
+from app.service.util.worker import run_in_process
+from app.service.workspace import workspace_manager
+
+InputValue = Union[bool, int, float, str]
+
+StopReason = Literal["cycles", "wall_time", "cpu_time"]
+
+
+# Значения входных переменных, которые применяются перед циклом с номером cycle (нумерация с нуля)
+@dataclass(frozen=True)
+class ScenarioStep:
+    cycle: int
+    values: dict[str, InputValue]
+
+
+# Сценарий в CSV: первый столбец cycle, остальные — входные переменные; пустая ячейка оставляет значение
+# прежним. Например:
+#   cycle,start,level
+#   0,true,0
+#   100,,7
+# Строк с шагами не больше max_steps: слишком длинный сценарий отвергается, не разбираясь до конца
+def parse_scenario_csv(text: str, max_steps: int) -> list[ScenarioStep]:
+    rows = csv_reader(StringIO(text))
+    header = next(rows, None)
+    if not header or header[0].strip() != "cycle":
+        raise ValueError("Scenario CSV must start with a cycle column")
+
+    names = [name.strip() for name in header[1:]]
+    steps: list[ScenarioStep] = []
+    for line_number, row in enumerate(rows, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        if len(steps) >= max_steps:
+            raise ValueError(f"Too many scenario steps (max {max_steps})")
+
+        try:
+            cycle = int(row[0])
+        except ValueError:
+            raise ValueError(f"Invalid cycle on line {line_number}: {row[0]!r}")
+        if cycle < 0:
+            raise ValueError(f"Negative cycle on line {line_number}: {cycle}")
+        if len(row) > len(header):
+            raise ValueError(f"Too many values on line {line_number}")
+
+        values: dict[str, InputValue] = {name: cell.strip() for name, cell in zip(names, row[1:]) if cell.strip()}
+        steps.append(ScenarioStep(cycle, values))
+
+    return steps
+
+
+@dataclass(frozen=True)
+class SimulationTrace:
+    cycle: int
+    process_states: dict[str, Any]
+    input_variables: dict[str, Any]
+    output_variables: dict[str, Any]
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    cycles: int
+    stop_reason: StopReason
+    wall_seconds: float
+    cpu_seconds: float
+    iterations_per_second: float
+    # Шаги сценария, примененные до остановки прогона
+    scenario_steps: int
+    process_states: dict[str, Any]
+    input_variables: dict[str, Any]
+    output_variables: dict[str, Any]
+    traces: list[SimulationTrace] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class SimulationParameters:
+    input_values: dict[str, InputValue]
+    max_cycles: int
+    wall_time_budget: Optional[float]
+    cpu_time_budget: Optional[float]
+    # Снимок каждые trace_every циклов; 0 — без трасс
+    trace_every: int
+    # Профиль прогона сохраняется в каталоге трансляции
+    profile: bool = False
+    # Изменения входных переменных по циклам, применяемые внутри процесса прогона
+    scenario: list[ScenarioStep] = field(default_factory=list)
+
+
+# Исполняет транслированную программу без отладчика: N вызовов run_iter или до исчерпания бюджета времени
+class ProgramSimulator:
+    # Часы опрашиваются не на каждом цикле: их вызов сопоставим по стоимости с коротким run_iter
+    _BUDGET_CHECK_INTERVAL = 64
+
+    async def simulate(self, uuid: UUID, parameters: SimulationParameters) -> SimulationResult:
+        translation_path = workspace_manager.path(uuid)
+        try:
+            # Каталог проверяется после закрепления: до него он мог попасть под сборку
+            await workspace_manager.pin(uuid)
+            if not (translation_path / "python_code.py").exists():
+                raise FileNotFoundError(f"Translation not found: {uuid}")
+
+            # Зависший run_iter не должен занять сервер: процесс завершается по таймауту
+            return await run_in_process(
+                self._simulate,
+                translation_path,
+                parameters,
+                timeout=settings.SIMULATION_TIMEOUT
+            )
+        finally:
+            workspace_manager.unpin(uuid)
+
+    @staticmethod
+    def _simulate(translation_path: Path, parameters: SimulationParameters) -> SimulationResult:
+        program_globals = ProgramSimulator._load_program(translation_path)
+
+        input_variables = program_globals.get("inVars", {})
+        for variable, value in ProgramSimulator._bind_values(parameters.input_values, input_variables):
+            variable.__set__(value)
+
+        scenario = ProgramSimulator._bind_scenario(parameters.scenario, input_variables)
+        scenario_steps = 0
+        next_step_cycle = scenario[0][0] if scenario else -1
+
+        program = program_globals["Program"]()
+        run_iter = program.run_iter
+
+        max_cycles = min(parameters.max_cycles, settings.SIMULATION_MAX_CYCLES)
+        wall_deadline = parameters.wall_time_budget
+        cpu_deadline = parameters.cpu_time_budget
+        trace_every = parameters.trace_every
+        check_interval = ProgramSimulator._BUDGET_CHECK_INTERVAL
+
+        traces: list[SimulationTrace] = []
+        stop_reason: StopReason = "cycles"
+
+        wall_start, cpu_start = perf_counter(), process_time()
+        if wall_deadline is not None:
+            wall_deadline += wall_start
+        if cpu_deadline is not None:
+            cpu_deadline += cpu_start
+
+        profiler = None
+        if parameters.profile:
+            profiler = SamplingProfiler("simulation", str(translation_path / "python_code.py"),
+                                        settings.PROFILE_SAMPLE_INTERVAL)
+            profiler.start()
+
+        cycles = 0
+        while cycles < max_cycles:
+            if cycles == next_step_cycle:
+                for variable, value in scenario[scenario_steps][1]:
+                    variable.__set__(value)
+                scenario_steps += 1
+                next_step_cycle = scenario[scenario_steps][0] if scenario_steps < len(scenario) else -1
+
+            run_iter()
+            cycles += 1
+
+            if trace_every and cycles % trace_every == 0 and len(traces) < settings.SIMULATION_MAX_TRACES:
+                traces.append(SimulationTrace(cycle=cycles, **build_program_output(program_globals)))
+
+            if cycles % check_interval == 0:
+                if wall_deadline is not None and perf_counter() >= wall_deadline:
+                    stop_reason = "wall_time"
+                    break
+                if cpu_deadline is not None and process_time() >= cpu_deadline:
+                    stop_reason = "cpu_time"
+                    break
+
+        wall_seconds, cpu_seconds = perf_counter() - wall_start, process_time() - cpu_start
+
+        if profiler is not None:
+            write_profile(translation_path, profiler.stop())
+
+        return SimulationResult(
+            cycles=cycles,
+            stop_reason=stop_reason,
+            wall_seconds=wall_seconds,
+            cpu_seconds=cpu_seconds,
+            iterations_per_second=cycles / wall_seconds if wall_seconds > 0 else 0.0,
+            scenario_steps=scenario_steps,
+            traces=traces,
+            **build_program_output(program_globals)
+        )
+
+    # Значения приводятся к типам переменных один раз, до прогона: в цикле остается только присваивание.
+    # Значение неподходящего типа отвергается до первого цикла
+    @staticmethod
+    def _bind_values(values: dict[str, InputValue], input_variables: dict[str, Any]) -> list[tuple[Any, Any]]:
+        bound_values = []
+        for variable_name, value in values.items():
+            if variable_name not in input_variables:
+                raise KeyError(f"Unknown input variable: {variable_name}")
+
+            variable = input_variables[variable_name]
+            try:
+                bound_values.append((variable, coerce_variable_value(variable, value)))
+            except ValueError as e:
+                raise ValueError(f"Invalid value for input variable {variable_name}: {e}")
+
+        return bound_values
+
+    # Шаги одного цикла объединяются; результат упорядочен по номеру цикла
+    @staticmethod
+    def _bind_scenario(
+            steps: list[ScenarioStep],
+            input_variables: dict[str, Any]
+    ) -> list[tuple[int, list[tuple[Any, Any]]]]:
+        bound_steps: dict[int, list[tuple[Any, Any]]] = {}
+        for step in sorted(steps, key=lambda s: s.cycle):
+            bound_steps.setdefault(step.cycle, []).extend(ProgramSimulator._bind_values(step.values, input_variables))
+
+        return list(bound_steps.items())
+
+    @staticmethod
+    def _load_program(translation_path: Path) -> dict[str, Any]:
+        python_code_path = translation_path / "python_code.py"
+        python_code_source = session_programs.strip_addition(python_code_path.read_text(encoding="utf-8"))
+
+        program_globals = python_code_namespace("__postdb_simulation__")
+        exec(compile_python_code(python_code_source, python_code_path), program_globals)
+        return program_globals
+
+
+program_simulator = ProgramSimulator()
@@ -0,0 +1,210 @@
+from asyncio import Queue, StreamReader, Task, create_subprocess_exec, create_task, wait_for, sleep, \
+    TimeoutError as AsyncTimeoutError
+from asyncio.subprocess import Process
+from json import dumps, loads
+from pathlib import Path
+from subprocess import PIPE
+from typing import Any, Optional
+
+
+class TranslatorPoolError(Exception):
+    pass
+
+
+# Протокол обмена с резидентным транслятором: по одному JSON-объекту на строку в stdin/stdout.
+# Запрос трансляции: {"id": 1, "type": "translate", "source": "...", "output": "python_code.py", "cwd": "..."}
+# Проверка живости: {"id": 2, "type": "ping"}
+# Ответ: {"id": 1, "return_code": 0, "stdout": "...", "stderr": "..."}
+# post2py.jar протокол не поддерживает: TRANSLATOR_POOL_COMMAND запускает обертку-сервер вокруг транслятора;
+# тесты пула работают с заглушкой benchmarks/stub_translator.py --serve
+# stderr процесса читается постоянно, чтобы заполненный канал не остановил транслятор; последние
+# _STDERR_TAIL байт, записанные во время запроса, попадают в сообщение об ошибке, если запрос не удался
+class TranslatorWorker:
+    _STREAM_LIMIT = 16 * 1024 * 1024
+    _STDERR_TAIL = 16 * 1024
+    # Сколько ждать остатка stderr после завершения процесса
+    _STDERR_DRAIN_TIMEOUT = 1.0
+
+    def __init__(self, command: list[str], cwd: Path) -> None:
+        self._command = command
+        self._cwd = cwd
+
+        self._process: Optional[Process] = None
+        self._stderr_task: Optional[Task[None]] = None
+        self._stderr = bytearray()
+        self._next_request_id = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def start(self) -> None:
+        try:
+            self._process = await create_subprocess_exec(
+                *self._command,
+                cwd=self._cwd,
+                stdin=PIPE,
+                stdout=PIPE,
+                stderr=PIPE,
+                limit=self._STREAM_LIMIT
+            )
+        except OSError as e:
+            raise TranslatorPoolError(f"Failed to start translator worker: {e}") from e
+
+        self._stderr.clear()
+        if self._process.stderr is not None:
+            self._stderr_task = create_task(self._read_stderr(self._process.stderr))
+
+    async def stop(self) -> None:
+        if self._process is None:
+            return
+
+        process, self._process = self._process, None
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+        stderr_task, self._stderr_task = self._stderr_task, None
+        if stderr_task is not None:
+            try:
+                await wait_for(stderr_task, self._STDERR_DRAIN_TIMEOUT)
+            except AsyncTimeoutError:
+                pass
+
+    async def restart(self) -> None:
+        await self.stop()
+        await self.start()
+
+    async def ping(self, timeout: float) -> None:
+        await self.request({"type": "ping"}, timeout)
+
+    async def translate(self, source_path: Path, output_name: str, timeout: float) -> tuple[int, str, str]:
+        response = await self.request(
+            {"type": "translate", "source": str(source_path), "output": output_name, "cwd": str(source_path.parent)},
+            timeout
+        )
+        return int(response.get("return_code", -1)), str(response.get("stdout", "")), str(response.get("stderr", ""))
+
+    async def request(self, payload: dict[str, Any], timeout: float) -> dict[str, Any]:
+        if self._process is None or self._process.stdin is None or self._process.stdout is None:
+            raise TranslatorPoolError("Translator worker is not running")
+
+        self._next_request_id += 1
+        request_id = self._next_request_id
+        self._stderr.clear()
+
+        try:
+            self._process.stdin.write((dumps({"id": request_id, **payload}) + "\n").encode("utf-8"))
+            await self._process.stdin.drain()
+
+            line = await wait_for(self._process.stdout.readline(), timeout)
+        except AsyncTimeoutError as e:
+            # Зависший или упавший процесс дальше использовать нельзя
+            raise await self._fail(f"Translator worker did not respond in {timeout} seconds") from e
+        except OSError as e:
+            raise await self._fail(f"Translator worker failed: {e!r}") from e
+
+        if not line:
+            # Процесс закрыл stdout: даем ему завершиться, чтобы узнать код выхода
+            try:
+                await wait_for(self._process.wait(), self._STDERR_DRAIN_TIMEOUT)
+            except AsyncTimeoutError:
+                pass
+            raise await self._fail("Translator worker exited unexpectedly")
+
+        try:
+            response: dict[str, Any] = loads(line)
+        except ValueError as e:
+            raise await self._fail(f"Malformed translator worker response: {e}") from e
+
+        if response.get("id") != request_id:
+            raise await self._fail(f"Unexpected response id: {response.get('id')}")
+
+        return response
+
+    # Останавливает процесс и возвращает ошибку с тем, что он успел написать в stderr
+    async def _fail(self, message: str) -> TranslatorPoolError:
+        returncode = self._process.returncode if self._process is not None else None
+        await self.stop()
+
+        if returncode is not None:
+            message += f" (exit code {returncode})"
+
+        stderr = self._stderr.decode("utf-8", errors="replace").strip()
+        if stderr:
+            message += f"\nstderr:\n{stderr}"
+
+        return TranslatorPoolError(message)
+
+    async def _read_stderr(self, stream: StreamReader) -> None:
+        while chunk := await stream.read(4096):
+            self._stderr += chunk
+            if len(self._stderr) > self._STDERR_TAIL:
+                del self._stderr[:-self._STDERR_TAIL]
+
+
+class TranslatorWorkerPool:
+    def __init__(
+            self,
+            command: list[str],
+            cwd: Path,
+            size: int,
+            job_timeout: float,
+            health_check_interval: float
+    ) -> None:
+        self._workers = [TranslatorWorker(command, cwd) for _ in range(size)]
+        self._idle_workers = Queue[TranslatorWorker]()
+
+        self._job_timeout = job_timeout
+        self._health_check_interval = health_check_interval
+        self._health_check_task: Optional[Task[None]] = None
+
+    async def start(self) -> None:
+        for worker in self._workers:
+            await worker.start()
+            self._idle_workers.put_nowait(worker)
+
+        self._health_check_task = create_task(self._check_health())
+
+    async def stop(self) -> None:
+        if self._health_check_task is not None:
+            self._health_check_task.cancel()
+            self._health_check_task = None
+
+        for worker in self._workers:
+            await worker.stop()
+
+    async def translate(self, source_path: Path, output_name: str) -> tuple[int, str, str]:
+        worker = await self._idle_workers.get()
+
+        try:
+            if not worker.alive:
+                await worker.restart()
+
+            return await worker.translate(source_path, output_name, self._job_timeout)
+        finally:
+            self._idle_workers.put_nowait(worker)
+
+    async def _check_health(self) -> None:
+        while True:
+            try:
+                await sleep(self._health_check_interval)
+
+                # Проверяем только простаивающих воркеров, чтобы не задерживать трансляции
+                for _ in range(self._idle_workers.qsize()):
+                    worker = self._idle_workers.get_nowait()
+                    try:
+                        if worker.alive:
+                            await worker.ping(self._job_timeout)
+                        else:
+                            await worker.restart()
+                    except TranslatorPoolError as e:
+                        print(f"Translator worker health check failed: {e}")
+                        try:
+                            await worker.restart()
+                        except TranslatorPoolError as restart_error:
+                            print(f"Failed to restart translator worker: {restart_error}")
+                    finally:
+                        self._idle_workers.put_nowait(worker)
+            except Exception as e:
+                print(f"An exception was thrown: {e}")
@@ -1,25 +1,43 @@
 from contextlib import contextmanager
-from importlib.util import spec_from_file_location, module_from_spec
 from pathlib import Path
-from sys import path
-from types import ModuleType
-from typing import Iterator
+from types import CodeType, ModuleType
+from typing import Any, Iterator
+
+from app.settings import settings
+from app.core.loader import ProgramLoader
+
+program_loader = ProgramLoader(settings.PROGRAM_CODE_CACHE_MAX_ENTRIES)
+
+
+def compile_python_code(python_code_source: str, python_code_path: Path) -> CodeType:
+    return program_loader.compile(python_code_source, str(python_code_path))
+
+
+# MuteTypes общий для всех трансляций и загружается из каталога ресурсов
+def python_code_namespace(name: str) -> dict[str, Any]:
+    return program_loader.namespace(name, _mute_types_path())
+
+
+def _mute_types_path() -> Path:
+    return settings.RESOURCES_PATH / "MuteTypes.py"
+
+
+# Модуль импортируется в forkserver до запуска рабочих процессов: MuteTypes загружается заранее
+# и достается рабочим процессам уже готовым
+try:
+    program_loader.mute_types(_mute_types_path())
+except (OSError, ImportError) as e:
+    print(f"Failed to preload MuteTypes: {e}")
 
 
 @contextmanager
 def python_code_context(translation_path: Path) -> Iterator[ModuleType]:
-    spec = spec_from_file_location(translation_path.name, translation_path / "python_code.py")
-    if spec is None:
-        raise ImportError(f"Unable to load spec for {translation_path}")
-    elif spec.loader is None:
-        raise ImportError(f"Spec loader is missing for {translation_path}")
-
-    module = module_from_spec(spec)
+    python_code_path = translation_path / "python_code.py"
+    python_code_source = python_code_path.read_text(encoding="utf-8")
 
-    path.insert(0, str(translation_path))
+    module = ModuleType(translation_path.name)
+    module.__dict__.update(python_code_namespace(translation_path.name))
+    module.__file__ = str(python_code_path)
 
-    try:
-        spec.loader.exec_module(module)
-        yield module
-    finally:
-        path.pop(0)
+    exec(compile_python_code(python_code_source, python_code_path), module.__dict__)
+    yield module
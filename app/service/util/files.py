@@ -0,0 +1,20 @@
+from os import replace
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+
+# Файл появляется под своим именем только целиком: читатель не увидит частично записанное содержимое
+def write_text_atomic(path: Path, content: str) -> None:
+    write_bytes_atomic(path, content.encode("utf-8"))
+
+
+def write_bytes_atomic(path: Path, content: bytes) -> None:
+    with NamedTemporaryFile("wb", dir=path.parent, prefix=f".{path.name}.", delete=False) as f:
+        f.write(content)
+        temporary_path = Path(f.name)
+
+    try:
+        replace(temporary_path, path)
+    except BaseException:
+        temporary_path.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,193 @@
+from asyncio import Queue, get_running_loop, to_thread, wait_for, TimeoutError as AsyncTimeoutError
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from multiprocessing.context import ForkContext, ForkServerContext, SpawnContext
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable, Optional, TypeVar
+
+from app.settings import settings
+
+T = TypeVar("T")
+
+
+def _get_worker_context() -> ForkServerContext | SpawnContext | ForkContext:
+    if settings.WORKER_START_METHOD == "spawn":
+        return get_context("spawn")
+    elif settings.WORKER_START_METHOD == "fork":
+        return get_context("fork")
+
+    return get_context("forkserver")
+
+
+worker_context = _get_worker_context()
+if isinstance(worker_context, ForkServerContext):
+    # Настройки и загрузчик программ импортируются один раз в forkserver, а не в каждом рабочем процессе
+    worker_context.set_forkserver_preload(["app.settings", "app.service.util.context"])
+
+
+class WorkerError(Exception):
+    pass
+
+
+class WorkerTimeoutError(WorkerError):
+    pass
+
+
+def _run_function(function: Callable[..., Any], args: tuple[Any, ...], connection: Connection) -> None:
+    try:
+        result = function(*args)
+    except BaseException as e:
+        # Исключение передаем строкой: исходный объект может не сериализоваться через pickle
+        connection.send((False, f"{type(e).__name__}: {e}"))
+    else:
+        connection.send((True, result))
+    finally:
+        connection.close()
+
+
+# Запускает функцию в отдельном процессе, который можно гарантированно завершить по таймауту
+async def run_in_process(function: Callable[..., T], *args: Any, timeout: float) -> T:
+    receiver, sender = worker_context.Pipe(duplex=False)
+    process = worker_context.Process(target=_run_function, args=(function, args, sender), daemon=True)
+    # Запуск (fork или запрос к forkserver) и ожидание завершения процесса не занимают цикл событий
+    await to_thread(process.start)
+    sender.close()
+
+    loop = get_running_loop()
+    readable = loop.create_future()
+
+    def on_readable() -> None:
+        if not readable.done():
+            readable.set_result(None)
+
+    loop.add_reader(receiver.fileno(), on_readable)
+
+    try:
+        await wait_for(readable, timeout)
+        loop.remove_reader(receiver.fileno())
+        # Готовность канала означает только начало записи: результат дочитывается в потоке
+        success, payload = await to_thread(receiver.recv)
+    except AsyncTimeoutError:
+        raise WorkerTimeoutError(f"Worker did not finish in {timeout} seconds")
+    except EOFError:
+        await to_thread(process.join)
+        raise WorkerError(f"Worker exited with code {process.exitcode}")
+    finally:
+        loop.remove_reader(receiver.fileno())
+
+        if process.is_alive():
+            process.kill()
+        await to_thread(process.join)
+        receiver.close()
+
+    if not success:
+        raise WorkerError(payload)
+
+    result: T = payload
+    return result
+
+
+def _serve_functions(connection: Connection) -> None:
+    while True:
+        try:
+            function, args = connection.recv()
+        except EOFError:
+            return
+
+        try:
+            result = function(*args)
+        except BaseException as e:
+            connection.send((False, f"{type(e).__name__}: {e}"))
+        else:
+            connection.send((True, result))
+
+
+# Резидентный рабочий процесс: выполняет функции по одной, не запуская процесс на каждый вызов.
+# Процесс, не уложившийся в таймаут или завершившийся, убивается; следующий вызов запустит новый
+class ResidentWorker:
+    def __init__(self) -> None:
+        self._process: Optional[BaseProcess] = None
+        self._connection: Optional[Connection] = None
+        self.jobs = 0
+
+    async def run(self, function: Callable[..., T], args: tuple[Any, ...], timeout: float) -> T:
+        if self._process is None or self._connection is None:
+            self._process, self._connection = await self._start()
+        process, connection = self._process, self._connection
+
+        self.jobs += 1
+        loop = get_running_loop()
+        readable = loop.create_future()
+
+        def on_readable() -> None:
+            if not readable.done():
+                readable.set_result(None)
+
+        try:
+            await to_thread(connection.send, (function, args))
+            loop.add_reader(connection.fileno(), on_readable)
+            try:
+                await wait_for(readable, timeout)
+            finally:
+                loop.remove_reader(connection.fileno())
+            success, payload = await to_thread(connection.recv)
+        except AsyncTimeoutError:
+            await self.stop()
+            raise WorkerTimeoutError(f"Worker did not finish in {timeout} seconds")
+        except (EOFError, OSError):
+            await self.stop()
+            raise WorkerError(f"Worker exited with code {process.exitcode}")
+        except BaseException:
+            # Отмена посреди вызова: ответ процесса потерян, процесс не переиспользуется
+            await self.stop()
+            raise
+
+        if not success:
+            raise WorkerError(payload)
+
+        result: T = payload
+        return result
+
+    async def stop(self) -> None:
+        process, connection = self._process, self._connection
+        self._process, self._connection = None, None
+        self.jobs = 0
+
+        if process is not None:
+            if process.is_alive():
+                process.kill()
+            await to_thread(process.join)
+        if connection is not None:
+            connection.close()
+
+    @staticmethod
+    async def _start() -> tuple[BaseProcess, Connection]:
+        connection, child_connection = worker_context.Pipe()
+        process = worker_context.Process(target=_serve_functions, args=(child_connection,), daemon=True)
+        await to_thread(process.start)
+        child_connection.close()
+        return process, connection
+
+
+# Пул резидентных рабочих процессов. Процесс перезапускается после max_jobs вызовов,
+# чтобы состояние, оставленное исполненным кодом, не копилось
+class ResidentWorkerPool:
+    def __init__(self, size: int, max_jobs: int) -> None:
+        self._max_jobs = max_jobs
+        self._workers = [ResidentWorker() for _ in range(size)]
+        self._idle = Queue[ResidentWorker]()
+        for worker in self._workers:
+            self._idle.put_nowait(worker)
+
+    async def run(self, function: Callable[..., T], *args: Any, timeout: float) -> T:
+        worker = await self._idle.get()
+        try:
+            return await worker.run(function, args, timeout)
+        finally:
+            if worker.jobs >= self._max_jobs:
+                await worker.stop()
+            self._idle.put_nowait(worker)
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            await worker.stop()
@@ -0,0 +1,236 @@
+from asyncio import Task, create_task, sleep, to_thread
+from dataclasses import dataclass
+from os import makedirs, rename, scandir, utime
+from pathlib import Path
+from shutil import rmtree
+from time import time
+from typing import Optional
+from uuid import UUID
+
+from app.settings import settings
+from app.service.directory import workspace_directory
+
+
+@dataclass(frozen=True)
+class WorkspaceStats:
+    workspaces: int
+    pinned: int
+    bytes_used: int
+    quota_bytes: int
+    collected: int
+    bytes_collected: int
+
+
+@dataclass(frozen=True)
+class _WorkspaceUsage:
+    name: str
+    size_bytes: int
+    last_used: float
+
+
+def _directory_size(path: str) -> int:
+    size_bytes = 0
+    with scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                size_bytes += _directory_size(entry.path)
+            else:
+                size_bytes += entry.stat(follow_symlinks=False).st_size
+
+    return size_bytes
+
+
+def _is_workspace_name(name: str) -> bool:
+    try:
+        UUID(name)
+    except ValueError:
+        return False
+    return True
+
+
+# Каталоги трансляций в TRANSLATION_PATH: по одному на запрос, без копий общих файлов.
+# Фоновая сборка удаляет каталоги, не использовавшиеся дольше TTL, а затем самые давние,
+# пока не выполнены ограничения на число каталогов и занятое место. Каталоги открытых сессий не удаляются.
+# Каталог трансляций общий для рабочих процессов узла: закрепления остальных процессов берутся
+# из workspace_directory, а время использования — из mtime каталога, который обновляется при закреплении
+class WorkspaceManager:
+    _TRASH_PREFIX = ".trash-"
+
+    def __init__(self, root: Path, ttl: float, max_bytes: int, max_workspaces: int, gc_interval: float) -> None:
+        self._root = root
+        self._ttl = ttl
+        self._max_bytes = max_bytes
+        self._max_workspaces = max_workspaces
+        self._gc_interval = gc_interval
+
+        self._last_used: dict[str, float] = {}
+        self._pins: dict[str, int] = {}
+
+        self._collected = 0
+        self._bytes_collected = 0
+        # Занятое место по последнему обходу каталогов
+        self._bytes_used = 0
+        self._gc_task: Optional[Task[None]] = None
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes_used
+
+    def path(self, uuid: UUID) -> Path:
+        return self._root / str(uuid)
+
+    async def start(self) -> None:
+        makedirs(self._root, exist_ok=True)
+        self._gc_task = create_task(self._collect_periodically())
+
+    async def stop(self) -> None:
+        if self._gc_task is not None:
+            self._gc_task.cancel()
+            self._gc_task = None
+
+    # exist_ok — каталог, переданный с другого узла, мог быть создан параллельной сессией
+    def create(self, uuid: UUID, exist_ok: bool = False) -> Path:
+        path = self.path(uuid)
+        makedirs(path, exist_ok=exist_ok)
+        self.touch(uuid)
+        workspace_directory.register(uuid)
+        return path
+
+    def touch(self, uuid: UUID) -> None:
+        self._last_used[str(uuid)] = time()
+
+        try:
+            utime(self.path(uuid))
+        except OSError:
+            pass
+
+    # Закрепление этого процесса учитывается сразу, до ожидания записи в каталог:
+    # вызывающий снимает его через unpin, даже если ожидание прервано
+    async def pin(self, uuid: UUID) -> None:
+        name = str(uuid)
+        self._pins[name] = self._pins.get(name, 0) + 1
+        self.touch(uuid)
+        await workspace_directory.pin(uuid)
+
+    def unpin(self, uuid: UUID) -> None:
+        name = str(uuid)
+        pins = self._pins.get(name, 0) - 1
+        if pins > 0:
+            self._pins[name] = pins
+        else:
+            self._pins.pop(name, None)
+        self.touch(uuid)
+        workspace_directory.unpin(uuid)
+
+    async def stats(self) -> WorkspaceStats:
+        usages = await to_thread(self._scan)
+        self._bytes_used = sum(usage.size_bytes for usage in usages)
+        return WorkspaceStats(
+            workspaces=len(usages),
+            pinned=len(self._pins),
+            bytes_used=self._bytes_used,
+            quota_bytes=self._max_bytes,
+            collected=self._collected,
+            bytes_collected=self._bytes_collected
+        )
+
+    async def collect(self) -> int:
+        usages = await to_thread(self._scan)
+
+        now = time()
+        pinned = self._pins.keys() | await workspace_directory.pinned_elsewhere()
+        candidates = sorted(
+            (usage for usage in usages if usage.name not in pinned),
+            key=lambda usage: max(usage.last_used, self._last_used.get(usage.name, 0))
+        )
+
+        workspaces = len(usages)
+        bytes_used = sum(usage.size_bytes for usage in usages)
+        self._bytes_used = bytes_used
+
+        victims = []
+        for usage in candidates:
+            last_used = max(usage.last_used, self._last_used.get(usage.name, 0))
+            expired = now - last_used > self._ttl
+            over_quota = bytes_used > self._max_bytes or workspaces > self._max_workspaces
+            if not expired and not over_quota:
+                break
+
+            victims.append(usage)
+            workspaces -= 1
+            bytes_used -= usage.size_bytes
+
+        trash_paths: list[Path] = []
+        async with workspace_directory.collecting() as pinned_elsewhere:
+            if pinned_elsewhere is None:
+                return 0
+
+            for usage in victims:
+                # Закрепления перечитаны перед переименованием: этот процесс проверяет свои в цикле событий
+                # без переключений, а другие процессы не закрепят каталог, пока база каталогов заблокирована
+                if usage.name in self._pins or usage.name in pinned_elsewhere:
+                    continue
+
+                trash_path = self._root / f"{self._TRASH_PREFIX}{usage.name}"
+                try:
+                    rename(self._root / usage.name, trash_path)
+                except OSError as e:
+                    print(f"Failed to collect workspace {usage.name}: {e}")
+                    continue
+
+                self._last_used.pop(usage.name, None)
+                self._collected += 1
+                self._bytes_collected += usage.size_bytes
+                self._bytes_used -= usage.size_bytes
+                trash_paths.append(trash_path)
+            workspace_directory.forget([path.name.removeprefix(self._TRASH_PREFIX) for path in trash_paths])
+
+        await to_thread(self._remove, trash_paths)
+        return len(trash_paths)
+
+    def _scan(self) -> list[_WorkspaceUsage]:
+        usages = []
+        with scandir(self._root) as entries:
+            for entry in entries:
+                if entry.name.startswith(self._TRASH_PREFIX) and entry.is_dir(follow_symlinks=False):
+                    # Остатки удаления, прерванного перезапуском сервера
+                    rmtree(entry.path, ignore_errors=True)
+                    continue
+
+                if not entry.is_dir(follow_symlinks=False) or not _is_workspace_name(entry.name):
+                    continue
+
+                try:
+                    size_bytes = _directory_size(entry.path)
+                    last_used = entry.stat(follow_symlinks=False).st_mtime
+                except FileNotFoundError:
+                    continue
+
+                usages.append(_WorkspaceUsage(entry.name, size_bytes, last_used))
+
+        return usages
+
+    @staticmethod
+    def _remove(paths: list[Path]) -> None:
+        for path in paths:
+            rmtree(path, ignore_errors=True)
+
+    async def _collect_periodically(self) -> None:
+        while True:
+            try:
+                await sleep(self._gc_interval)
+
+                collected = await self.collect()
+                if collected:
+                    print(f"Collected {collected} workspaces")
+            except Exception as e:
+                print(f"An exception was thrown: {e}")
+
+
+workspace_manager = WorkspaceManager(
+    settings.TRANSLATION_PATH,
+    settings.WORKSPACE_TTL,
+    settings.WORKSPACE_MAX_BYTES,
+    settings.WORKSPACE_MAX_COUNT,
+    settings.WORKSPACE_GC_INTERVAL
+)
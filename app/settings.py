@@ -1,5 +1,6 @@
 from pathlib import Path
 from tempfile import gettempdir
+from typing import Literal, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -9,6 +10,103 @@ class Settings(BaseSettings):
     RESOURCES_PATH: Path = Path(__file__).resolve().parent.parent / "resources"
     TRANSLATION_PATH: Path = Path(gettempdir()).resolve() / "postdb"
 
+    # Если версия не задана явно, она вычисляется как хэш post2py.jar
+    TRANSLATOR_VERSION: Optional[str] = None
+
+    TRANSLATION_CACHE_MAX_ENTRIES: int = 256
+    TRANSLATION_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    TRANSLATION_CACHE_TTL: float = 60 * 60
+
+    # Команда однократной трансляции; "{translator_path}", "{source}" и "{output}" заменяются
+    # на путь к post2py.jar, путь к программе на POST и имя файла с Python-кодом
+    TRANSLATOR_COMMAND: list[str] = ["java", "-jar", "{translator_path}", "{source}", "-o={output}"]
+    # Время однократной трансляции, секунды; по истечении процесс транслятора завершается
+    TRANSLATION_TIMEOUT: float = 60
+
+    # Команда запуска резидентного транслятора; "{translator_path}" заменяется на путь к post2py.jar.
+    # Процесс должен поддерживать протокол app/service/translator_pool.py (JSON-объекты по строкам
+    # в stdin/stdout). Сам post2py.jar его не поддерживает: нужна обертка-сервер, пример протокола —
+    # benchmarks/stub_translator.py --serve. Если команда не задана, каждая трансляция запускает отдельный "java -jar"
+    TRANSLATOR_POOL_COMMAND: Optional[list[str]] = None
+    TRANSLATOR_POOL_SIZE: int = 2
+    TRANSLATOR_JOB_TIMEOUT: float = 60
+    TRANSLATOR_HEALTH_CHECK_INTERVAL: float = 30
+
+    # Способ запуска рабочих процессов multiprocessing
+    WORKER_START_METHOD: Literal["forkserver", "spawn", "fork"] = "forkserver"
+
+    # Одновременные трансляции (процессы java) и длина очереди ожидающих; завершенные задачи
+    # доступны через /debugging/jobs в течение TRANSLATION_JOB_RETENTION секунд
+    TRANSLATION_JOB_WORKERS: int = 4
+    TRANSLATION_JOB_QUEUE_SIZE: int = 256
+    TRANSLATION_JOB_RETENTION: float = 10 * 60
+    # Пакетная трансляция (POST /debugging/request-debugging/batch): программ в запросе
+    # и программ пакета, одновременно находящихся в очереди
+    TRANSLATION_BATCH_MAX_PROGRAMS: int = 1000
+    TRANSLATION_BATCH_WINDOW: int = 4
+
+    CODE_INFO_EXTRACTION_TIMEOUT: float = 10
+    # Резидентные процессы извлечения сведений о программе; процесс перезапускается после CODE_INFO_WORKER_MAX_JOBS
+    CODE_INFO_WORKERS: int = 2
+    CODE_INFO_WORKER_MAX_JOBS: int = 100
+    # Объекты кода транслированных программ, кэшируемые в процессе по хэшу исходного кода
+    PROGRAM_CODE_CACHE_MAX_ENTRIES: int = 128
+    # Сохранять скомпилированный код сессий отладки рядом с debug_code.py, чтобы другие рабочие процессы
+    # узла открывали сессии без повторной компиляции
+    PROGRAM_CODE_MARSHAL: bool = True
+
+    # Каталоги трансляций удаляются через WORKSPACE_TTL после последнего использования,
+    # а при превышении квот — начиная с самых давних
+    WORKSPACE_TTL: float = 24 * 60 * 60
+    WORKSPACE_MAX_BYTES: int = 1024 * 1024 * 1024
+    WORKSPACE_MAX_COUNT: int = 10000
+    WORKSPACE_GC_INTERVAL: float = 60
+
+    # Общий каталог рабочих процессов и узлов (SQLite); по умолчанию — файл в TRANSLATION_PATH.
+    # Для нескольких узлов файл должен лежать на общем для них томе с рабочими блокировками файлов
+    # (fcntl, например NFSv4); на томе без блокировок каталог должен быть у каждого узла свой
+    DIRECTORY_PATH: Optional[Path] = None
+    # Идентификатор узла; рабочие процессы одного узла делят TRANSLATION_PATH. По умолчанию — имя хоста
+    NODE_ID: Optional[str] = None
+    # Адрес API отладки узла для других узлов, например "http://node-a:8000/api/v1/debugging".
+    # Без адреса каталоги трансляций этого узла другим узлам не передаются
+    NODE_ADDRESS: Optional[str] = None
+    DIRECTORY_HEARTBEAT_INTERVAL: float = 10
+    DIRECTORY_WORKER_TTL: float = 30
+    WORKSPACE_HANDOFF_TIMEOUT: float = 10
+
+    # "process" — отдельный рабочий процесс на каждую сессию отладки, "thread" — поток сервера
+    DEBUGGER_BACKEND: Literal["thread", "process"] = "process"
+    # "bdb" — трассировка через sys.settrace, "monitoring" — sys.monitoring (Python 3.12+)
+    DEBUGGER_ENGINE: Literal["bdb", "monitoring"] = "bdb"
+    # Максимум остановок, которые STEP n, CONTINUE n и RUN_UNTIL проходят без ответа клиенту
+    MAX_BATCH_STOPS: int = 10000
+    # Максимум остановок подряд, которые фильтры сессии (SET_FILTER) пропускают без ответа клиенту
+    MAX_FILTERED_STOPS: int = 100_000
+    # Снимки после первого содержат только изменившиеся ключи; сессия может переопределить параметром deltas
+    SNAPSHOT_DELTAS: bool = True
+    # История снимков для STEP_BACK и GOTO; 0 отключает запись истории
+    SNAPSHOT_HISTORY_MAX_ENTRIES: int = 1000
+    SNAPSHOT_HISTORY_MAX_BYTES: int = 16 * 1024 * 1024
+    # Минимальный промежуток между снимками RUN_LIVE, секунды; команда может задать свой (RUN_LIVE 100 — 100 мс)
+    LIVE_SNAPSHOT_INTERVAL: float = 0.05
+
+    # Прогон программы без отладчика (POST /debugging/simulate/{uuid})
+    SIMULATION_TIMEOUT: float = 60
+    SIMULATION_MAX_CYCLES: int = 10_000_000
+    SIMULATION_MAX_TRACES: int = 1000
+    # Строк сценария входных значений в одном запросе прогона
+    SIMULATION_MAX_SCENARIO_STEPS: int = 100_000
+
+    # Период выборки стека при профилировании сессии (?profile=true) или прогона (profile: true)
+    PROFILE_SAMPLE_INTERVAL: float = 0.005
+
+    MAX_DEBUG_SESSIONS: int = 32
+    # Сколько новая сессия ждет освобождения места; 0 — сразу отказать
+    SESSION_ADMISSION_TIMEOUT: float = 0
+    SESSION_IDLE_TIMEOUT: float = 15 * 60
+    SESSION_TEARDOWN_TIMEOUT: float = 5
+
     ALLOWED_ORIGINS: list[str] = Field(...)
     ALLOWED_METHODS: list[str] = Field(...)
     ALLOWED_HEADERS: list[str] = Field(...)
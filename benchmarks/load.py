@@ -0,0 +1,294 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from json import dumps, loads
+from pathlib import Path
+from platform import python_version
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep, time
+from typing import Any, Iterator, Optional
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+import websockets
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.programs import ProgramSpec, generate_post  # noqa: E402
+
+REPOSITORY_PATH = Path(__file__).resolve().parent.parent
+STUB_TRANSLATOR_PATH = Path(__file__).resolve().parent / "stub_translator.py"
+
+API_PREFIX = "/api/v1/debugging"
+
+
+# Задержки одного этапа: момент начала и длительность каждого успешного замера
+class Stage:
+    def __init__(self) -> None:
+        self.samples: list[tuple[float, float]] = []
+        self.errors = 0
+
+    @contextmanager
+    def measure(self) -> Iterator[None]:
+        started = perf_counter()
+        try:
+            yield
+        except Exception:
+            self.errors += 1
+            raise
+        self.samples.append((started, perf_counter() - started))
+
+    def summary(self) -> dict[str, Any]:
+        durations = sorted(duration for _, duration in self.samples)
+        if not durations:
+            return {"count": 0, "errors": self.errors}
+
+        # Пропускная способность считается по окну от начала первого до конца последнего замера
+        window = max(start + duration for start, duration in self.samples) - min(start for start, _ in self.samples)
+        return {
+            "count": len(durations),
+            "errors": self.errors,
+            "throughput": len(durations) / window if window > 0 else 0.0,
+            "mean_ms": 1000 * sum(durations) / len(durations),
+            "p50_ms": 1000 * _percentile(durations, 50),
+            "p95_ms": 1000 * _percentile(durations, 95),
+            "p99_ms": 1000 * _percentile(durations, 99),
+            "max_ms": 1000 * durations[-1],
+        }
+
+
+def _percentile(sorted_values: list[float], percent: float) -> float:
+    # Ближайший ранг: значение, не меньше которого percent процентов выборки
+    rank = max(0, min(len(sorted_values) - 1, -(-len(sorted_values) * percent // 100) - 1))
+    return sorted_values[int(rank)]
+
+
+class LoadBenchmark:
+    def __init__(self, base_url: str, args: Namespace) -> None:
+        self._base_url = base_url
+        self._args = args
+        self._stages: dict[str, Stage] = {}
+        self._http_executor = ThreadPoolExecutor(max_workers=max(args.translate_concurrency, 1))
+
+    def stage(self, name: str) -> Stage:
+        return self._stages.setdefault(name, Stage())
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        return {name: stage.summary() for name, stage in self._stages.items()}
+
+    async def run(self) -> None:
+        uuids = await self._translate_programs()
+        if not uuids:
+            raise RuntimeError("No program was translated")
+
+        semaphore = asyncio.Semaphore(self._args.sessions)
+
+        async def run_session(index: int) -> None:
+            async with semaphore:
+                try:
+                    await self._run_session(uuids[index % len(uuids)])
+                except Exception as e:
+                    print(f"Session {index} failed: {e}", file=sys.stderr)
+
+        await asyncio.gather(*(run_session(i) for i in range(self._args.total_sessions or self._args.sessions)))
+        self._http_executor.shutdown()
+
+    async def _translate_programs(self) -> list[str]:
+        semaphore = asyncio.Semaphore(self._args.translate_concurrency)
+        # Имена программ уникальны в пределах запуска, иначе повторные запросы попадут в кэш трансляций
+        run_id = f"{int(time())}{os.getpid()}"
+
+        async def translate(index: int) -> Optional[str]:
+            spec = ProgramSpec(f"Bench{run_id}x{index}", self._args.processes, self._args.states, self._args.variables)
+            async with semaphore:
+                try:
+                    with self.stage("translate").measure():
+                        result = await self._post("/request-debugging", {"post_code": generate_post(spec)})
+                except Exception as e:
+                    print(f"Translation {index} failed: {e}", file=sys.stderr)
+                    return None
+
+            if result["translator_output"]["return_code"] != 0:
+                print(f"Translation {index} failed: {result['translator_output']['stderr']}", file=sys.stderr)
+                return None
+            return str(result["uuid"])
+
+        uuids = await asyncio.gather(*(translate(i) for i in range(self._args.programs)))
+        return [uuid for uuid in uuids if uuid is not None]
+
+    async def _run_session(self, uuid: str) -> None:
+        url = self._base_url.replace("http", "ws", 1) + f"{API_PREFIX}/debug/{uuid}{self._args.query}"
+        commands = self._args.script.split(",")
+
+        with self.stage("session").measure():
+            with self.stage("connect").measure():
+                websocket = await websockets.connect(url, max_size=None)
+
+            try:
+                for i in range(self._args.commands):
+                    command = commands[i % len(commands)].strip()
+                    stage_name = "first_stop" if i == 0 else f"command:{command.split()[0]}"
+
+                    with self.stage(stage_name).measure():
+                        await websocket.send(command)
+                        await asyncio.wait_for(websocket.recv(), self._args.timeout)
+            finally:
+                await websocket.close()
+
+    async def _post(self, path: str, payload: dict[str, Any]) -> Any:
+        request = Request(
+            self._base_url + API_PREFIX + path,
+            data=dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+
+        def send() -> Any:
+            with urlopen(request, timeout=self._args.timeout) as response:
+                return loads(response.read())
+
+        return await asyncio.get_running_loop().run_in_executor(self._http_executor, send)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPOSITORY_PATH, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Сервер запускается с транслятором-заглушкой и во временном каталоге трансляций
+@contextmanager
+def _spawn_server(args: Namespace, translation_path: Path) -> Iterator[str]:
+    port = _free_port()
+    translator_command = [sys.executable, str(STUB_TRANSLATOR_PATH), "--delay", str(args.translator_delay)]
+
+    environment = dict(os.environ)
+    environment.update({
+        "RESOURCES_PATH": str(REPOSITORY_PATH / "resources"),
+        "TRANSLATION_PATH": str(translation_path),
+        "TRANSLATOR_VERSION": "benchmark-stub",
+        "TRANSLATOR_COMMAND": dumps([*translator_command, "{source}", "-o={output}"]),
+        "DEBUGGER_BACKEND": args.backend,
+        "DEBUGGER_ENGINE": args.engine,
+        "MAX_DEBUG_SESSIONS": str(max(args.sessions, 1)),
+        # Место закрытой сессии освобождается после закрытия соединения: следующая сессия его дожидается
+        "SESSION_ADMISSION_TIMEOUT": str(args.timeout),
+        "ALLOWED_ORIGINS": '["*"]',
+        "ALLOWED_METHODS": '["*"]',
+        "ALLOWED_HEADERS": '["*"]',
+    })
+    if args.translator_pool:
+        environment["TRANSLATOR_POOL_COMMAND"] = dumps([*translator_command, "--serve"])
+
+    # Вывод сервера не смешивается с отчетом
+    log_path = args.server_log if args.server_log is not None else Path(os.devnull)
+    log = open(log_path, "w", encoding="utf-8")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=REPOSITORY_PATH,
+        env=environment,
+        stdout=log,
+        stderr=subprocess.STDOUT
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = perf_counter() + 30
+        while True:
+            try:
+                with urlopen(base_url + "/metrics", timeout=1):
+                    break
+            except (URLError, OSError):
+                if server.poll() is not None or perf_counter() > deadline:
+                    raise RuntimeError("Benchmark server did not start")
+                sleep(0.1)
+
+        yield base_url
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        log.close()
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Load and latency benchmark for the debugging backend")
+    # Без --url сервер запускается локально с транслятором-заглушкой
+    parser.add_argument("--url")
+    parser.add_argument("--backend", choices=("thread", "process"), default="process")
+    parser.add_argument("--engine", choices=("bdb", "monitoring"), default="bdb")
+    parser.add_argument("--translator-delay", type=float, default=0.0)
+    parser.add_argument("--translator-pool", action="store_true")
+    parser.add_argument("--server-log", type=Path)
+
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--states", type=int, default=4)
+    parser.add_argument("--variables", type=int, default=8)
+
+    parser.add_argument("--programs", type=int, default=20)
+    parser.add_argument("--translate-concurrency", type=int, default=8)
+    parser.add_argument("--sessions", type=int, default=16, help="concurrent websocket sessions")
+    parser.add_argument("--total-sessions", type=int, default=0, help="sessions in total (default: --sessions)")
+    parser.add_argument("--commands", type=int, default=50, help="commands per session")
+    parser.add_argument("--script", default="STEP,STEP,CONTINUE,CONTINUE 10,STEP 5 BATCH")
+    parser.add_argument("--query", default="", help="websocket query string, e.g. ?deltas=false")
+    parser.add_argument("--timeout", type=float, default=30)
+
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--output", type=Path, help="write the JSON report to a file")
+    args = parser.parse_args()
+
+    started = perf_counter()
+    with TemporaryDirectory(prefix="postdb-benchmark-") as translation_path:
+        if args.url is not None:
+            benchmark = LoadBenchmark(args.url.rstrip("/"), args)
+            asyncio.run(benchmark.run())
+        else:
+            with _spawn_server(args, Path(translation_path)) as base_url:
+                benchmark = LoadBenchmark(base_url, args)
+                asyncio.run(benchmark.run())
+
+    report = {
+        "benchmark": "load",
+        "commit": _git_commit(),
+        "python": python_version(),
+        "parameters": {name: str(value) if isinstance(value, Path) else value for name, value in vars(args).items()},
+        "wall_seconds": perf_counter() - started,
+        "stages": benchmark.summary(),
+    }
+
+    if args.output is not None:
+        args.output.write_text(dumps(report, indent=2), encoding="utf-8")
+
+    if args.json:
+        print(dumps(report, indent=2))
+        return
+
+    print(f"{'stage':<22}{'count':>8}{'errors':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stage in report["stages"].items():
+        if not stage["count"]:
+            print(f"{name:<22}{0:>8}{stage['errors']:>8}")
+            continue
+        print(
+            f"{name:<22}{stage['count']:>8}{stage['errors']:>8}{stage['throughput']:>10.1f}"
+            f"{stage['p50_ms']:>10.2f}{stage['p95_ms']:>10.2f}{stage['p99_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
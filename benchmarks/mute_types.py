@@ -0,0 +1,89 @@
+from argparse import ArgumentParser
+from importlib.util import module_from_spec, spec_from_file_location
+from json import dumps
+from pathlib import Path
+from timeit import Timer
+from types import ModuleType
+
+RUNTIME_PATH = Path(__file__).resolve().parent.parent / "resources" / "MuteTypes.py"
+
+# Операции в том виде, в котором их порождает транслятор
+OPERATIONS = {
+    "add": "a + b",
+    "add_constant": "a + 1",
+    "shared_add": "s + b",
+    "inplace_add": "c += b",
+    "compare": "a < b",
+    "compare_constant": "a == 5",
+    "set": "c.__set__(b)",
+    "get_value": "get_value(a)",
+    "bool_and": "t & f",
+    "create": "MuteNum(1)",
+    "read_box": "a.value[0]",
+}
+
+
+def load_runtime(path: Path, name: str) -> ModuleType:
+    spec = spec_from_file_location(name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Unable to load MuteTypes from {path}")
+
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(runtime: ModuleType, repeat: int, number: int) -> dict[str, float]:
+    # s делит место хранения с b, как после присваивания a.value = b.value в транслированном коде
+    shared = runtime.MuteNum(0)
+    shared.value = runtime.MuteNum(4).value
+
+    namespace = {
+        "MuteNum": runtime.MuteNum,
+        "get_value": runtime.get_value,
+        "a": runtime.MuteNum(5),
+        "b": runtime.MuteNum(3),
+        "t": runtime.MuteBool(True),
+        "f": runtime.MuteBool(False),
+        "s": shared,
+    }
+
+    ops_per_second = {}
+    for name, statement in OPERATIONS.items():
+        # c — локальная переменная таймера, иначе c += b не скомпилируется как присваивание на месте
+        timer = Timer(statement, setup="c = MuteNum(0)", globals=namespace)
+        best = min(timer.repeat(repeat=repeat, number=number))
+        ops_per_second[name] = number / best
+
+    return ops_per_second
+
+
+def main() -> None:
+    parser = ArgumentParser(description="MuteTypes runtime micro-benchmark (ops/sec)")
+    parser.add_argument("--runtime", type=Path, default=RUNTIME_PATH)
+    # Например, старая версия: git show <commit>:resources/MuteTypes.py > /tmp/MuteTypes_old.py
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200_000)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = {"runtime": measure(load_runtime(args.runtime, "mute_types_runtime"), args.repeat, args.number)}
+    if args.baseline is not None:
+        results["baseline"] = measure(load_runtime(args.baseline, "mute_types_baseline"), args.repeat, args.number)
+
+    if args.json:
+        print(dumps(results, indent=2))
+        return
+
+    baseline = results.get("baseline")
+    print(f"{'operation':<18}{'baseline':>14}{'runtime':>14}{'speedup':>10}")
+    for name, runtime_ops in results["runtime"].items():
+        if baseline is None:
+            print(f"{name:<18}{'-':>14}{runtime_ops:>14,.0f}{'-':>10}")
+        else:
+            print(f"{name:<18}{baseline[name]:>14,.0f}{runtime_ops:>14,.0f}{runtime_ops / baseline[name]:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
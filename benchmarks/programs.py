@@ -0,0 +1,120 @@
+import re
+from dataclasses import dataclass
+
+
+# Параметры синтетической программы: процессы P0..Pn, у каждого состояния S0..Sk,
+# входные переменные in0..inM типа BOOL и выходные out0..outM типа INT
+@dataclass(frozen=True)
+class ProgramSpec:
+    name: str
+    processes: int
+    states: int
+    variables: int
+
+
+def generate_post(spec: ProgramSpec) -> str:
+    lines = [f"PROGRAM {spec.name}"]
+
+    lines.append("    VAR_INPUT")
+    lines.extend(f"        in{i} : BOOL := TRUE;" for i in range(spec.variables))
+    lines.append("    END_VAR")
+
+    lines.append("    VAR_OUTPUT")
+    lines.extend(f"        out{i} : INT := 0;" for i in range(spec.variables))
+    lines.append("    END_VAR")
+
+    for p in range(spec.processes):
+        lines.append(f"    PROCESS P{p}")
+        for s in range(spec.states):
+            variable = (p + s) % spec.variables
+            lines.append(f"        STATE S{s}")
+            lines.append(f"            IF in{variable} THEN")
+            lines.append(f"                out{variable} := out{variable} + 1;")
+            lines.append(f"                SET STATE S{(s + 1) % spec.states};")
+            lines.append("            END_IF")
+            lines.append("        END_STATE")
+        lines.append("    END_PROCESS")
+
+    lines.append("END_PROGRAM")
+    return "\n".join(lines) + "\n"
+
+
+_PROGRAM_RE = re.compile(r"^\s*PROGRAM\s+(\w+)", re.MULTILINE)
+_INPUT_RE = re.compile(r"^\s*in\d+\s*:", re.MULTILINE)
+_PROCESS_RE = re.compile(r"^\s*PROCESS\s+\w+", re.MULTILINE)
+_STATE_RE = re.compile(r"^\s*STATE\s+\w+", re.MULTILINE)
+
+
+# Разбирает только программы, порожденные generate_post
+def parse_post(source: str) -> ProgramSpec:
+    name = _PROGRAM_RE.search(source)
+    if name is None:
+        raise ValueError("PROGRAM declaration not found")
+
+    processes = len(_PROCESS_RE.findall(source))
+    variables = len(_INPUT_RE.findall(source))
+    if processes == 0 or variables == 0:
+        raise ValueError("Program declares no processes or variables")
+
+    return ProgramSpec(name.group(1), processes, len(_STATE_RE.findall(source)) // processes, variables)
+
+
+# Python-код в том виде, в котором его порождает post2py: глобальные inVars, outVars и pStates,
+# функции setVariable и set_state и по классу-наследнику Program на процесс
+def generate_python(spec: ProgramSpec) -> str:
+    process_names = [f"P{p}" for p in range(spec.processes)]
+    global_names = ["inVars", "outVars", "pStates", "processesDict", "setVariable", "set_state", *process_names,
+                    "Program"]
+
+    lines = ["from enum import Enum", "", "from MuteTypes import *", ""]
+
+    lines.extend(f"in{i} = MuteBool(True)" for i in range(spec.variables))
+    lines.extend(f"out{i} = MuteNum(0)" for i in range(spec.variables))
+    lines.append("inVars = {" + ", ".join(f'"in{i}": in{i}' for i in range(spec.variables)) + "}")
+    lines.append("outVars = {" + ", ".join(f'"out{i}": out{i}' for i in range(spec.variables)) + "}")
+    lines.append("pStates = {" + ", ".join(f'"{name}_state": None' for name in process_names) + "}")
+
+    lines.extend([
+        "", "",
+        "def setVariable(name, value):",
+        "    global outVars",
+        "    outVars[name].__set__(value)",
+        "", "",
+        "def set_state(process, state):",
+        "    global pStates",
+        "    pStates[process + \"_state\"] = state",
+        "", "",
+        "class Program:",
+        "    def run(self):",
+        "        pass",
+        "",
+        "    def run_iter(self):",
+        "        for process in processesDict.values():",
+        "            process.run()",
+    ])
+
+    for p, name in enumerate(process_names):
+        lines.extend(["", "", f"class {name}(Program):", "    class States(Enum):"])
+        lines.extend(f"        S{s} = {s + 1}" for s in range(spec.states))
+        lines.extend([
+            "",
+            "    def __init__(self):",
+            f"        set_state(\"{name}\", {name}.States.S0)",
+            "",
+            "    def run(self):",
+        ])
+        lines.extend(f"        global {global_name}" for global_name in global_names)
+
+        for s in range(spec.states):
+            variable = (p + s) % spec.variables
+            keyword = "if" if s == 0 else "elif"
+            lines.extend([
+                f"        {keyword} pStates[\"{name}_state\"] == {name}.States.S{s}:",
+                f"            if inVars[\"in{variable}\"]:",
+                f"                setVariable(\"out{variable}\", outVars[\"out{variable}\"] + 1)",
+                f"                set_state(\"{name}\", {name}.States.S{(s + 1) % spec.states})",
+            ])
+
+    processes = ", ".join(f'"{name}": {name}()' for name in process_names)
+    lines.extend(["", "", f"processesDict = {{{processes}}}"])
+    return "\n".join(lines) + "\n"
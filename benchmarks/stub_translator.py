@@ -0,0 +1,76 @@
+import os
+import sys
+from argparse import ArgumentParser
+from json import dumps, loads
+from pathlib import Path
+from time import sleep
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.programs import generate_python, parse_post  # noqa: E402
+
+
+# Замена post2py.jar для нагрузочных тестов: переводит программы benchmarks.programs в Python
+# с заданной задержкой, имитирующей время работы транслятора
+def translate(source_path: Path, output_path: Path, delay: float) -> tuple[int, str, str]:
+    sleep(delay)
+    try:
+        spec = parse_post(source_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        return 1, "", str(e)
+
+    output_path.write_text(generate_python(spec), encoding="utf-8")
+    return 0, f"Translated {spec.name}", ""
+
+
+# Протокол резидентного транслятора (TRANSLATOR_POOL_COMMAND): по одному JSON-объекту на строку.
+# crash_on — строка исходного кода, на которой процесс аварийно завершается, как упавший транслятор
+def serve(delay: float, crash_on: Optional[str] = None) -> None:
+    for line in sys.stdin:
+        request = loads(line)
+        response = {"id": request["id"]}
+
+        if request.get("type") == "translate":
+            if crash_on is not None and crash_on in Path(request["source"]).read_text(encoding="utf-8"):
+                print(f"Translator crashed on {request['source']}", file=sys.stderr, flush=True)
+                sys.exit(3)
+
+            return_code, stdout, stderr = translate(
+                Path(request["source"]),
+                Path(request["cwd"]) / request["output"],
+                delay
+            )
+            response.update(return_code=return_code, stdout=stdout, stderr=stderr)
+
+        sys.stdout.write(dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Stub POST translator for benchmarks")
+    parser.add_argument("source", type=Path, nargs="?")
+    # Как у post2py.jar: -o=python_code.py, путь относительно текущего каталога
+    parser.add_argument("-o", dest="output", default="python_code.py")
+    parser.add_argument("--delay", type=float, default=float(os.environ.get("STUB_TRANSLATOR_DELAY", "0")))
+    parser.add_argument("--serve", action="store_true")
+    parser.add_argument("--crash-on")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.delay, args.crash_on)
+        return
+
+    if args.source is None:
+        parser.error("source is required")
+
+    return_code, stdout, stderr = translate(args.source, Path(args.output.removeprefix("=")), args.delay)
+    if stdout:
+        print(stdout)
+    if stderr:
+        print(stderr, file=sys.stderr)
+    sys.exit(return_code)
+
+
+if __name__ == "__main__":
+    main()
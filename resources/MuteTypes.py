@@ -1,315 +1,371 @@
 import json
 
 
+# A wrapper keeps its value directly in the `_v` slot, so arithmetic results and comparisons
+# never allocate a box. Generated code shares a location between variables with
+# `a.value = b.value` and writes through `a.value[0]`: reading or assigning `value` turns the
+# wrapper into its shared twin class, which keeps `_v` in a one-element list cell instead.
+# The cell is created once per wrapper, when it is first shared, not per operation
+class _MuteValue:
+    __slots__ = ("_v", "_cell")
+
+    @property
+    def value(self):
+        cell = [self._v]
+        _share(self, cell)
+        return cell
+
+    @value.setter
+    def value(self, cell):
+        _share(self, cell)
+
+
+# Mixed into the shared twins: `_v` reads and writes the cell
+class _SharedValue:
+    __slots__ = ()
+
+    @property
+    def _v(self):
+        return self._cell[0]
+
+    @_v.setter
+    def _v(self, value):
+        self._cell[0] = value
+
+    @property
+    def value(self):
+        return self._cell
+
+    @value.setter
+    def value(self, cell):
+        self._cell = cell
+
+
+def _share(obj, cell):
+    obj._cell = cell
+    obj.__class__ = _SHARED_CLASSES[obj.__class__]
+
+
 def get_value(obj):
-    try:
-        return obj.value[0]
-    except:
-        return obj
+    # Type dispatch instead of exception-driven unwrapping
+    if isinstance(obj, _MuteValue):
+        return obj._v
+    return obj
+
 
+class MuteNum(_MuteValue):
+    __slots__ = ()
 
-class MuteNum:
     def __init__(self, value):
-        # Mutable storage because `list` defines a location
-        self.value = [value]
+        self._v = value
 
     def __dict__(self):
-        return self.value[0].__dict__
+        return self._v.__dict__
 
     def __set__(self, value):
-        self.value[0] = get_value(value)
+        self._v = value._v if isinstance(value, _MuteValue) else value
 
     def __str__(self):
-        return get_value(self).__str__()
+        return self._v.__str__()
 
     # Define the comparison interface
     def __eq__(self, other):
-        return get_value(self) == get_value(other)
+        return self._v == (other._v if isinstance(other, _MuteValue) else other)
 
     def __ne__(self, other):
-        return get_value(self) != get_value(other)
+        return self._v != (other._v if isinstance(other, _MuteValue) else other)
 
     def __le__(self, other):
-        return get_value(self) <= get_value(other)
+        return self._v <= (other._v if isinstance(other, _MuteValue) else other)
 
     def __lt__(self, other):
-        return get_value(self) < get_value(other)
+        return self._v < (other._v if isinstance(other, _MuteValue) else other)
 
     def __ge__(self, other):
-        return get_value(self) >= get_value(other)
+        return self._v >= (other._v if isinstance(other, _MuteValue) else other)
 
     def __gt__(self, other):
-        return get_value(self) > get_value(other)
+        return self._v > (other._v if isinstance(other, _MuteValue) else other)
 
     # Define the numerical operator interface, returning new instances
     # of mutable_number
     def __add__(self, other):
-        return MuteNum(self.value[0] + get_value(other))
+        return MuteNum(self._v + (other._v if isinstance(other, _MuteValue) else other))
 
     def __radd__(self, other):
-        return MuteNum(get_value(other) + self.value[0])
+        return MuteNum((other._v if isinstance(other, _MuteValue) else other) + self._v)
 
     def __sub__(self, other):
-        return MuteNum(self.value[0] - get_value(other))
+        return MuteNum(self._v - (other._v if isinstance(other, _MuteValue) else other))
 
     def __rsub__(self, other):
-        return MuteNum(get_value(other) - self.value[0])
+        return MuteNum((other._v if isinstance(other, _MuteValue) else other) - self._v)
 
     def __mul__(self, other):
-        return MuteNum(self.value[0] * get_value(other))
+        return MuteNum(self._v * (other._v if isinstance(other, _MuteValue) else other))
 
     def __rmul__(self, other):
-        return MuteNum(get_value(other) * self.value[0])
+        return MuteNum((other._v if isinstance(other, _MuteValue) else other) * self._v)
 
     def __truediv__(self, other):
-        return MuteNum(self.value[0] / get_value(other))
+        return MuteNum(self._v / (other._v if isinstance(other, _MuteValue) else other))
 
     def __rtruediv__(self, other):
-        return MuteNum(get_value(other) / self.value[0])
+        return MuteNum((other._v if isinstance(other, _MuteValue) else other) / self._v)
 
     def __mod__(self, other):
-        return MuteNum(self.value[0] % get_value(other))
+        return MuteNum(self._v % (other._v if isinstance(other, _MuteValue) else other))
 
     def __rmod__(self, other):
-        return MuteNum(get_value(other) % self.value[0])
+        return MuteNum((other._v if isinstance(other, _MuteValue) else other) % self._v)
 
     def __pow__(self, power, modulo=None):
-        return MuteNum(self.value[0] ** get_value(power))
+        return MuteNum(self._v ** (power._v if isinstance(power, _MuteValue) else power))
 
     def __rpow__(self, other):
-        return MuteNum(get_value(other) ** self.value[0])
+        return MuteNum((other._v if isinstance(other, _MuteValue) else other) ** self._v)
 
     def __neg__(self):
-        return MuteNum(-self.value[0])
+        return MuteNum(-self._v)
 
     # In-place operations alter the shared location
     def __iadd__(self, other):
-        self.value[0] += get_value(other)
+        self._v += other._v if isinstance(other, _MuteValue) else other
         return self
 
     def __isub__(self, other):
-        self.value[0] -= get_value(other)
+        self._v -= other._v if isinstance(other, _MuteValue) else other
         return self
 
     def __imul__(self, other):
-        self.value[0] *= get_value(other)
+        self._v *= other._v if isinstance(other, _MuteValue) else other
         return self
 
     def __idiv__(self, other):
-        self.value[0] /= get_value(other)
+        self._v /= other._v if isinstance(other, _MuteValue) else other
         return self
 
     def __imod__(self, other):
-        self.value[0] %= get_value(other)
+        self._v %= other._v if isinstance(other, _MuteValue) else other
         return self
 
     # Logic operators
     def __invert__(self):
-        return MuteNum(~self.value[0])
+        return MuteNum(~self._v)
 
     def __and__(self, other):
-        return MuteNum(self.value[0] & get_value(other))
+        return MuteNum(self._v & (other._v if isinstance(other, _MuteValue) else other))
 
     def __rand__(self, other):
-        return MuteNum(get_value(other) & self.value[0])
+        return MuteNum((other._v if isinstance(other, _MuteValue) else other) & self._v)
 
     def __or__(self, other):
-        return MuteNum(self.value[0] | get_value(other))
+        return MuteNum(self._v | (other._v if isinstance(other, _MuteValue) else other))
 
     def __ror__(self, other):
-        return MuteNum(get_value(other) | self.value[0])
+        return MuteNum((other._v if isinstance(other, _MuteValue) else other) | self._v)
 
     def __xor__(self, other):
-        return MuteNum(self.value[0] ^ get_value(other))
+        return MuteNum(self._v ^ (other._v if isinstance(other, _MuteValue) else other))
 
     def __rxor__(self, other):
-        return MuteNum(get_value(other) ^ self.value[0])
+        return MuteNum((other._v if isinstance(other, _MuteValue) else other) ^ self._v)
 
     def __index__(self):
-        return self.value[0]
+        return self._v
 
-    # Define the copy interface
+    # Define the copy interface: a copy shares the location, so it is the same object
     def __copy__(self):
-        new = MuteNum(0)
-        new.value = self.value
-        return new
+        return self
 
     def __repr__(self):
-        return repr(self.value[0])
+        return repr(self._v)
 
     def __bool__(self):
-        return self.value[0].__bool__()
+        return self._v.__bool__()
+
 
+class MuteBool(_MuteValue):
+    __slots__ = ()
 
-class MuteBool:
     def __init__(self, value):
-        self.value = [value]
+        self._v = value
 
     def __dict__(self):
-        return self.value[0].__dict__
+        return self._v.__dict__
 
     def __set__(self, value):
-        self.value[0] = get_value(value)
+        self._v = value._v if isinstance(value, _MuteValue) else value
 
     def __str__(self):
-        return get_value(self).__str__()
+        return self._v.__str__()
 
     def __repr__(self):
-        return repr(self.value[0])
+        return repr(self._v)
 
     def __and__(self, other):
-        return get_value(self) and get_value(other)
+        return self._v and (other._v if isinstance(other, _MuteValue) else other)
 
     def __or__(self, other):
-        return get_value(self) or get_value(other)
+        return self._v or (other._v if isinstance(other, _MuteValue) else other)
 
     def __rand__(self, other):
-        return get_value(other) and get_value(self)
+        return (other._v if isinstance(other, _MuteValue) else other) and self._v
 
     def __ror__(self, other):
-        return get_value(other) or get_value(self)
+        return (other._v if isinstance(other, _MuteValue) else other) or self._v
 
     def __xor__(self, other):
-        return get_value(self) ^ get_value(other)
+        return self._v ^ (other._v if isinstance(other, _MuteValue) else other)
 
     def __rxor__(self, other):
-        return get_value(other) ^ get_value(self)
+        return (other._v if isinstance(other, _MuteValue) else other) ^ self._v
 
     def __bool__(self):
-        return self.value[0]
+        return self._v
 
 
-class MuteStr:
+class MuteStr(_MuteValue):
+    __slots__ = ()
+
     def __init__(self, value=""):
-        self.value = [value]
+        self._v = value
 
     def __dict__(self):
-        return self.value[0].__dict__
+        return self._v.__dict__
 
     def __set__(self, value):
-        self.value[0] = get_value(value)
+        self._v = value._v if isinstance(value, _MuteValue) else value
 
     def __add__(self, other):
-        return MuteStr(self.value[0] + get_value(other))
+        return MuteStr(self._v + (other._v if isinstance(other, _MuteValue) else other))
 
     def __contains__(self, item):
-        return get_value(item) in self.value[0]
+        return (item._v if isinstance(item, _MuteValue) else item) in self._v
 
     def __eq__(self, other):
-        return self.value[0] == get_value(other)
+        return self._v == (other._v if isinstance(other, _MuteValue) else other)
 
     def __getitem__(self, item):
-        return self.value[0].__getitem__(item)
+        return self._v.__getitem__(item)
 
     def __ge__(self, other):
-        return self.value[0] >= get_value(other)
+        return self._v >= (other._v if isinstance(other, _MuteValue) else other)
 
     def __gt__(self, other):
-        return self.value[0] > get_value(other)
+        return self._v > (other._v if isinstance(other, _MuteValue) else other)
 
     def __hash__(self):
-        return hash(self.value[0])
+        return hash(self._v)
 
     def __iter__(self):
-        return iter(self.value[0])
+        return iter(self._v)
 
     def __len__(self):
-        return len(self.value[0])
+        return len(self._v)
 
     def __le__(self, other):
-        return self.value[0] <= get_value(other)
+        return self._v <= (other._v if isinstance(other, _MuteValue) else other)
 
     def __lt__(self, other):
-        return self.value[0] < get_value(other)
+        return self._v < (other._v if isinstance(other, _MuteValue) else other)
 
     def __mod__(self, other):
-        return MuteStr(self.value[0] % get_value(other))
+        return MuteStr(self._v % (other._v if isinstance(other, _MuteValue) else other))
 
     def __mul__(self, other):
-        return MuteStr(self.value[0] * get_value(other))
+        return MuteStr(self._v * (other._v if isinstance(other, _MuteValue) else other))
 
     def __ne__(self, other):
-        return self.value[0] != get_value(other)
+        return self._v != (other._v if isinstance(other, _MuteValue) else other)
 
     def __rmod__(self, other):
-        return MuteStr(get_value(other) % self.value[0])
+        return MuteStr((other._v if isinstance(other, _MuteValue) else other) % self._v)
 
     def __rmul__(self, other):
-        return MuteStr(get_value(other) * self.value[0])
+        return MuteStr((other._v if isinstance(other, _MuteValue) else other) * self._v)
 
     def __sizeof__(self):
-        return self.value[0].__sizeof__()
+        return self._v.__sizeof__()
 
     def __str__(self):
-        return self.value[0]
+        return self._v
 
     def __repr__(self):
-        return repr(self.value[0])
+        return repr(self._v)
+
 
+class MuteBytes(_MuteValue):
+    __slots__ = ()
 
-class MuteBytes:
     def __init__(self, value=b""):
-        self.value = [value]
+        self._v = value
 
     def __dict__(self):
-        return self.value[0].__dict__
+        return self._v.__dict__
 
     def __set__(self, value):
-        self.value[0] = get_value(value)
+        self._v = value._v if isinstance(value, _MuteValue) else value
 
     def __add__(self, other):
-        return MuteBytes(self.value[0] + get_value(other))
+        return MuteBytes(self._v + (other._v if isinstance(other, _MuteValue) else other))
 
     def __contains__(self, item):
-        return self.value[0].__contains__(get_value(item))
+        return self._v.__contains__(item._v if isinstance(item, _MuteValue) else item)
 
     def __eq__(self, other):
-        return self.value[0] == get_value(other)
+        return self._v == (other._v if isinstance(other, _MuteValue) else other)
 
     def __getitem__(self, item):
-        return self.value[0].__getitem__(get_value(get_value(item)))
+        return self._v.__getitem__(get_value(get_value(item)))
 
     def __ge__(self, other):
-        return self.value[0] >= get_value(other)
+        return self._v >= (other._v if isinstance(other, _MuteValue) else other)
 
     def __gt__(self, other):
-        return self.value[0] > get_value(other)
+        return self._v > (other._v if isinstance(other, _MuteValue) else other)
 
     def __hash__(self):
-        return hash(self.value[0])
+        return hash(self._v)
 
     def __iter__(self):
-        self.value[0].__iter__()
+        self._v.__iter__()
 
     def __len__(self):
-        return self.value[0].__len__()
+        return self._v.__len__()
 
     def __le__(self, other):
-        return self.value[0] >= get_value(other)
+        return self._v >= (other._v if isinstance(other, _MuteValue) else other)
 
     def __lt__(self, other):
-        return self.value[0] > get_value(other)
+        return self._v > (other._v if isinstance(other, _MuteValue) else other)
 
     def __mod__(self, other):
-        return MuteBytes(self.value[0] % get_value(other))
+        return MuteBytes(self._v % (other._v if isinstance(other, _MuteValue) else other))
 
     def __mul__(self, other):
-        return MuteBytes(self.value[0] * get_value(other))
+        return MuteBytes(self._v * (other._v if isinstance(other, _MuteValue) else other))
 
     def __ne__(self, other):
-        return self.value[0] != get_value(other)
+        return self._v != (other._v if isinstance(other, _MuteValue) else other)
 
     def __rmod__(self, other):
-        return MuteBytes(get_value(other) % self.value[0])
+        return MuteBytes((other._v if isinstance(other, _MuteValue) else other) % self._v)
 
     def __rmul__(self, other):
-        return MuteBytes(get_value(other) * self.value[0])
+        return MuteBytes((other._v if isinstance(other, _MuteValue) else other) * self._v)
 
     def __str__(self):
-        return self.value[0].__str__()
+        return self._v.__str__()
 
     def __repr__(self):
-        return repr(self.value[0])
+        return repr(self._v)
+
+
+# Shared twins keep the public class name and are subclasses of it, so isinstance checks hold
+_SHARED_CLASSES = {
+    cls: type(cls.__name__, (_SharedValue, cls), {"__slots__": ()}) for cls in (MuteNum, MuteBool, MuteStr, MuteBytes)
+}
 
 
 class MuteEncoder(json.JSONEncoder):
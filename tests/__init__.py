@@ -0,0 +1,14 @@
+import atexit
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+
+# app.settings читает окружение при импорте: тесты задают обязательные параметры
+# и собственный каталог трансляций, который удаляется после прогона
+_translation_path = mkdtemp(prefix="postdb-tests-")
+atexit.register(rmtree, _translation_path, True)
+
+os.environ.setdefault("ALLOWED_ORIGINS", '["*"]')
+os.environ.setdefault("ALLOWED_METHODS", '["*"]')
+os.environ.setdefault("ALLOWED_HEADERS", '["*"]')
+os.environ.setdefault("TRANSLATION_PATH", _translation_path)
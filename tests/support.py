@@ -0,0 +1,92 @@
+import json
+import sys
+from asyncio import Task, get_running_loop, to_thread, wait_for
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Event
+from typing import Any, Optional
+from unittest import IsolatedAsyncioTestCase
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.breakpoints import find_breakpoints  # noqa: E402
+from app.core.command import Command, CommandName  # noqa: E402
+from app.core.communication import CommunicationQueue, LiveSignals  # noqa: E402
+from app.core.debugger import DebuggerEngine, DebuggerOutput  # noqa: E402
+from app.core.util.output import SnapshotOptions  # noqa: E402
+from app.service.manager import create_debugger, run_debugger  # noqa: E402
+from app.service.program import session_programs  # noqa: E402
+from benchmarks.programs import ProgramSpec, generate_python  # noqa: E402
+
+DEMO_SPEC = ProgramSpec("demo", 2, 2, 2)
+
+_REPLY_TIMEOUT = 5
+
+
+# Отладчик синтетической программы в потоке, как у сессии с бэкендом thread, без веб-сокета
+class DebuggerSession:
+    def __init__(
+            self,
+            command_queue: CommunicationQueue[Command],
+            output_queue: CommunicationQueue[DebuggerOutput],
+            live_signals: LiveSignals,
+            task: Task[None]
+    ):
+        self._command_queue = command_queue
+        self._output_queue = output_queue
+        self.live_signals = live_signals
+        self.task = task
+
+    async def command(self, raw: str) -> dict[str, Any]:
+        command = await Command.from_string(raw)
+        if command.name == CommandName.RUN_LIVE:
+            # Как DebuggerManager.run_command
+            self.live_signals.pause.clear()
+            self.live_signals.ready.set()
+
+        await self._command_queue.send_message(command)
+        reply: dict[str, Any] = json.loads((await self.receive()).message)
+        return reply
+
+    async def receive(self, timeout: float = _REPLY_TIMEOUT) -> DebuggerOutput:
+        return await wait_for(self._output_queue.receive_message(), timeout)
+
+
+async def start_debugger(
+        test: IsolatedAsyncioTestCase,
+        spec: ProgramSpec = DEMO_SPEC,
+        engine: DebuggerEngine = "bdb",
+        snapshot_options: Optional[SnapshotOptions] = None,
+        python_code: Optional[str] = None
+) -> DebuggerSession:
+    directory = TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+
+    if python_code is None:
+        python_code = generate_python(spec)
+    program = session_programs.finalize(Path(directory.name), python_code, find_breakpoints(python_code))
+
+    loop = get_running_loop()
+    command_queue = CommunicationQueue[Command](loop)
+    output_queue = CommunicationQueue[DebuggerOutput](loop)
+    live_signals = LiveSignals(Event(), Event())
+    debugger = create_debugger(
+        engine,
+        snapshot_options if snapshot_options is not None else SnapshotOptions(deltas=False),
+        command_queue,
+        output_queue,
+        live_signals
+    )
+
+    task = loop.create_task(to_thread(run_debugger, debugger, program, Path(directory.name)))
+    session = DebuggerSession(command_queue, output_queue, live_signals, task)
+
+    async def quit_debugger() -> None:
+        # Завершившуюся программу (в том числе с исключением) проверяет сам тест
+        if task.done():
+            return
+        await session.command("QUIT")
+        await wait_for(task, _REPLY_TIMEOUT)
+
+    test.addAsyncCleanup(quit_debugger)
+    return session
@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import CodeType
+from unittest import TestCase, main
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.breakpoints import (  # noqa: E402
+    BREAKPOINT_INDEX_FILENAME, Breakpoint, dump_breakpoint_index, find_breakpoints, load_breakpoint_index
+)
+
+PROGRAM_CODE = """import base
+
+
+def setVariable(name, value):
+    global outVars
+    outVars[name].__set__(value)
+
+
+def set_state(process, state):
+    pStates[process + "_state"] = state
+
+
+def helper():
+    global counter
+    counter += 1
+
+
+class Program:
+    def run(self):
+        pass
+
+
+class Pump(Program):
+    class Motor:
+        def run(self):
+            global outVars, pStates
+
+            return 1
+
+    def run(self):
+        global pStates
+        global outVars
+        set_state("Pump", 1)
+
+
+class Valve(base.Program):
+    def run(self):
+        global pStates
+"""
+
+
+class BreakpointIndexTest(TestCase):
+    def test_finds_breakpoints(self) -> None:
+        self.assertEqual(find_breakpoints(PROGRAM_CODE), [
+            Breakpoint(6, "set_variable"),
+            Breakpoint(10, "set_state"),
+            Breakpoint(20, "process_run", "Program"),
+            # Объявления global пропускаются вместе с пустыми строками между ними
+            Breakpoint(28, "process_run", "Motor"),
+            Breakpoint(33, "process_run", "Pump"),
+            # В теле только global: остановка на строке сигнатуры
+            Breakpoint(37, "process_run", "Valve"),
+        ])
+
+    def test_breakpoint_lines_are_executable(self) -> None:
+        code = compile(PROGRAM_CODE, "program.py", "exec")
+        lines: set[int] = set()
+        pending = [code]
+        while pending:
+            current = pending.pop()
+            lines.update(line for _, _, line in current.co_lines() if line is not None)
+            pending.extend(const for const in current.co_consts if isinstance(const, CodeType))
+
+        for breakpoint in find_breakpoints(PROGRAM_CODE):
+            self.assertIn(breakpoint.line, lines)
+
+    def test_index_round_trip(self) -> None:
+        with TemporaryDirectory() as directory:
+            translation_path = Path(directory)
+            self.assertIsNone(load_breakpoint_index(translation_path))
+
+            breakpoints = find_breakpoints(PROGRAM_CODE)
+            (translation_path / BREAKPOINT_INDEX_FILENAME).write_text(dump_breakpoint_index(breakpoints))
+
+            self.assertEqual(load_breakpoint_index(translation_path), breakpoints)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import sys
+from pathlib import Path
+from unittest import TestCase, main
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.service import cache  # noqa: E402
+from app.service.cache import TranslationCache, translation_key  # noqa: E402
+
+
+class TranslationCacheTest(TestCase):
+    def setUp(self) -> None:
+        self.now = 1000.0
+        patcher = patch.object(cache, "monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_expires_after_ttl(self) -> None:
+        translations = TranslationCache[str](max_entries=10, max_size_bytes=100, ttl_seconds=60)
+        translations.put("a", "A", 1)
+
+        self.now += 60
+        self.assertEqual(translations.get("a"), "A")
+
+        self.now += 1
+        self.assertIsNone(translations.get("a"))
+
+        stats = translations.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.evictions), (1, 1, 1))
+        self.assertEqual((stats.entries, stats.size_bytes), (0, 0))
+
+    def test_evicts_least_recently_used(self) -> None:
+        translations = TranslationCache[str](max_entries=2, max_size_bytes=100, ttl_seconds=60)
+        translations.put("a", "A", 1)
+        translations.put("b", "B", 1)
+
+        # Чтение обновляет давность: вытесняется b, а не a
+        translations.get("a")
+        translations.put("c", "C", 1)
+
+        self.assertEqual(translations.get("a"), "A")
+        self.assertIsNone(translations.get("b"))
+        self.assertEqual(translations.get("c"), "C")
+
+    def test_evicts_by_size(self) -> None:
+        translations = TranslationCache[str](max_entries=10, max_size_bytes=10, ttl_seconds=60)
+        translations.put("a", "A", 4)
+        translations.put("b", "B", 4)
+        translations.put("c", "C", 4)
+
+        self.assertIsNone(translations.get("a"))
+        self.assertEqual(translations.stats().size_bytes, 8)
+
+        # Запись больше всего кэша не сохраняется и ничего не вытесняет
+        translations.put("d", "D", 11)
+        self.assertIsNone(translations.get("d"))
+        self.assertEqual(translations.stats().entries, 2)
+
+    def test_replaces_entry(self) -> None:
+        translations = TranslationCache[str](max_entries=10, max_size_bytes=10, ttl_seconds=60)
+        translations.put("a", "A", 4)
+        translations.put("a", "A2", 6)
+
+        self.assertEqual(translations.get("a"), "A2")
+        self.assertEqual(translations.stats().size_bytes, 6)
+
+    def test_key_depends_on_translator_version(self) -> None:
+        self.assertEqual(translation_key("PROGRAM a", "1"), translation_key("PROGRAM a", "1"))
+        self.assertNotEqual(translation_key("PROGRAM a", "1"), translation_key("PROGRAM a", "2"))
+        self.assertNotEqual(translation_key("PROGRAM a", "1"), translation_key("PROGRAM b", "1"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import json
+import threading
+from asyncio import sleep, wait_for
+from unittest import IsolatedAsyncioTestCase, main
+
+from tests.support import start_debugger
+
+
+# Протокол отладчика: ответ на команду — снимок остановки, на которой она получена
+class DebuggerHistoryTest(IsolatedAsyncioTestCase):
+    async def test_step_back_from_shown_stop(self) -> None:
+        for engine in ("bdb", "monitoring"):
+            with self.subTest(engine=engine):
+                session = await start_debugger(self, engine=engine)
+                for _ in range(3):
+                    shown = await session.command("STEP")
+
+                # Отладчик уже ждет на следующей остановке, но шаг назад отсчитывается от показанной
+                reply = await session.command("STEP_BACK 1")
+                self.assertEqual(reply["stop"], shown["stop"] - 1)
+                self.assertTrue(reply["history"])
+
+                reply = await session.command("STEP_BACK 1")
+                self.assertEqual(reply["stop"], shown["stop"] - 2)
+
+    async def test_goto_shown_stop(self) -> None:
+        session = await start_debugger(self)
+        await session.command("STEP")
+        shown = await session.command("STEP")
+
+        reply = await session.command(f"GOTO {shown['stop']}")
+        self.assertEqual(reply["stop"], shown["stop"])
+
+        reply = await session.command("STEP")
+        self.assertEqual(reply["stop"], shown["stop"] + 1)
+        self.assertNotIn("history", reply)
+
+
+class DebuggerSetVariableTest(IsolatedAsyncioTestCase):
+    async def test_rejects_without_leaving_stop(self) -> None:
+        session = await start_debugger(self)
+        await session.command("CONTINUE")
+        before = await session.command("RESYNC")
+        self.assertIn("out0", before["output_variables"])
+
+        for raw_command, error in (
+                ("SET_VARIABLE missing 1", "Unknown variable: missing"),
+                ("SET_VARIABLE out0 abc", "Invalid value for variable out0"),
+                ("SET_VARIABLE in0 maybe", "Invalid value for variable in0"),
+        ):
+            reply = await session.command(raw_command)
+            self.assertIn(error, reply["error"])
+
+        after = await session.command("RESYNC")
+        self.assertEqual(after["stop"], before["stop"])
+        self.assertEqual(after["output_variables"], before["output_variables"])
+
+        reply = await session.command("SET_VARIABLE out0 7")
+        self.assertEqual(reply["stop"], before["stop"])
+        self.assertEqual(reply["output_variables"]["out0"], 7)
+
+        reply = await session.command("CONTINUE")
+        self.assertEqual(reply["output_variables"]["out0"], 7)
+
+
+# Программа без точек останова: цикл без вызовов функций в одном кадре
+BUSY_LOOP_CODE = """from MuteTypes import *
+
+inVars = {}
+outVars = {}
+pStates = {}
+counter = 0
+
+
+class Program:
+    def run_iter(self):
+        global counter
+        while True:
+            counter += 1
+"""
+
+# Та же программа, завершающаяся исключением
+FAILING_LOOP_CODE = BUSY_LOOP_CODE.replace("while True:", "while counter < 1000:") + "        raise RuntimeError()\n"
+
+
+class DebuggerLiveTest(IsolatedAsyncioTestCase):
+    async def test_pause_stops_at_next_line(self) -> None:
+        for engine in ("bdb", "monitoring"):
+            with self.subTest(engine=engine):
+                session = await start_debugger(self, engine=engine, python_code=BUSY_LOOP_CODE)
+                first = await session.command("RUN_LIVE")
+
+                # Снимков RUN_LIVE нет: до точки останова программа не дойдет никогда
+                session.live_signals.pause.set()
+                output = await session.receive(timeout=2)
+
+                self.assertFalse(output.live)
+                self.assertGreater(json.loads(output.message)["stop"], first["stop"])
+                self.assertFalse(session.live_signals.pause.is_set())
+
+                # После паузы отладчик снова выполняет команды по одной, начиная с остановки паузы
+                paused_stop = json.loads(output.message)["stop"]
+                reply = await session.command("STEP")
+                self.assertEqual(reply["stop"], paused_stop)
+                reply = await session.command("STEP")
+                self.assertEqual(reply["stop"], paused_stop + 1)
+
+    async def test_program_exit_ends_live_run(self) -> None:
+        for engine in ("bdb", "monitoring"):
+            with self.subTest(engine=engine):
+                session = await start_debugger(self, engine=engine, python_code=FAILING_LOOP_CODE)
+                await session.command("RUN_LIVE")
+
+                with self.assertRaises(RuntimeError):
+                    await wait_for(session.task, 2)
+
+                # Поток наблюдения за PAUSE завершается вместе с программой, а не ждет PAUSE
+                await sleep(0.3)
+                self.assertNotIn("post-live-pause", [thread.name for thread in threading.enumerate()])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import sys
+from enum import Enum
+from pathlib import Path
+from typing import Any
+from unittest import TestCase, main
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.filters import compile_stop_filter  # noqa: E402
+from benchmarks.mute_types import RUNTIME_PATH, load_runtime  # noqa: E402
+
+runtime = load_runtime(RUNTIME_PATH, "mute_types_filters_test")
+
+
+class States(Enum):
+    Idle = 1
+    Run = 2
+
+
+def program_globals(level: int = 0, start: bool = False, state: States = States.Idle, name: str = "") -> dict[str, Any]:
+    return {
+        "inVars": {"start": runtime.MuteBool(start), "name": runtime.MuteStr(name)},
+        "outVars": {"level": runtime.MuteNum(level)},
+        "pStates": {"Pump_state": state},
+    }
+
+
+class StopFilterTest(TestCase):
+    def test_state_filter_matches_transition(self) -> None:
+        stop_filter = compile_stop_filter(["state", "Pump", "Run"])
+        stop_filter.reset(program_globals())
+
+        self.assertFalse(stop_filter.matches(program_globals()))
+        self.assertTrue(stop_filter.matches(program_globals(state=States.Run)))
+        # Процесс остался в состоянии: перехода нет
+        self.assertFalse(stop_filter.matches(program_globals(state=States.Run)))
+
+    def test_change_filter(self) -> None:
+        stop_filter = compile_stop_filter(["change", "level"])
+        stop_filter.reset(program_globals(level=1))
+
+        self.assertFalse(stop_filter.matches(program_globals(level=1)))
+        self.assertTrue(stop_filter.matches(program_globals(level=2)))
+        self.assertFalse(stop_filter.matches(program_globals(level=2)))
+
+    def test_expression_filter(self) -> None:
+        stop_filter = compile_stop_filter(["expr", 'outVars["level"]', "*", "2", ">", "5", "and", 'inVars["start"]'])
+
+        self.assertFalse(stop_filter.matches(program_globals(level=3)))
+        self.assertTrue(stop_filter.matches(program_globals(level=3, start=True)))
+        self.assertTrue(compile_stop_filter(["expr", 'outVars["level"].value[0] % 4 == 1']).matches(
+            program_globals(level=5)
+        ))
+        self.assertTrue(compile_stop_filter(["expr", 'pStates["Pump_state"].name == "Run"']).matches(
+            program_globals(state=States.Run)
+        ))
+
+    def test_rejects_unsafe_expressions(self) -> None:
+        for expression in (
+                "__import__('os')",
+                "inVars.__class__",
+                "[x for x in inVars]",
+                "globals",
+                "lambda: 1",
+                "2 ** 100000000",
+                '"x" * 4000000000',
+                '"%999999999d" % 1',
+        ):
+            with self.subTest(expression=expression), self.assertRaises(ValueError):
+                compile_stop_filter(["expr", expression])
+
+    def test_multiplies_only_numbers(self) -> None:
+        # Значения строк и ячейки value известны только при проверке: фильтр отказывает и останавливает программу
+        for expression in ('inVars["name"] * 4000000000', 'outVars["level"].value * 4000000000'):
+            with self.subTest(expression=expression):
+                stop_filter = compile_stop_filter(["expr", expression])
+                self.assertTrue(stop_filter.matches(program_globals(name="x")))
+
+    def test_rejects_unknown_kind(self) -> None:
+        for args in ([], ["when"], ["state"], ["change"], ["expr"], ["expr", "1 +"]):
+            with self.subTest(args=args), self.assertRaises(ValueError):
+                compile_stop_filter(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import sys
+from asyncio import Event, sleep, wait_for
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.service.jobs import JobQueueFullError, TranslationJobQueue  # noqa: E402
+from app.service.request_processing import CodeInfo, TranslatorOutput, debugging_request_processor  # noqa: E402
+
+
+# Очередь трансляций с подмененным обработчиком: трансляция ждет, пока тест ее не отпустит
+class TranslationJobQueueTest(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.release = Event()
+        self.processed: list[str] = []
+
+        async def process(post_code: str) -> tuple[None, TranslatorOutput, CodeInfo]:
+            self.processed.append(post_code)
+            await self.release.wait()
+            return None, TranslatorOutput(0, "", ""), CodeInfo({}, {}, {})
+
+        patcher = patch.object(debugging_request_processor, "process", process)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def start_queue(self, max_queued: int = 10) -> TranslationJobQueue:
+        queue = TranslationJobQueue(1, max_queued, retention=60)
+        await queue.start()
+        self.addAsyncCleanup(queue.stop)
+        return queue
+
+    async def test_deduplicates_unfinished_jobs(self) -> None:
+        queue = await self.start_queue()
+        first = queue.submit("PROGRAM same")
+        self.assertIs(queue.submit("PROGRAM same"), first)
+        self.assertIs(await queue.enqueue("PROGRAM same"), first)
+        other = queue.submit("PROGRAM other")
+        self.assertIsNot(other, first)
+
+        self.release.set()
+        await wait_for(queue.wait(first), 1)
+        await wait_for(queue.wait(other), 1)
+
+        self.assertEqual(self.processed, ["PROGRAM same", "PROGRAM other"])
+        self.assertEqual(first.status, "done")
+        self.assertIs(queue.get(first.job_id), first)
+
+        # Завершенная задача не переиспользуется: программа транслируется заново
+        again = queue.submit("PROGRAM same")
+        self.assertIsNot(again, first)
+        await wait_for(queue.wait(again), 1)
+        self.assertEqual(len(self.processed), 3)
+
+    async def test_rejects_when_full(self) -> None:
+        queue = await self.start_queue(max_queued=1)
+        queue.submit("PROGRAM running")
+        while not self.processed:
+            await sleep(0.01)
+
+        queue.submit("PROGRAM queued")
+        with self.assertRaises(JobQueueFullError):
+            queue.submit("PROGRAM rejected")
+        # Та же программа, что уже в очереди, места не требует
+        queue.submit("PROGRAM queued")
+
+    async def test_stop_fails_unfinished_jobs(self) -> None:
+        queue = await self.start_queue()
+        running = queue.submit("PROGRAM running")
+        queued = queue.submit("PROGRAM queued")
+        while running.status != "running":
+            await sleep(0.01)
+
+        await queue.stop()
+
+        # Ожидающие задач получают завершение, а не висят на running или queued
+        for job, error in ((running, "cancelled"), (queued, "stopped")):
+            await wait_for(queue.wait(job), 1)
+            self.assertEqual(job.status, "failed")
+            self.assertIn(error, job.error or "")
+            self.assertIsNotNone(job.finished_at)
+
+        # Та же программа после остановки — новая задача, а не завершенная
+        self.assertIsNot(queue.submit("PROGRAM running"), running)
+
+
+if __name__ == "__main__":
+    main()
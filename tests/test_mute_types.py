@@ -0,0 +1,69 @@
+import copy
+import json
+import sys
+from pathlib import Path
+from unittest import TestCase, main
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.mute_types import RUNTIME_PATH, load_runtime  # noqa: E402
+
+runtime = load_runtime(RUNTIME_PATH, "mute_types_test")
+
+
+# Семантика общего места хранения, на которую рассчитан код post2py
+class MuteTypesAliasingTest(TestCase):
+    def test_assigned_value_shares_location(self) -> None:
+        a, b = runtime.MuteNum(1), runtime.MuteNum(2)
+        a.value = b.value
+
+        b.__set__(5)
+        self.assertEqual(a, 5)
+
+        a.__set__(runtime.MuteNum(7))
+        self.assertEqual(b, 7)
+
+        a += 1
+        self.assertEqual(b, 8)
+        self.assertIs(a.value, b.value)
+
+    def test_writes_through_value_cell(self) -> None:
+        a = runtime.MuteNum(3)
+        cell = a.value
+        cell[0] = 9
+
+        self.assertEqual(a, 9)
+        self.assertEqual(a * 2, 18)
+        self.assertIs(a.value, cell)
+
+    def test_shared_wrapper_keeps_type(self) -> None:
+        flag, other = runtime.MuteBool(True), runtime.MuteBool(False)
+        flag.value = other.value
+
+        self.assertIsInstance(flag, runtime.MuteBool)
+        self.assertEqual(type(flag).__name__, "MuteBool")
+        self.assertFalse(flag)
+        self.assertEqual(json.dumps({"flag": flag}, cls=runtime.MuteEncoder), '{"flag": false}')
+
+    def test_results_are_independent(self) -> None:
+        a, b = runtime.MuteNum(2), runtime.MuteNum(3)
+        a.value = b.value
+
+        result = a + b
+        b.__set__(10)
+        self.assertEqual(result, 6)
+        self.assertEqual(runtime.get_value(result), 6)
+        self.assertIs(copy.copy(a), a)
+
+    def test_strings_share_location(self) -> None:
+        a, b = runtime.MuteStr("x"), runtime.MuteStr("y")
+        a.value = b.value
+        b.__set__("abc")
+
+        self.assertEqual(a, "abc")
+        self.assertEqual(str(a + "d"), "abcd")
+        self.assertIn("b", a)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import sys
+from asyncio import Event, Future, Task, get_running_loop, sleep, wait_for
+from collections import Counter
+from pathlib import Path
+from typing import Optional, cast
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import patch
+from uuid import UUID, uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.service.manager import PostDebuggerManager  # noqa: E402
+from app.service.registry import DebugSession, SessionLimitError, SessionRegistry  # noqa: E402
+from app.service.workspace import workspace_manager  # noqa: E402
+
+
+# Менеджер без отладчика: программа «работает», пока тест не завершит ее
+class StubManager:
+    pid: Optional[int] = None
+
+    def __init__(self) -> None:
+        self.program: Future[None] = get_running_loop().create_future()
+        self.stopped = False
+
+    def start(self) -> Task[None]:
+        async def run() -> None:
+            await self.program
+
+        return get_running_loop().create_task(run())
+
+    async def stop(self, timeout: float) -> None:
+        self.stopped = True
+
+
+class SessionRegistryTest(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.pins = Counter[UUID]()
+        self.pin_error: Optional[Exception] = None
+
+        async def pin(uuid: UUID) -> None:
+            self.pins[uuid] += 1
+            if self.pin_error is not None:
+                raise self.pin_error
+
+        def unpin(uuid: UUID) -> None:
+            self.pins[uuid] -= 1
+
+        for name, replacement in (("pin", pin), ("unpin", unpin)):
+            patcher = patch.object(workspace_manager, name, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def registry(self, max_sessions: int = 1, admission_timeout: float = 0,
+                 idle_timeout: float = 60) -> SessionRegistry:
+        registry = SessionRegistry(max_sessions, admission_timeout, idle_timeout, teardown_timeout=1)
+        self.addAsyncCleanup(registry.stop)
+        return registry
+
+    async def open(self, registry: SessionRegistry, closed: Optional[Event] = None) -> DebugSession:
+        async def close_connection() -> None:
+            if closed is not None:
+                closed.set()
+
+        return await registry.open(uuid4(), cast(PostDebuggerManager, StubManager()), close_connection)
+
+    async def test_rejects_over_limit(self) -> None:
+        registry = self.registry()
+        session = await self.open(registry)
+
+        with self.assertRaises(SessionLimitError):
+            await self.open(registry)
+
+        await registry.release(session)
+        await registry.release(session)
+        self.assertTrue(cast(StubManager, session.manager).stopped)
+        self.assertEqual(self.pins[session.uuid], 0)
+
+        # Повторное освобождение не добавляет места сверх лимита
+        await self.open(registry)
+        with self.assertRaises(SessionLimitError):
+            await self.open(registry)
+
+    async def test_waits_for_slot(self) -> None:
+        registry = self.registry(admission_timeout=1)
+        session = await self.open(registry)
+
+        waiting = get_running_loop().create_task(self.open(registry))
+        await sleep(0.05)
+        self.assertFalse(waiting.done())
+
+        await registry.release(session)
+        await wait_for(waiting, 1)
+        self.assertEqual(registry.active_sessions, 1)
+
+    async def test_admission_timeout(self) -> None:
+        registry = self.registry(admission_timeout=0.05)
+        await self.open(registry)
+
+        with self.assertRaises(SessionLimitError):
+            await self.open(registry)
+
+    async def test_failed_pin_releases_slot(self) -> None:
+        registry = self.registry()
+        self.pin_error = FileNotFoundError("Translation not found")
+
+        with self.assertRaises(FileNotFoundError):
+            await self.open(registry)
+        self.assertEqual(sum(self.pins.values()), 0)
+
+        self.pin_error = None
+        await self.open(registry)
+
+    async def test_reaps_idle_sessions(self) -> None:
+        registry = self.registry(max_sessions=2, idle_timeout=0.05)
+        idle_closed, busy_closed = Event(), Event()
+        idle = await self.open(registry, idle_closed)
+        busy = await self.open(registry, busy_closed)
+        registry.begin_command(busy)
+
+        await registry.start()
+        await wait_for(idle_closed.wait(), 1)
+
+        # Сессия с выполняющейся командой не простаивает, сколько бы команда ни шла
+        await sleep(0.15)
+        self.assertTrue(idle.released)
+        self.assertFalse(busy.released)
+        self.assertFalse(busy_closed.is_set())
+        self.assertEqual(registry.active_sessions, 1)
+
+        registry.end_command(busy)
+        await wait_for(busy_closed.wait(), 1)
+        self.assertEqual(registry.active_sessions, 0)
+
+    async def test_closes_session_when_program_exits(self) -> None:
+        registry = self.registry()
+        closed = Event()
+        session = await self.open(registry, closed)
+        registry.activate(session)
+
+        cast(StubManager, session.manager).program.set_result(None)
+
+        await wait_for(closed.wait(), 1)
+        await sleep(0)
+        self.assertTrue(session.released)
+
+
+if __name__ == "__main__":
+    main()
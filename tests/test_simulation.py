@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+from unittest import TestCase, main
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.service.simulation import ScenarioStep, parse_scenario_csv  # noqa: E402
+
+
+class ScenarioCsvTest(TestCase):
+    def test_parses_steps(self) -> None:
+        steps = parse_scenario_csv("cycle, start ,level\n0,true,0\n\n100,,7\n", max_steps=10)
+
+        # Пустая ячейка не попадает в шаг, пустая строка пропускается
+        self.assertEqual(steps, [
+            ScenarioStep(0, {"start": "true", "level": "0"}),
+            ScenarioStep(100, {"level": "7"}),
+        ])
+
+    def test_short_rows(self) -> None:
+        steps = parse_scenario_csv("cycle,start,level\n5,false\n", max_steps=10)
+        self.assertEqual(steps, [ScenarioStep(5, {"start": "false"})])
+
+    def test_rejects_invalid_scenarios(self) -> None:
+        for text, error in (
+                ("", "must start with a cycle column"),
+                ("start,cycle\n", "must start with a cycle column"),
+                ("cycle,start\nfirst,true\n", "Invalid cycle on line 2: 'first'"),
+                ("cycle,start\n0,true\n-1,false\n", "Negative cycle on line 3: -1"),
+                ("cycle,start\n0,true,1\n", "Too many values on line 2"),
+        ):
+            with self.subTest(text=text), self.assertRaises(ValueError) as context:
+                parse_scenario_csv(text, max_steps=10)
+            self.assertIn(error, str(context.exception))
+
+    def test_limits_steps(self) -> None:
+        text = "cycle,start\n" + "".join(f"{cycle},true\n" for cycle in range(3))
+        self.assertEqual(len(parse_scenario_csv(text, max_steps=3)), 3)
+
+        with self.assertRaises(ValueError) as context:
+            parse_scenario_csv(text + "3,false\n", max_steps=3)
+        self.assertIn("Too many scenario steps (max 3)", str(context.exception))
+
+
+if __name__ == "__main__":
+    main()
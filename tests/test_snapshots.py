@@ -0,0 +1,118 @@
+import json
+import sys
+from pathlib import Path
+from typing import Any
+from unittest import TestCase, main
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.history import SnapshotHistory  # noqa: E402
+from app.core.util.output import SnapshotEncoder, SnapshotOptions, apply_delta, diff_output  # noqa: E402
+
+
+def snapshot(level: Any = 0, start: bool = False, state: str = "States.Idle", process: str = "Pump") -> dict[str, Any]:
+    return {
+        "process_name": process,
+        "process_states": {"Pump": state},
+        "input_variables": {"start": start},
+        "output_variables": {"level": level},
+    }
+
+
+class SnapshotDeltaTest(TestCase):
+    def test_apply_restores_snapshot(self) -> None:
+        previous = snapshot()
+        for current in (snapshot(level=1), snapshot(start=True, state="States.Run", process="Valve"), previous):
+            delta = diff_output(previous, current)
+            self.assertIsNotNone(delta)
+            assert delta is not None
+            self.assertEqual(apply_delta(previous, delta), current)
+
+    def test_delta_keeps_type_changes(self) -> None:
+        # 1 == True, но клиент должен увидеть смену типа
+        delta = diff_output(snapshot(level=1), snapshot(level=True))
+        assert delta is not None
+        self.assertEqual(delta["output_variables"], {"level": True})
+
+    def test_removed_key_needs_full_snapshot(self) -> None:
+        current = snapshot()
+        del current["input_variables"]["start"]
+        self.assertIsNone(diff_output(snapshot(), current))
+
+    def test_encoder_sends_deltas_after_first_snapshot(self) -> None:
+        encoder = SnapshotEncoder(SnapshotOptions(deltas=True))
+
+        first = json.loads(encoder.encode(snapshot(), 1))
+        second = json.loads(encoder.encode(snapshot(level=5), 2))
+
+        self.assertTrue(first["full"])
+        self.assertEqual((second["seq"], second["base_seq"]), (2, 1))
+        self.assertEqual(second["output_variables"], {"level": 5})
+        self.assertEqual(second["input_variables"], {})
+
+        # После RESYNC следующий снимок полный, а нумерация продолжается
+        encoder.reset()
+        third = json.loads(encoder.encode(snapshot(level=5), 3))
+        self.assertTrue(third["full"])
+        self.assertEqual(third["seq"], 3)
+        self.assertEqual(third["input_variables"], {"start": False})
+
+
+class SnapshotHistoryTest(TestCase):
+    def test_gaps_resolve_to_nearest_recorded_stop(self) -> None:
+        history = SnapshotHistory(max_entries=10, max_bytes=1 << 20)
+        for stop in (1, 2, 5, 9):
+            history.record(stop, snapshot(level=stop))
+
+        self.assertEqual(history.nearest_stop(4), 2)
+        self.assertEqual(history.nearest_stop(5), 5)
+        self.assertEqual(history.nearest_stop(100), 9)
+        self.assertIsNone(history.nearest_stop(0))
+
+        self.assertEqual(history.get(5), snapshot(level=5))
+        # Пропущенная остановка — состояние последней записанной перед ней
+        self.assertEqual(history.get(7), snapshot(level=5))
+        self.assertIsNone(history.get(10))
+
+    def test_evicts_oldest_stops(self) -> None:
+        history = SnapshotHistory(max_entries=3, max_bytes=1 << 20)
+        for stop in range(1, 6):
+            history.record(stop, snapshot(level=stop))
+
+        self.assertEqual((history.first_stop, history.last_stop), (3, 5))
+        self.assertIsNone(history.get(2))
+        for stop in range(3, 6):
+            self.assertEqual(history.get(stop), snapshot(level=stop))
+
+    def test_full_snapshot_survives_eviction(self) -> None:
+        history = SnapshotHistory(max_entries=2, max_bytes=1 << 20)
+        history.record(1, snapshot())
+        without_start = snapshot(level=2)
+        del without_start["input_variables"]["start"]
+        history.record(2, without_start)
+        history.record(3, snapshot(level=3))
+
+        self.assertEqual(history.first_stop, 2)
+        self.assertEqual(history.get(2), without_start)
+        self.assertEqual(history.get(3), snapshot(level=3))
+
+    def test_restart_clears_history(self) -> None:
+        history = SnapshotHistory(max_entries=10, max_bytes=1 << 20)
+        for stop in (1, 2, 3):
+            history.record(stop, snapshot(level=stop))
+
+        history.record(1, snapshot(level=100))
+
+        self.assertEqual((history.first_stop, history.last_stop), (1, 1))
+        self.assertEqual(history.get(1), snapshot(level=100))
+
+    def test_disabled(self) -> None:
+        history = SnapshotHistory(max_entries=0, max_bytes=1 << 20)
+        history.record(1, snapshot())
+
+        self.assertFalse(history.enabled)
+        self.assertIsNone(history.get(1))
+
+
+if __name__ == "__main__":
+    main()
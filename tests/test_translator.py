@@ -0,0 +1,111 @@
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Optional
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.service.request_processing import (  # noqa: E402
+    CodeInfo, DebuggingRequestProcessor, PostCodeTranslator, TranslatorOutput
+)
+from app.settings import settings  # noqa: E402
+from benchmarks.programs import ProgramSpec, generate_post  # noqa: E402
+
+STUB_TRANSLATOR = Path(__file__).resolve().parent.parent / "benchmarks" / "stub_translator.py"
+
+
+# Однократная трансляция (TRANSLATOR_COMMAND) на заглушке benchmarks/stub_translator.py
+class OneShotTranslationTest(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._directory = TemporaryDirectory()
+        self.path = Path(self._directory.name)
+
+    def tearDown(self) -> None:
+        self._directory.cleanup()
+
+    def stub_command(self, *args: str) -> list[str]:
+        return [sys.executable, str(STUB_TRANSLATOR), "{source}", "-o={output}", *args]
+
+    async def test_translates(self) -> None:
+        with patch.object(settings, "TRANSLATOR_COMMAND", self.stub_command()):
+            output = await PostCodeTranslator().translate(generate_post(ProgramSpec("demo", 1, 2, 1)), self.path)
+
+        self.assertEqual(output.return_code, 0)
+        self.assertEqual(output.stdout.strip(), "Translated demo")
+        self.assertTrue((self.path / "python_code.py").exists())
+
+    async def test_kills_translator_on_timeout(self) -> None:
+        with patch.object(settings, "TRANSLATOR_COMMAND", self.stub_command("--delay", "30")), \
+                patch.object(settings, "TRANSLATION_TIMEOUT", 0.5):
+            started = perf_counter()
+            output = await PostCodeTranslator().translate(generate_post(ProgramSpec("slow", 1, 1, 1)), self.path)
+
+        self.assertLess(perf_counter() - started, 5)
+        self.assertEqual(output.return_code, -1)
+        self.assertIn("did not finish in 0.5 seconds", output.stderr)
+        self.assertFalse((self.path / "python_code.py").exists())
+
+
+class TranslationProcessingTest(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._directory = TemporaryDirectory()
+        self.path = Path(self._directory.name)
+
+    def tearDown(self) -> None:
+        self._directory.cleanup()
+
+    async def process(
+            self,
+            post_code: str,
+            processor: Optional[DebuggingRequestProcessor] = None,
+            translation_path: Optional[Path] = None
+    ) -> tuple[TranslatorOutput, CodeInfo]:
+        if processor is None:
+            processor = DebuggingRequestProcessor()
+            self.addAsyncCleanup(processor.stop)
+
+        command = [sys.executable, str(STUB_TRANSLATOR), "{source}", "-o={output}"]
+        with patch.object(settings, "TRANSLATOR_COMMAND", command), \
+                patch.object(settings, "TRANSLATOR_VERSION", "stub"):
+            return await processor._process(post_code, translation_path if translation_path is not None else self.path)
+
+    async def test_restores_cached_translation(self) -> None:
+        processor = DebuggingRequestProcessor()
+        self.addAsyncCleanup(processor.stop)
+        post_code = generate_post(ProgramSpec("cached", 1, 2, 1))
+
+        translator_output, code_info = await self.process(post_code, processor)
+
+        restored_path = self.path / "restored"
+        restored_path.mkdir()
+        with patch.object(processor._post_code_translator, "translate", side_effect=AssertionError("translated")):
+            restored_output, restored_code_info = await self.process(post_code, processor, restored_path)
+
+        self.assertEqual(restored_output, translator_output)
+        self.assertEqual(restored_code_info, code_info)
+        for name in ("post_code.post", "python_code.py"):
+            self.assertEqual(
+                (restored_path / name).read_text(encoding="utf-8"), (self.path / name).read_text(encoding="utf-8")
+            )
+
+    async def test_extracts_code_info(self) -> None:
+        translator_output, code_info = await self.process(generate_post(ProgramSpec("demo", 2, 2, 1)))
+
+        self.assertEqual(translator_output.return_code, 0)
+        self.assertEqual(code_info.states_by_process, {"P0": ["S0", "S1"], "P1": ["S0", "S1"]})
+        self.assertEqual(code_info.value_by_input_variable, {"in0": "true"})
+        self.assertEqual(code_info.value_by_output_variable, {"out0": "0"})
+
+    async def test_skips_code_info_after_failed_translation(self) -> None:
+        translator_output, code_info = await self.process("not a program\n")
+
+        self.assertNotEqual(translator_output.return_code, 0)
+        self.assertFalse((self.path / "python_code.py").exists())
+        self.assertEqual(code_info.value_by_input_variable, {})
+
+
+if __name__ == "__main__":
+    main()
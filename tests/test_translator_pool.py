@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from unittest import IsolatedAsyncioTestCase, main
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.service.translator_pool import TranslatorPoolError, TranslatorWorkerPool  # noqa: E402
+from benchmarks.programs import ProgramSpec, generate_post  # noqa: E402
+
+STUB_TRANSLATOR = Path(__file__).resolve().parent.parent / "benchmarks" / "stub_translator.py"
+
+
+# Пул резидентных трансляторов на заглушке benchmarks/stub_translator.py --serve
+class TranslatorWorkerPoolTest(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._directory = TemporaryDirectory()
+        self.path = Path(self._directory.name)
+
+    def tearDown(self) -> None:
+        self._directory.cleanup()
+
+    async def start_pool(self, *args: str, job_timeout: float = 5) -> TranslatorWorkerPool:
+        pool = TranslatorWorkerPool(
+            [sys.executable, str(STUB_TRANSLATOR), "--serve", *args],
+            self.path,
+            size=1,
+            job_timeout=job_timeout,
+            health_check_interval=60
+        )
+        await pool.start()
+        self.addAsyncCleanup(pool.stop)
+        return pool
+
+    def write_source(self, name: str, post_code: str) -> Path:
+        workspace = self.path / name
+        workspace.mkdir()
+        source_path = workspace / "post_code.post"
+        source_path.write_text(post_code, encoding="utf-8")
+        return source_path
+
+    async def test_translates(self) -> None:
+        pool = await self.start_pool()
+        source_path = self.write_source("ok", generate_post(ProgramSpec("demo", 2, 2, 2)))
+
+        return_code, stdout, stderr = await pool.translate(source_path, "python_code.py")
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(stdout, "Translated demo")
+        self.assertEqual(stderr, "")
+        self.assertIn("class P1(Program)", (source_path.parent / "python_code.py").read_text(encoding="utf-8"))
+
+    async def test_restarts_crashed_worker(self) -> None:
+        pool = await self.start_pool("--crash-on", "CRASH")
+        crash_path = self.write_source("crash", "PROGRAM CRASH\n")
+
+        with self.assertRaises(TranslatorPoolError) as error:
+            await pool.translate(crash_path, "python_code.py")
+
+        # В ошибку попадает то, что транслятор написал в stderr перед завершением
+        self.assertIn("exited unexpectedly", str(error.exception))
+        self.assertIn("exit code 3", str(error.exception))
+        self.assertIn(f"Translator crashed on {crash_path}", str(error.exception))
+
+        source_path = self.write_source("ok", generate_post(ProgramSpec("after_crash", 1, 2, 1)))
+        return_code, stdout, _ = await pool.translate(source_path, "python_code.py")
+
+        self.assertEqual(return_code, 0)
+        self.assertEqual(stdout, "Translated after_crash")
+
+    async def test_times_out(self) -> None:
+        pool = await self.start_pool("--delay", "5", job_timeout=0.3)
+        source_path = self.write_source("slow", generate_post(ProgramSpec("slow", 1, 1, 1)))
+
+        started = perf_counter()
+        with self.assertRaises(TranslatorPoolError) as error:
+            await pool.translate(source_path, "python_code.py")
+
+        self.assertIn("did not respond in 0.3 seconds", str(error.exception))
+        self.assertLess(perf_counter() - started, 3)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import gc
+import os
+import sys
+from asyncio import create_task, get_running_loop, sleep, to_thread
+from pathlib import Path
+from time import perf_counter
+from time import sleep as blocking_sleep
+from typing import Any
+from unittest import IsolatedAsyncioTestCase, main
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.communication import ProcessCommunicationQueue  # noqa: E402
+from app.service.util.worker import (  # noqa: E402
+    ResidentWorkerPool, WorkerError, WorkerTimeoutError, run_in_process
+)
+
+
+def _square(value: int) -> int:
+    return value * value
+
+
+def _large(size: int) -> bytes:
+    return b"x" * size
+
+
+def _fail() -> None:
+    raise RuntimeError("broken")
+
+
+def _hang() -> None:
+    blocking_sleep(30)
+
+
+class RunInProcessTest(IsolatedAsyncioTestCase):
+    async def test_returns_result(self) -> None:
+        self.assertEqual(await run_in_process(_square, 7, timeout=10), 49)
+        # Результат больше буфера канала дочитывается целиком
+        self.assertEqual(len(await run_in_process(_large, 4 * 1024 * 1024, timeout=10)), 4 * 1024 * 1024)
+
+    async def test_reports_error(self) -> None:
+        with self.assertRaises(WorkerError) as error:
+            await run_in_process(_fail, timeout=10)
+        self.assertIn("RuntimeError: broken", str(error.exception))
+
+    async def test_kills_on_timeout(self) -> None:
+        started = perf_counter()
+        with self.assertRaises(WorkerTimeoutError):
+            await run_in_process(_hang, timeout=0.5)
+        self.assertLess(perf_counter() - started, 10)
+
+
+class ResidentWorkerPoolTest(IsolatedAsyncioTestCase):
+    async def start_pool(self, max_jobs: int = 100) -> ResidentWorkerPool:
+        pool = ResidentWorkerPool(1, max_jobs)
+        self.addAsyncCleanup(pool.stop)
+        return pool
+
+    async def test_reuses_process(self) -> None:
+        pool = await self.start_pool()
+        pid = await pool.run(os.getpid, timeout=10)
+
+        self.assertNotEqual(pid, os.getpid())
+        self.assertEqual(await pool.run(os.getpid, timeout=10), pid)
+        self.assertEqual(await pool.run(_square, 5, timeout=10), 25)
+
+    async def test_error_keeps_process(self) -> None:
+        pool = await self.start_pool()
+        pid = await pool.run(os.getpid, timeout=10)
+
+        with self.assertRaises(WorkerError):
+            await pool.run(_fail, timeout=10)
+        self.assertEqual(await pool.run(os.getpid, timeout=10), pid)
+
+    async def test_replaces_process_after_timeout(self) -> None:
+        pool = await self.start_pool()
+        pid = await pool.run(os.getpid, timeout=10)
+
+        with self.assertRaises(WorkerTimeoutError):
+            await pool.run(_hang, timeout=0.5)
+        self.assertNotEqual(await pool.run(os.getpid, timeout=10), pid)
+
+    async def test_recycles_after_max_jobs(self) -> None:
+        pool = await self.start_pool(max_jobs=2)
+        first = await pool.run(os.getpid, timeout=10)
+        self.assertEqual(await pool.run(os.getpid, timeout=10), first)
+        self.assertNotEqual(await pool.run(os.getpid, timeout=10), first)
+
+
+class ProcessCommunicationQueueTest(IsolatedAsyncioTestCase):
+    async def test_cancelled_receive_keeps_message(self) -> None:
+        queue = ProcessCommunicationQueue[bytes]()
+        self.addCleanup(queue.close)
+
+        message = b"y" * (4 * 1024 * 1024)
+        sending = create_task(to_thread(queue.send_message_blocking, message))
+
+        receive = create_task(queue.receive_message())
+        # Отмена, пока сообщение еще пишется в канал
+        while queue._pending_receive is None:
+            await sleep(0.001)
+        receive.cancel()
+
+        self.assertEqual(await queue.receive_message(), message)
+        await sending
+
+    async def test_abandoned_receive_error_is_not_logged(self) -> None:
+        errors: list[dict[str, Any]] = []
+        get_running_loop().set_exception_handler(lambda _, context: errors.append(context))
+
+        queue = ProcessCommunicationQueue[bytes]()
+        self.addCleanup(queue.close)
+
+        # Начало сообщения длиной 100 байт: чтение в потоке ждет остальное
+        os.write(queue._sender.fileno(), (100).to_bytes(4, "big") + b"x" * 10)
+        receive = create_task(queue.receive_message())
+        while queue._pending_receive is None:
+            await sleep(0.001)
+        receive.cancel()
+
+        # Процесс на другой стороне завершился, а сессия больше не читает очередь
+        pending_receive = queue._pending_receive
+        queue.close_sender()
+        while not pending_receive.done():
+            await sleep(0.001)
+        del receive, pending_receive
+        queue._pending_receive = None
+        gc.collect()
+
+        self.assertEqual(errors, [])
+
+
+if __name__ == "__main__":
+    main()
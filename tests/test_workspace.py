@@ -0,0 +1,102 @@
+import os
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import time
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import patch
+from uuid import UUID, uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.service.directory import WorkspaceDirectory, workspace_directory  # noqa: E402
+from app.service.workspace import WorkspaceManager  # noqa: E402
+
+
+# Сборка каталогов трансляций с закреплениями этого и другого рабочего процесса узла
+class WorkspaceCollectionTest(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self._directory = TemporaryDirectory()
+        self.root = Path(self._directory.name) / "workspaces"
+        self.root.mkdir()
+
+        await workspace_directory.start()
+        self.addAsyncCleanup(workspace_directory.stop)
+
+        # Другой рабочий процесс того же узла с общей базой каталогов
+        self.other = WorkspaceDirectory(
+            workspace_directory._path, workspace_directory.node_id, None, heartbeat_interval=60, worker_ttl=60
+        )
+        self.other._worker_id = f"{workspace_directory.node_id}:other"
+        await self.other.start()
+        self.addAsyncCleanup(self.other.stop)
+
+    def tearDown(self) -> None:
+        self._directory.cleanup()
+
+    def manager(self, ttl: float = 60, max_bytes: int = 1 << 30, max_workspaces: int = 100) -> WorkspaceManager:
+        return WorkspaceManager(self.root, ttl, max_bytes, max_workspaces, gc_interval=60)
+
+    def workspace(self, age: float, size: int = 10) -> UUID:
+        uuid = uuid4()
+        path = self.root / str(uuid)
+        path.mkdir()
+        (path / "python_code.py").write_bytes(b"x" * size)
+        used = time() - age
+        os.utime(path, (used, used))
+        return uuid
+
+    def exists(self, uuid: UUID) -> bool:
+        return (self.root / str(uuid)).exists()
+
+    async def test_collects_expired(self) -> None:
+        expired, fresh = self.workspace(age=120), self.workspace(age=0)
+
+        self.assertEqual(await self.manager().collect(), 1)
+        self.assertFalse(self.exists(expired))
+        self.assertTrue(self.exists(fresh))
+
+    async def test_collects_oldest_over_quota(self) -> None:
+        oldest, older, newest = self.workspace(age=30), self.workspace(age=20), self.workspace(age=10)
+
+        self.assertEqual(await self.manager(max_workspaces=1).collect(), 2)
+        self.assertFalse(self.exists(oldest))
+        self.assertFalse(self.exists(older))
+        self.assertTrue(self.exists(newest))
+
+        large = self.workspace(age=5, size=45)
+        self.assertEqual(await self.manager(max_bytes=50).collect(), 1)
+        self.assertFalse(self.exists(newest))
+        self.assertTrue(self.exists(large))
+
+    async def test_keeps_pinned(self) -> None:
+        manager = self.manager()
+        local, elsewhere = self.workspace(age=120), self.workspace(age=120)
+
+        await manager.pin(local)
+        await self.other.pin(elsewhere)
+        self.assertEqual(await manager.collect(), 0)
+
+        # Открепление считается использованием: каталог этого процесса снова стареет с этого момента
+        manager.unpin(local)
+        await self.other._call(self.other._execute, "DELETE FROM pins")
+        self.assertEqual(await manager.collect(), 1)
+        self.assertTrue(self.exists(local))
+        self.assertFalse(self.exists(elsewhere))
+
+    async def test_rechecks_pins_before_rename(self) -> None:
+        manager = self.manager()
+        uuid = self.workspace(age=120)
+
+        # Закрепление другим процессом после того, как сборка выбрала каталоги
+        async def pin_after_selection() -> set[str]:
+            await self.other.pin(uuid)
+            return set()
+
+        with patch.object(workspace_directory, "pinned_elsewhere", pin_after_selection):
+            self.assertEqual(await manager.collect(), 0)
+        self.assertTrue(self.exists(uuid))
+
+
+if __name__ == "__main__":
+    main()